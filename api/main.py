@@ -6,7 +6,13 @@ print(os.getenv("MY_VARIABLE"))
 
 from fastapi import FastAPI
 from open_notebook.database.milvus_init import get_milvus_client, close_milvus_client
+from open_notebook.database.milvus_async import close_milvus_pool
+from open_notebook.graphs.ask_chat import get_conversation_graph
 from open_notebook.graphs.utils import close_pool
+from open_notebook.ingestion import ingestion_pool
+from open_notebook.memory_writer import memory_writer
+from open_notebook.extraction import content_extractor
+from open_notebook.rerank import rerank_stage
 from fastapi.middleware.cors import CORSMiddleware
 
 from api.auth import PasswordAuthMiddleware
@@ -14,6 +20,7 @@ from api.routers import (
     context,
     embedding,
     insights,
+    jobs,
     notebooks,
     search,
     sources,
@@ -35,6 +42,13 @@ async def lifespan(app: FastAPI):
     # Startup
     await migrate_all()
     get_milvus_client()
+    await ingestion_pool.start()
+    await memory_writer.start()
+    try:
+        # compiled once here, reused by every chat turn
+        await get_conversation_graph()
+    except Exception as e:
+        logger.warning(f"Conversation graph not compiled at startup, will compile on first chat: {str(e)}")
     
     # Ensure the coroutine is awaited
     try:
@@ -50,8 +64,13 @@ async def lifespan(app: FastAPI):
         asyncio.run(init_default_transformation_function())
     
     yield
+    await ingestion_pool.stop()
+    await memory_writer.stop()
+    content_extractor.shutdown()
     await close_pool()
     close_milvus_client()
+    await close_milvus_pool()
+    await rerank_stage.close()
 
 app = FastAPI(
     title="Open Notebook API",
@@ -85,6 +104,7 @@ app.include_router(sources.router, prefix="/api", tags=["sources"])
 app.include_router(insights.router, prefix="/api", tags=["insights"])
 app.include_router(notebook_sources.router, prefix="/api", tags=["notebook-source"])
 app.include_router(notebook_ask_chat.router, prefix="/api", tags=["notebook-ask-chat"])
+app.include_router(jobs.router, prefix="/api", tags=["jobs"])
 import asyncio
 
 @app.get("/")
@@ -41,13 +41,33 @@ class SearchRequest(BaseModel):
     source_ids: List[str] = Field([], description="Source ids will be searched in, if [] then search all")
     type: Literal["semantic", "text", "hybrid"] = Field("text", description="Search type")
     limit: int = Field(100, description="Maximum number of results", le=1000)
+    rerank: bool = Field(True, description="Rerank over-fetched candidates when a reranker is configured")
+    search_profile: Optional[Dict[str, Any]] = Field(None, description="Overrides of the notebook search profile (hybrid search only)")
 
 
 
+class MultiSearchRequest(BaseModel):
+    queries: List[str] = Field(..., description="Search queries, searched together in one hybrid search", min_length=1)
+    notebook_id: str = Field(..., description="Notebook id")
+    source_ids: List[str] = Field([], description="Source ids will be searched in, if [] then search all")
+    limit: int = Field(10, description="Maximum number of results per query", le=1000)
+    rerank: bool = Field(True, description="Rerank the merged results when a reranker is configured")
+    rerank_query: Optional[str] = Field(None, description="Question the merged results are reranked against, defaults to the queries")
+    window: int = Field(0, description="Neighbour chunks (order ± window) stitched around each merged result", ge=0, le=10)
+    search_profile: Optional[Dict[str, Any]] = Field(None, description="Overrides of the notebook search profile")
+
+
+class MultiSearchResponse(BaseModel):
+    per_query: Dict[str, List[Dict[str, Any]]] = Field(..., description="Ranked results of each query")
+    merged: List[Dict[str, Any]] = Field(..., description="Results of all queries fused with reciprocal rank fusion")
+    rerank_latency: Optional[float] = Field(None, description="Seconds spent reranking, null if not reranked")
+
+
 class SearchResponse(BaseModel):
     results: List[Dict[str, Any]] = Field(..., description="Search results")
     total_count: int = Field(..., description="Total number of results")
     search_type: str = Field(..., description="Type of search performed")
+    rerank_latency: Optional[float] = Field(None, description="Seconds spent reranking, null if not reranked")
 
 class ChatRequest(BaseModel):
     notebook_id: uuid.UUID = Field(..., description="ID of the notebook")
@@ -67,6 +87,7 @@ class NotebookSourceCreateRequest(BaseModel):
     title: Optional[str] = Field(None, description="Source title")
     transformations: Optional[List[str]] = Field(default_factory=list, description="Transformation IDs to apply")
     embed: bool = Field(False, description="Whether to embed content for vector search")
+    async_processing: bool = Field(False, description="Queue the source as a background ingestion job and return the job right away")
 
 
 # Transformations API models
@@ -144,11 +165,43 @@ class SourceCreate(BaseModel):
     transformations: Optional[List[str]] = Field(default_factory=list, description="Transformation IDs to apply")
     embed: bool = Field(False, description="Whether to embed content for vector search")
     delete_source: bool = Field(False, description="Whether to delete uploaded file after processing")
+    async_processing: bool = Field(False, description="Queue the source as a background ingestion job and return the job right away")
+
+
+class BulkSourceItem(BaseModel):
+    source_id: str
+    type: str = Field(..., description="Source type: link, upload, or text")
+    url: Optional[str] = Field(None, description="URL for link type")
+    file_path: Optional[str] = Field(None, description="File path for upload type")
+    content: Optional[str] = Field(None, description="Text content for text type")
+    title: Optional[str] = Field(None, description="Source title")
+    delete_source: bool = Field(False, description="Whether to delete uploaded file after processing")
+
+
+class BulkSourceCreate(BaseModel):
+    notebook_id: str = Field(..., description="Notebook ID to add the sources to")
+    embed: bool = Field(True, description="Whether to embed content for vector search")
+    items: List[BulkSourceItem] = Field(..., description="Sources to ingest", min_length=1)
+
+
+class IngestionJobResponse(BaseModel):
+    id: uuid.UUID
+    kind: str
+    status: str = Field(..., description="queued, running, completed or dead")
+    progress: float = Field(..., description="Progress between 0 and 1")
+    progress_message: Optional[str] = None
+    attempts: int
+    max_attempts: int
+    error: Optional[str] = None
+    result: Optional[Dict[str, Any]] = None
+    created: str
+    updated: str
 
 
 class SourceUpdate(BaseModel):
     title: Optional[str] = Field(None, description="Source title")
     topics: Optional[List[str]] = Field(None, description="Source topics")
+    full_text: Optional[str] = Field(None, description="New source text; embedded sources are re-vectorized incrementally")
 
 class SourceEmbeddingResponse(BaseModel):
     id: str
@@ -2,8 +2,10 @@ from fastapi import APIRouter, HTTPException
 from loguru import logger
 
 from api.models import EmbedRequest, EmbedResponse
+from open_notebook.database.embedding_cache import embedding_cache
 from open_notebook.domain.models import model_manager
 from open_notebook.domain.notebook import Source
+from open_notebook.embedding import batch_embedder, query_embedding_cache
 
 router = APIRouter()
 
@@ -43,8 +45,8 @@ async def embed_content(embed_request: EmbedRequest):
                     item_type=item_type,
                 )
 
-            # Perform embedding
-            await source_item.vectorize(source_item.notebook_id)
+            # Perform embedding (also records the chunk ids of the source)
+            await source_item.revectorize(source_item.notebook_id)
             message = "Source embedded successfully"
 
         return EmbedResponse(
@@ -60,3 +62,13 @@ async def embed_content(embed_request: EmbedRequest):
         raise HTTPException(
             status_code=500, detail=f"Error embedding content: {str(e)}"
         )
+
+
+@router.get("/embed/stats")
+async def embedding_stats():
+    """Embedding cache hit rate and per-batch embedding latency."""
+    return {
+        "cache": embedding_cache.stats(),
+        "query_cache": query_embedding_cache.stats(),
+        "batches": batch_embedder.latency_summary(),
+    }
@@ -0,0 +1,93 @@
+import os
+from typing import List, Literal, Optional
+
+from fastapi import APIRouter, HTTPException, Query
+from loguru import logger
+
+from api.models import IngestionJobResponse
+from open_notebook.domain.ingestion_job import IngestionJob
+from open_notebook.exceptions import NotFoundError
+
+router = APIRouter()
+
+
+def job_response(job: IngestionJob) -> IngestionJobResponse:
+    return IngestionJobResponse(
+        id=job.id,
+        kind=job.kind,
+        status=job.status,
+        progress=job.progress,
+        progress_message=job.progress_message,
+        attempts=job.attempts,
+        max_attempts=job.max_attempts,
+        error=job.error,
+        result=job.result,
+        created=str(job.created),
+        updated=str(job.updated),
+    )
+
+
+@router.get("/jobs", response_model=List[IngestionJobResponse])
+async def get_jobs(
+    status: Optional[Literal["queued", "running", "completed", "dead"]] = Query(
+        None, description="Filter by job status"
+    ),
+    limit: int = Query(100, description="Maximum number of jobs", le=1000),
+):
+    """List ingestion jobs, newest first."""
+    try:
+        jobs = await IngestionJob.get_by_status(status=status, limit=limit)
+        return [job_response(job) for job in jobs]
+    except Exception as e:
+        logger.error(f"Error fetching jobs: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error fetching jobs: {str(e)}")
+
+
+@router.get("/jobs/{job_id}", response_model=IngestionJobResponse)
+async def get_job(job_id: str):
+    """Get status and progress of an ingestion job."""
+    try:
+        job = await IngestionJob.get(job_id)
+        return job_response(job)
+    except NotFoundError:
+        raise HTTPException(status_code=404, detail="Job not found")
+    except Exception as e:
+        logger.error(f"Error fetching job {job_id}: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error fetching job: {str(e)}")
+
+
+@router.post("/jobs/{job_id}/retry", response_model=IngestionJobResponse)
+async def retry_job(job_id: str):
+    """Re-queue a dead-lettered ingestion job."""
+    try:
+        job = await IngestionJob.get(job_id)
+    except NotFoundError:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job.status != "dead":
+        raise HTTPException(status_code=400, detail=f"Only dead jobs can be retried, job is {job.status}")
+    cleanup_file = job.payload.get("cleanup_file")
+    if cleanup_file and not os.path.exists(cleanup_file):
+        raise HTTPException(status_code=410, detail="The uploaded file of this job no longer exists, upload it again")
+    try:
+        await job.requeue()
+        return job_response(job)
+    except Exception as e:
+        logger.error(f"Error retrying job {job_id}: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error retrying job: {str(e)}")
+
+
+@router.delete("/jobs/{job_id}")
+async def discard_job(job_id: str):
+    """Delete a dead-lettered ingestion job and the upload kept for its retry."""
+    try:
+        job = await IngestionJob.get(job_id)
+    except NotFoundError:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job.status != "dead":
+        raise HTTPException(status_code=400, detail=f"Only dead jobs can be discarded, job is {job.status}")
+    try:
+        await job.discard()
+        return {"message": "Job discarded successfully"}
+    except Exception as e:
+        logger.error(f"Error discarding job {job_id}: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error discarding job: {str(e)}")
@@ -16,6 +16,7 @@ from api.context_service import context_service
 from api.models import ChatRequest, ChatResponse
 from open_notebook.database import milvus_services
 from open_notebook.graphs.ask_chat import get_conversation_graph
+from open_notebook.turn_router import turn_router
 
 router = APIRouter()
 
@@ -38,11 +39,12 @@ async def send_message(chat_request: ChatRequest):
                 )
             list_sources_in_nb = chat_request.source_ids
             
-        current_session, current_state = await get_session(current_notebook, chat_request.session_id)
+        # compiled once and shared, also used by get_session to read the state
+        graph = await get_conversation_graph()
+        current_session, current_state = await get_session(current_notebook, chat_request.session_id, graph)
         thread_id = current_session.id
         config = RunnableConfig(configurable={"thread_id": thread_id})
 
-        graph = await get_conversation_graph(state={}, config=config)
         print("Request ids", chat_request.source_ids)
         input_payload = {
             "message": HumanMessage(content=chat_request.chat_message),
@@ -118,7 +120,8 @@ async def stream_chat(chat_request: ChatRequest):
             return
             
         try:
-            current_session, current_state = await get_session(current_notebook, chat_request.session_id)
+            graph = await get_conversation_graph()
+            current_session, current_state = await get_session(current_notebook, chat_request.session_id, graph)
             thread_id = current_session.id
             # Check valid of source_ids
             list_sources_in_nb = await current_notebook.get_sources()
@@ -131,7 +134,6 @@ async def stream_chat(chat_request: ChatRequest):
                 list_sources_in_nb = chat_request.source_ids
                 
             config = RunnableConfig(configurable={"thread_id": thread_id})
-            graph = await get_conversation_graph(state={}, config=config)
 
             input_payload = {
                 "message": HumanMessage(content=chat_request.chat_message),
@@ -204,6 +206,11 @@ async def stream_chat(chat_request: ChatRequest):
 
     return StreamingResponse(event_generator(), media_type="text/event-stream")
 
+@router.get("/notebooks/ask_chat/router/stats")
+async def turn_router_stats():
+    """Routes taken by the fast-path turn router and the planner latency they saved."""
+    return turn_router.stats()
+
 async def create_session_for_notebook(notebook_id: str, session_id: str):
     current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     title = f"Chat Session {current_time}" 
@@ -221,7 +228,7 @@ async def _get_graph_state(graph, thread_id: str):
         snap = graph.get_state({"configurable": {"thread_id": thread_id}})
     return getattr(snap, "values", {}) if snap else {}
 
-async def get_session(current_notebook: Notebook, session_id: str) -> Union[ChatSession, None]:
+async def get_session(current_notebook: Notebook, session_id: str, graph=None) -> Union[ChatSession, None]:
     """Get the current chat session for the notebook."""
 
     chat_session: Union[ChatSession, None] = None
@@ -239,8 +246,8 @@ async def get_session(current_notebook: Notebook, session_id: str) -> Union[Chat
     
     thread_id = session_id or f"thread-{uuid4().hex}"
 
-    config = RunnableConfig(configurable={"thread_id": thread_id})
-    graph = await get_conversation_graph(state={}, config=config)
+    if graph is None:
+        graph = await get_conversation_graph()
 
     current_state = await _get_graph_state(graph, thread_id)
     return chat_session, current_state
@@ -1,5 +1,7 @@
-from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Depends
-from typing import List
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Depends, Response
+from typing import List, Tuple, Union
+import asyncio
+import hashlib
 import uuid
 import json
 import os
@@ -8,13 +10,17 @@ from loguru import logger
 
 from api.models import (
     AssetModel,
+    IngestionJobResponse,
     SourceResponse,
     NotebookSourceCreateRequest
 )
+from open_notebook.config import UPLOAD_CHUNK_SIZE, UPLOAD_MAX_SIZE_MB
+from open_notebook.domain.ingestion_job import IngestionJob
 from open_notebook.domain.notebook import Notebook, Source
 from open_notebook.domain.transformation import Transformation
 from open_notebook.exceptions import InvalidInputError
 from open_notebook.graphs.source import source_graph
+from api.routers.jobs import job_response
 
 router = APIRouter()
 UPLOAD_FOLDER = './data/uploads'
@@ -27,29 +33,64 @@ class NotebookSourceForm:
         source_id: str = Form(...),
         embed: bool = Form(False),
         transformations: List[str] = Form([]),
+        async_processing: bool = Form(False),
         file: UploadFile = File(...)
     ):
         self.model = NotebookSourceCreateRequest(
             notebook_id=notebook_id,
             source_id=source_id,
             transformations=transformations,
-            embed=embed
+            embed=embed,
+            async_processing=async_processing,
         )
         self.file = file
 
-@router.post("/notebook/sources")
-async def create_source(form: NotebookSourceForm = Depends()):
+
+async def save_upload(file: UploadFile, file_path: Path) -> Tuple[str, int]:
+    """
+    Stream `file` to `file_path` in UPLOAD_CHUNK_SIZE chunks and return (sha256, size).
+
+    Memory use is bounded by the chunk size whatever the upload size. Uploads
+    larger than UPLOAD_MAX_SIZE_MB are rejected with 413 and nothing is kept.
+    """
+    max_size = UPLOAD_MAX_SIZE_MB * 1024 * 1024
+    too_large = HTTPException(
+        status_code=413, detail=f"File exceeds the {UPLOAD_MAX_SIZE_MB} MB upload limit"
+    )
+    if max_size and file.size is not None and file.size > max_size:
+        raise too_large
+
+    # write under a temporary name so a failed upload never leaves a truncated file behind
+    part_path = file_path.with_name(f"{file_path.name}.{uuid.uuid4().hex}.part")
+    digest = hashlib.sha256()
+    size = 0
     try:
+        with open(part_path, "wb") as f:
+            while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                size += len(chunk)
+                if max_size and size > max_size:
+                    raise too_large
+                digest.update(chunk)
+                await asyncio.to_thread(f.write, chunk)
+        os.replace(part_path, file_path)
+    except BaseException:
+        if part_path.exists():
+            os.remove(part_path)
+        raise
+    return digest.hexdigest(), size
 
-        file = form.file
-        model = form.model
-        file_path = Path(UPLOAD_FOLDER) / Path(file.filename).name
 
-        with open(file_path, "wb") as f:
-            f.write(await file.read())
+@router.post("/notebook/sources", response_model=Union[SourceResponse, IngestionJobResponse])
+async def create_source(response: Response, form: NotebookSourceForm = Depends()):
+    try:
 
+        file = form.file
+        model = form.model
         notebook = await Notebook.get(model.notebook_id)
         sourceid = uuid.UUID(model.source_id) # if not uuid, raise error
+        # one path per upload: queued jobs keep their file until a worker runs,
+        # so two uploads with the same name must never share it
+        file_path = Path(UPLOAD_FOLDER) / f"{sourceid}_{Path(file.filename).name}"
         check_source = None
         try:
             check_source = await Source.get(model.source_id)
@@ -60,6 +101,18 @@ async def create_source(form: NotebookSourceForm = Depends()):
         if not notebook:
             raise HTTPException(status_code=404, detail="Notebook not found")
 
+        file_sha256, file_size = await save_upload(file, file_path)
+        logger.debug(f"Saved upload {file_path} ({file_size} bytes, sha256 {file_sha256})")
+
+        duplicate = await notebook.get_source_by_file_hash(file_sha256)
+        if duplicate:
+            # only the file this request wrote
+            os.remove(file_path)
+            raise HTTPException(
+                status_code=409,
+                detail=f"File already uploaded to this notebook as source {duplicate.id}",
+            )
+
         # Prepare content_state for source_graph
         content_state = {}
         content_state["file_path"] = str(file_path)
@@ -75,6 +128,25 @@ async def create_source(form: NotebookSourceForm = Depends()):
                         status_code=404, detail=f"Transformation {trans_id} not found"
                     )
                 transformations.append(transformation)
+
+        if model.async_processing:
+            # keep the upload around for retries, the worker removes it once the job is settled
+            content_state["delete_source"] = False
+            job = await IngestionJob.enqueue(
+                {
+                    "content_state": content_state,
+                    "notebook_id": model.notebook_id,
+                    "source_id": str(sourceid),
+                    "transformations": [str(t.id) for t in transformations],
+                    "embed": model.embed,
+                    "title": str(os.path.basename(file.filename)),
+                    "file_sha256": file_sha256,
+                    "cleanup_file": str(file_path),
+                }
+            )
+            response.status_code = 202
+            return job_response(job)
+
         # Process source using the source_graph
         result = await source_graph.ainvoke(
             {
@@ -84,6 +156,7 @@ async def create_source(form: NotebookSourceForm = Depends()):
                 "embed": model.embed,
                 "title": str(os.path.basename(file.filename)),
                 "source_id": sourceid,
+                "file_sha256": file_sha256,
             }
         )
 
@@ -5,6 +5,7 @@ from loguru import logger
 
 from api.models import ErrorResponse, NotebookCreate, NotebookResponse, NotebookUpdate
 from open_notebook.domain.notebook import Notebook
+from open_notebook.domain.search_profile import SearchProfile, get_search_profile, save_search_profile
 from open_notebook.exceptions import DatabaseOperationError, InvalidInputError
 router = APIRouter()
 
@@ -139,4 +140,38 @@ async def delete_notebook(notebook_id: str):
         raise
     except Exception as e:
         logger.error(f"Error deleting notebook {notebook_id}: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Error deleting notebook: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Error deleting notebook: {str(e)}")
+
+
+@router.get("/notebooks/{notebook_id}/search-profile", response_model=SearchProfile)
+async def get_notebook_search_profile(notebook_id: str):
+    """Hybrid search profile of a notebook (defaults if none is stored)."""
+    return await get_search_profile(notebook_id)
+
+
+@router.put("/notebooks/{notebook_id}/search-profile", response_model=SearchProfile)
+async def update_notebook_search_profile(notebook_id: str, profile: SearchProfile):
+    """Store the hybrid search profile of a notebook."""
+    try:
+        if not await save_search_profile(notebook_id, profile):
+            raise HTTPException(status_code=404, detail="Notebook not found")
+        return profile
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error saving search profile of notebook {notebook_id}: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error saving search profile: {str(e)}")
+
+
+@router.delete("/notebooks/{notebook_id}/search-profile", response_model=SearchProfile)
+async def reset_notebook_search_profile(notebook_id: str):
+    """Reset the hybrid search profile of a notebook to the defaults."""
+    try:
+        if not await save_search_profile(notebook_id, None):
+            raise HTTPException(status_code=404, detail="Notebook not found")
+        return SearchProfile()
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error resetting search profile of notebook {notebook_id}: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error resetting search profile: {str(e)}")
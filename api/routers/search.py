@@ -5,10 +5,14 @@ from fastapi import APIRouter, HTTPException
 from fastapi.responses import StreamingResponse
 from loguru import logger
 
-from api.models import SearchRequest, SearchResponse
+from api.models import MultiSearchRequest, MultiSearchResponse, SearchRequest, SearchResponse
 from open_notebook.domain.models import Model, model_manager
-from open_notebook.domain.notebook import hybrid_search_in_notebook, text_search_in_notebook, semantic_search_in_notebook
+from open_notebook.domain.notebook import hybrid_search_in_notebook, multi_hybrid_search_in_notebook, text_search_in_notebook, semantic_search_in_notebook
+from open_notebook.context_window import expand_hits
+from open_notebook.domain.search_profile import resolve_search_profile
 from open_notebook.exceptions import DatabaseOperationError, InvalidInputError
+from open_notebook.rerank import rerank_stage
+from open_notebook.search_cache import search_cache
 
 router = APIRouter()
 
@@ -17,11 +21,17 @@ router = APIRouter()
 async def search_knowledge_base(search_request: SearchRequest):
     """Search the knowledge base using text or vector search."""
     try:     
+        profile = await resolve_search_profile(search_request.notebook_id, search_request.search_profile)
+        use_rerank = search_request.rerank and rerank_stage.enabled
+        limit = (
+            rerank_stage.fetch_limit(search_request.limit, profile.rerank_overfetch)
+            if use_rerank else search_request.limit
+        )
         if search_request.type == "semantic":
             # Text search
             results = await semantic_search_in_notebook(
                 keyword=search_request.query,
-                results=search_request.limit,
+                results=limit,
                 source_ids=search_request.source_ids,
                 notebook_id=search_request.notebook_id,
             )
@@ -29,16 +39,17 @@ async def search_knowledge_base(search_request: SearchRequest):
         elif search_request.type == "hybrid":
             results = await hybrid_search_in_notebook(
                 keyword=search_request.query,
-                results=search_request.limit,
+                results=limit,
                 source_ids=search_request.source_ids,
                 notebook_id=search_request.notebook_id,
+                profile=profile,
             )
 
 
         elif search_request.type == "text":
             results = await text_search_in_notebook(
                 keyword=search_request.query,
-                results=search_request.limit,
+                results=limit,
                 source_ids=search_request.source_ids,
                 notebook_id=search_request.notebook_id,
             )
@@ -46,10 +57,16 @@ async def search_knowledge_base(search_request: SearchRequest):
         for k, v in results.items():
             tmp.append({"id": k, "content": v})
         results = tmp
+        rerank_latency = None
+        if use_rerank:
+            results, rerank_latency = await rerank_stage.rerank(
+                search_request.query, results, search_request.limit
+            )
         return SearchResponse(
             results=results or [],
             total_count=len(results) if results else 0,
             search_type=search_request.type,
+            rerank_latency=rerank_latency,
         )
 
     except InvalidInputError as e:
@@ -60,3 +77,56 @@ async def search_knowledge_base(search_request: SearchRequest):
     except Exception as e:
         logger.error(f"Unexpected error during search: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Search failed: {str(e)}")
+
+
+@router.post("/search/multi", response_model=MultiSearchResponse)
+async def multi_search_knowledge_base(search_request: MultiSearchRequest):
+    """Hybrid search for several queries at once, with per-query and merged results."""
+    try:
+        profile = await resolve_search_profile(search_request.notebook_id, search_request.search_profile)
+        use_rerank = search_request.rerank and rerank_stage.enabled
+        results = await multi_hybrid_search_in_notebook(
+            keywords=search_request.queries,
+            results=(
+                rerank_stage.fetch_limit(search_request.limit, profile.rerank_overfetch)
+                if use_rerank else search_request.limit
+            ),
+            source_ids=search_request.source_ids,
+            notebook_id=search_request.notebook_id,
+            profile=profile,
+        )
+        merged, rerank_latency = results["merged"], None
+        if use_rerank:
+            merged, rerank_latency = await rerank_stage.rerank(
+                search_request.rerank_query or "\n".join(search_request.queries),
+                merged,
+                search_request.limit,
+            )
+        if search_request.window:
+            merged = await expand_hits(merged, search_request.notebook_id, search_request.window)
+        return MultiSearchResponse(
+            per_query={term: hits[:search_request.limit] for term, hits in results["per_term"].items()},
+            merged=merged,
+            rerank_latency=rerank_latency,
+        )
+
+    except InvalidInputError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except DatabaseOperationError as e:
+        logger.error(f"Database error during multi search: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Search failed: {str(e)}")
+    except Exception as e:
+        logger.error(f"Unexpected error during multi search: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Search failed: {str(e)}")
+
+
+@router.get("/search/rerank/stats")
+async def rerank_stats():
+    """Reranker latency, reported apart from retrieval."""
+    return rerank_stage.latency_summary()
+
+
+@router.get("/search/cache/stats")
+async def search_cache_stats():
+    """Search result cache hit rate and size."""
+    return search_cache.stats()
@@ -1,12 +1,15 @@
-from typing import List, Optional
-from fastapi import APIRouter, HTTPException, Query
+from typing import List, Optional, Union
+from fastapi import APIRouter, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
 from loguru import logger
 import uuid
 import json
 import asyncio
 from api.models import (
     AssetModel,
+    BulkSourceCreate,
     CreateSourceInsightRequest,
+    IngestionJobResponse,
     SourceCreate,
     SourceInsightResponse,
     SourceListResponse,
@@ -14,14 +17,40 @@ from api.models import (
     SourceUpdate,
     SourceEmbeddingResponse
 )
+from open_notebook.config import BULK_INGEST_MAX_ITEMS
+from open_notebook.domain.ingestion_job import IngestionJob
 from open_notebook.domain.notebook import Notebook, Source
 from open_notebook.domain.transformation import Transformation
 from open_notebook.exceptions import InvalidInputError
 from open_notebook.graphs.source import source_graph
-from open_notebook.database import milvus_services
+from open_notebook.ingestion import ingest_sources_bulk
+from open_notebook.database import milvus_async
+from api.routers.jobs import job_response
 router = APIRouter()
 
 
+def build_content_state(source_data) -> dict:
+    """Build the content_core input for a link, upload or text source."""
+    content_state = {}
+
+    if source_data.type == "link":
+        if not source_data.url:
+            raise InvalidInputError("URL is required for link type")
+        content_state["url"] = source_data.url
+    elif source_data.type == "upload":
+        if not source_data.file_path:
+            raise InvalidInputError("File path is required for upload type")
+        content_state["file_path"] = source_data.file_path
+        content_state["delete_source"] = source_data.delete_source
+    elif source_data.type == "text":
+        if not source_data.content:
+            raise InvalidInputError("Content is required for text type")
+        content_state["content"] = source_data.content
+    else:
+        raise InvalidInputError("Invalid source type. Must be link, upload, or text")
+    return content_state
+
+
 @router.get("/sources", response_model=List[SourceListResponse])
 async def get_sources(
     notebook_id: Optional[str] = Query(None, description="Filter by notebook ID"),
@@ -69,8 +98,8 @@ async def get_sources(
         raise HTTPException(status_code=500, detail=f"Error fetching sources: {str(e)}")
 
 
-@router.post("/sources", response_model=SourceResponse)
-async def create_source(source_data: SourceCreate):
+@router.post("/sources", response_model=Union[SourceResponse, IngestionJobResponse])
+async def create_source(source_data: SourceCreate, response: Response):
     """Create a new source."""
     try:
         # Verify notebook exists
@@ -88,32 +117,7 @@ async def create_source(source_data: SourceCreate):
             raise HTTPException(status_code=404, detail="Notebook not found")
 
         # Prepare content_state for source_graph
-        content_state = {}
-
-        if source_data.type == "link":
-            if not source_data.url:
-                raise HTTPException(
-                    status_code=400, detail="URL is required for link type"
-                )
-            content_state["url"] = source_data.url
-        elif source_data.type == "upload":
-            if not source_data.file_path:
-                raise HTTPException(
-                    status_code=400, detail="File path is required for upload type"
-                )
-            content_state["file_path"] = source_data.file_path
-            content_state["delete_source"] = source_data.delete_source
-        elif source_data.type == "text":
-            if not source_data.content:
-                raise HTTPException(
-                    status_code=400, detail="Content is required for text type"
-                )
-            content_state["content"] = source_data.content
-        else:
-            raise HTTPException(
-                status_code=400,
-                detail="Invalid source type. Must be link, upload, or text",
-            )
+        content_state = build_content_state(source_data)
 
         # Get transformations to apply
         transformations = []
@@ -126,6 +130,24 @@ async def create_source(source_data: SourceCreate):
                     )
                 transformations.append(transformation)
 
+        if source_data.async_processing:
+            # Hand the work to the ingestion workers and return the job right away
+            payload = {
+                "content_state": content_state,
+                "notebook_id": source_data.notebook_id,
+                "source_id": str(sourceid),
+                "transformations": [str(t.id) for t in transformations],
+                "embed": source_data.embed,
+                "title": source_data.title,
+            }
+            if content_state.get("delete_source"):
+                # keep the upload around for retries, the worker removes it once the job is settled
+                content_state["delete_source"] = False
+                payload["cleanup_file"] = content_state["file_path"]
+            job = await IngestionJob.enqueue(payload)
+            response.status_code = 202
+            return job_response(job)
+
         # Process source using the source_graph
         result = await source_graph.ainvoke(
             {
@@ -167,6 +189,65 @@ async def create_source(source_data: SourceCreate):
         raise HTTPException(status_code=500, detail=f"Error creating source: {str(e)}")
 
 
+@router.post("/sources/bulk")
+async def create_sources_bulk(request: BulkSourceCreate):
+    """
+    Create many sources in one request.
+
+    Sources are extracted in parallel and embedded in shared batches. The
+    response is newline-delimited JSON with one line per item event
+    (extracted, created or failed) and a final summary line.
+    """
+    if len(request.items) > BULK_INGEST_MAX_ITEMS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"At most {BULK_INGEST_MAX_ITEMS} sources per bulk request",
+        )
+    try:
+        notebook = await Notebook.get(request.notebook_id)
+    except Exception:
+        notebook = None
+    if not notebook:
+        raise HTTPException(status_code=404, detail="Notebook not found")
+
+    invalid = []
+    items = []
+    seen = set()
+    for item in request.items:
+        try:
+            uuid.UUID(item.source_id)
+            if item.source_id in seen:
+                raise InvalidInputError(f"Duplicate source_id {item.source_id} in request")
+            seen.add(item.source_id)
+            items.append(
+                {
+                    "source_id": item.source_id,
+                    "content_state": build_content_state(item),
+                    "title": item.title,
+                }
+            )
+        except (ValueError, InvalidInputError) as e:
+            invalid.append({"source_id": item.source_id, "status": "failed", "error": str(e)})
+
+    async def stream():
+        counts = {"created": 0, "failed": 0}
+        for result in invalid:
+            counts["failed"] += 1
+            yield json.dumps(result) + "\n"
+        if items:
+            try:
+                async for result in ingest_sources_bulk(request.notebook_id, items, embed=request.embed):
+                    if result["status"] in counts:
+                        counts[result["status"]] += 1
+                    yield json.dumps(result) + "\n"
+            except Exception as e:
+                logger.error(f"Error in bulk source ingestion: {str(e)}")
+                yield json.dumps({"status": "error", "error": str(e)}) + "\n"
+        yield json.dumps({"status": "done", "total": len(request.items), **counts}) + "\n"
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+
 @router.get("/sources/{source_id}", response_model=SourceResponse)
 async def get_source(source_id: str):
     """Get a specific source by ID."""
@@ -213,9 +294,19 @@ async def update_source(source_id: str, source_update: SourceUpdate):
             source.title = source_update.title
         if source_update.topics is not None:
             source.topics = source_update.topics
+        text_changed = (
+            source_update.full_text is not None
+            and source_update.full_text != source.full_text
+        )
+        if text_changed:
+            source.full_text = source_update.full_text
 
         await source.save()
 
+        # only re-embed the chunks that actually changed
+        if text_changed and source.n_embedding_chunks > 0:
+            await source.revectorize(source.notebook_id)
+
         asset =  AssetModel(**json.loads(source.asset))
         return SourceResponse(
             id=source.id,
@@ -336,8 +427,7 @@ async def get_source_embedding(source_embedding_id: str):
     """Get source_embedding context for a specific id."""
     try:
         source_embedding = (
-                await asyncio.to_thread(
-                    milvus_services.get_source_embedding_byid, 
+                await milvus_async.get_source_embedding_byid(
                     "source_embedding", 
                     source_embedding_id
                 )
@@ -0,0 +1,13 @@
+-- EMBEDDING CACHE
+-- vectors keyed by (embedding model, dimension, sha256 of the embedded text)
+CREATE TABLE IF NOT EXISTS embedding_cache (
+    model_name TEXT NOT NULL,
+    dimension INT NOT NULL,
+    content_hash TEXT NOT NULL,
+    embedding REAL[] NOT NULL,
+    created TIMESTAMPTZ DEFAULT now(),
+    last_used TIMESTAMPTZ DEFAULT now(),
+    PRIMARY KEY (model_name, dimension, content_hash)
+);
+
+CREATE INDEX IF NOT EXISTS idx_embedding_cache_last_used ON embedding_cache (last_used);
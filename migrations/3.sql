@@ -0,0 +1,5 @@
+-- SOURCE EMBEDDING IDS: chunk position and content hash for incremental re-vectorization
+ALTER TABLE source_embedding_ids ADD COLUMN IF NOT EXISTS chunk_order INT;
+ALTER TABLE source_embedding_ids ADD COLUMN IF NOT EXISTS content_hash TEXT;
+
+CREATE INDEX IF NOT EXISTS idx_source_embedding_ids_source_id ON source_embedding_ids (source_id);
@@ -0,0 +1,20 @@
+-- INGESTION JOBS
+-- status: queued | running | completed | dead
+CREATE TABLE IF NOT EXISTS ingestion_job (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    kind TEXT NOT NULL DEFAULT 'source',
+    payload JSONB NOT NULL,
+    status TEXT NOT NULL DEFAULT 'queued',
+    progress REAL NOT NULL DEFAULT 0,
+    progress_message TEXT,
+    attempts INT NOT NULL DEFAULT 0,
+    max_attempts INT NOT NULL DEFAULT 3,
+    error TEXT,
+    result JSONB,
+    run_after TIMESTAMPTZ DEFAULT now(),
+    locked_at TIMESTAMPTZ,
+    created TIMESTAMPTZ DEFAULT now(),
+    updated TIMESTAMPTZ DEFAULT now()
+);
+
+CREATE INDEX IF NOT EXISTS idx_ingestion_job_dequeue ON ingestion_job (status, run_after);
@@ -0,0 +1,2 @@
+-- NOTEBOOK SEARCH VERSION: bumped on every source change, part of the search result cache key
+ALTER TABLE notebook ADD COLUMN IF NOT EXISTS search_version BIGINT NOT NULL DEFAULT 0;
@@ -0,0 +1,2 @@
+-- NOTEBOOK SEARCH PROFILE: fusion, weights and ANN parameters of hybrid search, NULL = defaults
+ALTER TABLE notebook ADD COLUMN IF NOT EXISTS search_profile JSONB;
@@ -0,0 +1,11 @@
+-- SHORT-TERM CHAT MEMORY: formerly created by every chat turn, read newest first per session
+CREATE TABLE IF NOT EXISTS lc_message_history (
+    id SERIAL PRIMARY KEY,
+    session_id UUID NOT NULL,
+    message JSONB NOT NULL,
+    CONSTRAINT fk_session_id
+        FOREIGN KEY (session_id)
+        REFERENCES chat_session(id)
+        ON DELETE CASCADE
+);
+CREATE INDEX IF NOT EXISTS idx_lc_message_history_session_id ON lc_message_history (session_id, id DESC);
@@ -0,0 +1 @@
+DROP TABLE IF EXISTS embedding_cache CASCADE;
@@ -0,0 +1,3 @@
+DROP INDEX IF EXISTS idx_source_embedding_ids_source_id;
+ALTER TABLE source_embedding_ids DROP COLUMN IF EXISTS content_hash;
+ALTER TABLE source_embedding_ids DROP COLUMN IF EXISTS chunk_order;
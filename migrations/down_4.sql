@@ -0,0 +1 @@
+DROP TABLE IF EXISTS ingestion_job CASCADE;
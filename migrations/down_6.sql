@@ -0,0 +1 @@
+ALTER TABLE notebook DROP COLUMN IF EXISTS search_profile;
@@ -0,0 +1 @@
+DROP INDEX IF EXISTS idx_lc_message_history_session_id;
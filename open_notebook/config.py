@@ -30,4 +30,96 @@ MILVUS_URI = os.getenv("MILVUS_URI", f"http://{MILVUS_ADDRESS}:{MILVUS_PORT}")
 # Default number of connections in the pool (N)
 POOL_SIZE = 10  # Modify this to set the desired number of connections in the pool
 MAX_OVERFLOW = 5  # Number of connections that can be created beyond the pool size if needed
-POOL_TIMEOUT = 30  # Timeout in seconds to wait for a connection from the pool
\ No newline at end of file
+POOL_TIMEOUT = 30  # Timeout in seconds to wait for a connection from the pool
+
+EMBEDDING_DIMENSION = int(os.getenv("EMBEDDING_DIMENSION", "1536"))
+
+# EMBEDDING BATCHING
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "64"))  # max chunks per embedding request
+EMBEDDING_BATCH_MAX_TOKENS = int(os.getenv("EMBEDDING_BATCH_MAX_TOKENS", "8000"))  # max total tokens per embedding request
+EMBEDDING_MAX_CONCURRENCY = int(os.getenv("EMBEDDING_MAX_CONCURRENCY", "4"))  # max in-flight embedding requests
+EMBEDDING_MAX_RETRIES = int(os.getenv("EMBEDDING_MAX_RETRIES", "5"))
+EMBEDDING_RETRY_BACKOFF = float(os.getenv("EMBEDDING_RETRY_BACKOFF", "1.0"))  # base seconds, doubled on each retry
+
+# EMBEDDING CACHE (Postgres table embedding_cache)
+EMBEDDING_CACHE_ENABLED = os.getenv("EMBEDDING_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+EMBEDDING_CACHE_MAX_ENTRIES = int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "1000000"))  # LRU bound, 0 = unbounded
+EMBEDDING_CACHE_TTL_DAYS = int(os.getenv("EMBEDDING_CACHE_TTL_DAYS", "0"))  # 0 = entries never expire
+EMBEDDING_CACHE_EVICT_EVERY = int(os.getenv("EMBEDDING_CACHE_EVICT_EVERY", "100"))  # run eviction every N writes
+
+# INGESTION JOBS
+INGESTION_WORKERS = int(os.getenv("INGESTION_WORKERS", "2"))  # concurrent ingestion jobs per API process, 0 disables the pool
+INGESTION_POLL_INTERVAL = float(os.getenv("INGESTION_POLL_INTERVAL", "1.0"))  # seconds between polls of an idle worker
+INGESTION_MAX_ATTEMPTS = int(os.getenv("INGESTION_MAX_ATTEMPTS", "3"))  # attempts before a job is dead-lettered
+INGESTION_RETRY_BACKOFF = float(os.getenv("INGESTION_RETRY_BACKOFF", "30"))  # base seconds, doubled on each retry
+INGESTION_STALE_JOB_TIMEOUT = int(os.getenv("INGESTION_STALE_JOB_TIMEOUT", "300"))  # seconds without heartbeat before a running job of a dead worker is picked up again
+INGESTION_HEARTBEAT_INTERVAL = float(os.getenv("INGESTION_HEARTBEAT_INTERVAL", "30"))  # seconds between lock refreshes of a running job
+
+# CONTENT EXTRACTION (process pool for CPU-bound document parsing)
+EXTRACTION_PROCESS_POOL = os.getenv("EXTRACTION_PROCESS_POOL", "true").lower() in ("1", "true", "yes")
+EXTRACTION_WORKERS = int(os.getenv("EXTRACTION_WORKERS", str(os.cpu_count() or 1)))  # worker processes
+EXTRACTION_TIMEOUT = float(os.getenv("EXTRACTION_TIMEOUT", "300"))  # seconds per file before the worker is killed
+EXTRACTION_MEMORY_LIMIT_MB = int(os.getenv("EXTRACTION_MEMORY_LIMIT_MB", "0"))  # address space per worker, 0 = unlimited
+EXTRACTION_MAX_TASKS_PER_WORKER = int(os.getenv("EXTRACTION_MAX_TASKS_PER_WORKER", "50"))  # recycle workers to release leaked memory
+
+# UPLOADS
+UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", str(1024 * 1024)))  # bytes read per chunk while streaming to disk
+UPLOAD_MAX_SIZE_MB = int(os.getenv("UPLOAD_MAX_SIZE_MB", "500"))  # 0 = unlimited
+
+# BULK INGESTION
+BULK_INGEST_MAX_ITEMS = int(os.getenv("BULK_INGEST_MAX_ITEMS", "500"))  # max sources per bulk request
+BULK_EXTRACTION_CONCURRENCY = int(os.getenv("BULK_EXTRACTION_CONCURRENCY", str(max(1, EXTRACTION_WORKERS))))  # parallel extractions per bulk request
+MILVUS_INSERT_BATCH_SIZE = int(os.getenv("MILVUS_INSERT_BATCH_SIZE", "2000"))  # rows per Milvus insert call
+EMBEDDING_CHECKPOINT_CHUNKS = int(os.getenv("EMBEDDING_CHECKPOINT_CHUNKS", "256"))  # chunks written to Milvus and recorded per committed batch
+
+# QUERY EMBEDDING CACHE (in-process LRU in front of the Postgres embedding cache)
+QUERY_EMBEDDING_CACHE_SIZE = int(os.getenv("QUERY_EMBEDDING_CACHE_SIZE", "10000"))  # entries, 0 disables the LRU
+QUERY_EMBEDDING_CACHE_SHARED = os.getenv("QUERY_EMBEDDING_CACHE_SHARED", "true").lower() in ("1", "true", "yes")  # also use the Postgres tier
+
+# SEARCH RESULT CACHE (in-process, invalidated by the notebook search_version)
+SEARCH_CACHE_ENABLED = os.getenv("SEARCH_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+SEARCH_CACHE_SIZE = int(os.getenv("SEARCH_CACHE_SIZE", "2000"))  # cached result sets
+SEARCH_CACHE_TTL = int(os.getenv("SEARCH_CACHE_TTL", "3600"))  # seconds, 0 = no expiry
+
+# MILVUS LAYOUT
+MILVUS_NUM_PARTITIONS = int(os.getenv("MILVUS_NUM_PARTITIONS", "64"))  # partitions hashed from the notebook_id partition key
+MILVUS_ASYNC_POOL_SIZE = int(os.getenv("MILVUS_ASYNC_POOL_SIZE", "2"))  # async clients (gRPC channels) used round-robin
+MILVUS_MAX_CONCURRENCY = int(os.getenv("MILVUS_MAX_CONCURRENCY", "32"))  # in-flight Milvus calls per process
+MILVUS_TIMEOUT = float(os.getenv("MILVUS_TIMEOUT", "10"))  # seconds per search/query/delete call
+MILVUS_INSERT_TIMEOUT = float(os.getenv("MILVUS_INSERT_TIMEOUT", "60"))  # seconds per insert call
+
+# RERANKING (optional stage after hybrid retrieval)
+RERANK_PROVIDER = os.getenv("RERANK_PROVIDER", "none")  # none | cross_encoder (local CPU model) | api (OpenAI-compatible /rerank endpoint)
+RERANK_MODEL = os.getenv("RERANK_MODEL", "BAAI/bge-reranker-v2-m3")
+RERANK_API_BASE = os.getenv("RERANK_API_BASE", "")  # e.g. http://reranker:8000/v1
+RERANK_API_KEY = os.getenv("RERANK_API_KEY")
+RERANK_BATCH_SIZE = int(os.getenv("RERANK_BATCH_SIZE", "32"))  # candidates scored per batch
+RERANK_OVERFETCH = int(os.getenv("RERANK_OVERFETCH", "4"))  # candidates retrieved per kept chunk
+RERANK_MAX_CANDIDATES = int(os.getenv("RERANK_MAX_CANDIDATES", "100"))  # cap on over-fetched candidates
+RERANK_TIMEOUT = float(os.getenv("RERANK_TIMEOUT", "10"))  # seconds per rerank request
+
+# DIVERSITY FILTER (maximal marginal relevance over retrieved chunks)
+DIVERSITY_ENABLED = os.getenv("DIVERSITY_ENABLED", "true").lower() in ("1", "true", "yes")
+DIVERSITY_MMR_LAMBDA = float(os.getenv("DIVERSITY_MMR_LAMBDA", "0.7"))  # 1 = relevance only, 0 = diversity only
+DIVERSITY_DUPLICATE_THRESHOLD = float(os.getenv("DIVERSITY_DUPLICATE_THRESHOLD", "0.95"))  # cosine similarity above which a chunk is a duplicate
+
+# CONTEXT WINDOW (neighbour chunks stitched around each hit)
+CONTEXT_WINDOW = int(os.getenv("CONTEXT_WINDOW", "0"))  # neighbours on each side of a hit (order ± n), 0 disables
+CONTEXT_WINDOW_MAX_OVERLAP_CHARS = int(os.getenv("CONTEXT_WINDOW_MAX_OVERLAP_CHARS", "4000"))  # tail searched for the chunk overlap
+
+# MILVUS FILTERS
+MILVUS_FILTER_MAX_IDS = int(os.getenv("MILVUS_FILTER_MAX_IDS", "500"))  # source_ids above this are narrowed against the notebook's sources
+
+# SHORT-TERM CHAT MEMORY (lc_message_history, read through the checkpointer pool)
+SHORT_MEMORY_TURNS = int(os.getenv("SHORT_MEMORY_TURNS", "4"))  # last user/AI exchanges put in the chat prompt
+
+# LONG-TERM MEMORY WRITER (background Milvus inserts of finished chat turns)
+MEMORY_WRITER_QUEUE_SIZE = int(os.getenv("MEMORY_WRITER_QUEUE_SIZE", "1000"))  # queued turns before new ones are dropped, 0 writes inline
+MEMORY_WRITER_BATCH_SIZE = int(os.getenv("MEMORY_WRITER_BATCH_SIZE", "32"))  # turns embedded and inserted together
+MEMORY_WRITER_FLUSH_INTERVAL = float(os.getenv("MEMORY_WRITER_FLUSH_INTERVAL", "5.0"))  # seconds between collection flushes
+
+# TURN ROUTER (skips the planner LLM call for greetings and short questions)
+TURN_ROUTER_ENABLED = os.getenv("TURN_ROUTER_ENABLED", "true").lower() in ("1", "true", "yes")
+TURN_ROUTER_MAX_SEARCH_WORDS = int(os.getenv("TURN_ROUTER_MAX_SEARCH_WORDS", "12"))  # longer messages are always planned
+TURN_ROUTER_EMBEDDINGS = os.getenv("TURN_ROUTER_EMBEDDINGS", "false").lower() in ("1", "true", "yes")  # also compare to example turns
+TURN_ROUTER_MIN_SIMILARITY = float(os.getenv("TURN_ROUTER_MIN_SIMILARITY", "0.8"))  # cosine similarity to an example turn to take its route
@@ -0,0 +1,181 @@
+"""
+Neighbour-chunk expansion of search hits ("window" mode).
+
+The current position of every chunk is recorded in source_embedding_ids
+(`chunk_order`, renumbered in place by incremental re-vectorization, while the
+Milvus `order` keeps the position the chunk was inserted at). After retrieval
+the chunks at order ± window of every hit are looked up there in one query,
+their text fetched from Milvus by id, and the hits of a source are stitched
+with their neighbours into contiguous passages. Chunks without a recorded
+position fall back to the Milvus `order`.
+Consecutive chunks share the `split_text` overlap, which is removed while
+stitching so no text appears twice in the prompt.
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+
+from loguru import logger
+
+from open_notebook.config import CONTEXT_WINDOW, CONTEXT_WINDOW_MAX_OVERLAP_CHARS
+from open_notebook.database import milvus_async
+from open_notebook.database.milvus_services import chunk_reference, parse_chunk_ids
+from open_notebook.database.repository import repo_query
+
+NEIGHBOURS_QUERY = """
+    WITH hit AS (
+        SELECT source_id, chunk_order
+        FROM source_embedding_ids
+        WHERE source_embedding_id = ANY(:ids) AND chunk_order IS NOT NULL
+    )
+    SELECT DISTINCT e.source_embedding_id, e.source_id, e.chunk_order
+    FROM source_embedding_ids e
+    JOIN hit h ON e.source_id = h.source_id
+        AND e.chunk_order BETWEEN h.chunk_order - :window AND h.chunk_order + :window
+"""
+
+
+def overlap_length(
+    previous: str, following: str, max_chars: int = CONTEXT_WINDOW_MAX_OVERLAP_CHARS
+) -> int:
+    """Length of the longest suffix of `previous` that is a prefix of `following`."""
+    tail = previous[-max_chars:] if max_chars > 0 else previous
+    probe = following[:32]
+    if not probe:
+        return 0
+    start = tail.find(probe)
+    while start != -1:
+        candidate = tail[start:]
+        if following.startswith(candidate):
+            return len(candidate)
+        start = tail.find(probe, start + 1)
+    # shorter matches are too likely to be coincidental, split_text overlaps are longer
+    return 0
+
+
+def stitch(chunks: List[str]) -> str:
+    """Join consecutive chunks of a source, dropping the text they share."""
+    if not chunks:
+        return ""
+    text = chunks[0]
+    for chunk in chunks[1:]:
+        shared = overlap_length(text, chunk)
+        if shared:
+            text += chunk[shared:]
+        else:
+            text += "\n" + chunk
+    return text
+
+
+def _runs(orders: List[int]) -> List[List[int]]:
+    """Split sorted orders into runs of consecutive values."""
+    runs: List[List[int]] = []
+    for order in orders:
+        if runs and order == runs[-1][-1] + 1:
+            runs[-1].append(order)
+        else:
+            runs.append([order])
+    return runs
+
+
+async def expand_hits(
+    hits: List[Dict[str, Any]],
+    notebook_id: str,
+    window: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Expand `hits` ({"id", "content", "source_id", "order", ...}, best first)
+    with their neighbours and merge adjacent ones into passages.
+
+    A passage keeps the id and fields of its best hit, with the stitched text
+    as `content`, plus `chunk_ids` and the `orders` range it covers. Passages
+    keep the rank of their best hit. Hits without `source_id`/`order` are
+    passed through unchanged.
+    """
+    window = CONTEXT_WINDOW if window is None else window
+    if window <= 0 or not hits:
+        return hits
+
+    positioned = [h for h in hits if h.get("source_id") and h.get("order") is not None]
+    if not positioned:
+        return hits
+
+    try:
+        rows = await repo_query(
+            NEIGHBOURS_QUERY,
+            {"ids": parse_chunk_ids([h["id"] for h in positioned]), "window": window},
+        )
+    except Exception as e:
+        logger.warning(f"Context window expansion skipped: {str(e)}")
+        return hits
+    position = {
+        chunk_reference(row["source_embedding_id"]): (str(row["source_id"]), row["chunk_order"])
+        for row in rows
+    }
+    # hits are keyed on their current position, the Milvus order may be stale
+    hits = [
+        {**h, "source_id": position[h["id"]][0], "order": position[h["id"]][1]}
+        if h.get("id") in position else h
+        for h in hits
+    ]
+    positioned = [h for h in hits if h.get("source_id") and h.get("order") is not None]
+
+    chunks: Dict[Tuple[str, int], Dict[str, Any]] = {
+        (h["source_id"], h["order"]): {"id": h["id"], "content": h["content"]}
+        for h in positioned
+    }
+    neighbours = {key: ref for ref, key in position.items() if key not in chunks}
+    wanted: Dict[str, List[int]] = {}
+    for h in positioned:
+        if h["id"] in position:
+            continue
+        for order in range(max(0, h["order"] - window), h["order"] + window + 1):
+            if (h["source_id"], order) not in chunks:
+                wanted.setdefault(h["source_id"], []).append(order)
+
+    try:
+        contents = await milvus_async.get_chunk_contents(
+            "source_embedding", parse_chunk_ids(list(neighbours.values()))
+        )
+        legacy = await milvus_async.get_chunks_by_orders("source_embedding", notebook_id, wanted)
+    except Exception as e:
+        logger.warning(f"Context window expansion skipped: {str(e)}")
+        return hits
+    for key, ref in neighbours.items():
+        content = contents.get(parse_chunk_ids(ref)[0])
+        if content is not None:
+            chunks[key] = {"id": ref, "content": content}
+    for row in legacy:
+        chunks.setdefault(
+            (row["source_id"], row["order"]),
+            {"id": chunk_reference(row["primary_key"]), "content": row["content"]},
+        )
+
+    # passages are runs of consecutive orders of a source that contain a hit
+    passage_of: Dict[Tuple[str, int], Dict[str, Any]] = {}
+    by_source: Dict[str, List[int]] = {}
+    for source_id, order in chunks:
+        by_source.setdefault(source_id, []).append(order)
+    for source_id, orders in by_source.items():
+        for run in _runs(sorted(orders)):
+            passage = {
+                "content": stitch([chunks[(source_id, o)]["content"] or "" for o in run]),
+                "chunk_ids": [chunks[(source_id, o)]["id"] for o in run],
+                "orders": [run[0], run[-1]],
+            }
+            for order in run:
+                passage_of[(source_id, order)] = passage
+
+    expanded: List[Dict[str, Any]] = []
+    emitted = set()
+    for hit in hits:
+        key = (hit.get("source_id"), hit.get("order"))
+        passage = passage_of.get(key)
+        if passage is None:
+            expanded.append(hit)
+            continue
+        if id(passage) in emitted:
+            # a better hit of the same passage came first
+            continue
+        emitted.add(id(passage))
+        expanded.append({**hit, **passage})
+    return expanded
@@ -83,9 +83,21 @@ class AsyncMigrationManager:
     def __init__(self):
         self.up_migrations = [
             AsyncMigration.from_file("migrations/all.sql"),  # your converted schema
+            AsyncMigration.from_file("migrations/2.sql"),
+            AsyncMigration.from_file("migrations/3.sql"),
+            AsyncMigration.from_file("migrations/4.sql"),
+            AsyncMigration.from_file("migrations/5.sql"),
+            AsyncMigration.from_file("migrations/6.sql"),
+            AsyncMigration.from_file("migrations/7.sql"),
         ]
         self.down_migrations = [
             AsyncMigration.from_file("migrations/down_all.sql"),
+            AsyncMigration.from_file("migrations/down_2.sql"),
+            AsyncMigration.from_file("migrations/down_3.sql"),
+            AsyncMigration.from_file("migrations/down_4.sql"),
+            AsyncMigration.from_file("migrations/down_5.sql"),
+            AsyncMigration.from_file("migrations/down_6.sql"),
+            AsyncMigration.from_file("migrations/down_7.sql"),
         ]
         self.runner = AsyncMigrationRunner(self.up_migrations, self.down_migrations)
 
@@ -0,0 +1,163 @@
+"""
+Persistent embedding cache stored in the Postgres table `embedding_cache`.
+
+Entries are keyed by (embedding model name, dimension, sha256 of the text), so
+byte-identical chunks are embedded once whatever notebook or source they
+belong to. Old entries are evicted by TTL and/or least-recently-used order.
+"""
+
+import hashlib
+from typing import Dict, List, Optional
+
+from loguru import logger
+from sqlalchemy import text
+
+from open_notebook.config import (
+    EMBEDDING_CACHE_ENABLED,
+    EMBEDDING_CACHE_EVICT_EVERY,
+    EMBEDDING_CACHE_MAX_ENTRIES,
+    EMBEDDING_CACHE_TTL_DAYS,
+)
+from open_notebook.database.repository import db_connection, pg_execute
+
+
+def content_hash(content: str) -> str:
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    def __init__(
+        self,
+        enabled: bool = EMBEDDING_CACHE_ENABLED,
+        max_entries: int = EMBEDDING_CACHE_MAX_ENTRIES,
+        ttl_days: int = EMBEDDING_CACHE_TTL_DAYS,
+        evict_every: int = EMBEDDING_CACHE_EVICT_EVERY,
+    ):
+        self.enabled = enabled
+        self.max_entries = max_entries
+        self.ttl_days = ttl_days
+        self.evict_every = max(1, evict_every)
+        self.hits = 0
+        self.misses = 0
+        self._writes = 0
+
+    async def get_many(
+        self, model_name: str, dimension: int, hashes: List[str]
+    ) -> Dict[str, List[float]]:
+        """
+        Return cached vectors for `hashes` as {content_hash: vector}.
+
+        Found entries are touched (last_used) in the same statement for LRU eviction.
+        """
+        if not self.enabled or not hashes:
+            return {}
+        unique = list(dict.fromkeys(hashes))
+        ttl_clause = (
+            "AND created > now() - make_interval(days => :ttl_days)"
+            if self.ttl_days > 0
+            else ""
+        )
+        sql = f"""
+            UPDATE embedding_cache
+            SET last_used = now()
+            WHERE model_name = :model_name
+              AND dimension = :dimension
+              AND content_hash = ANY(:hashes)
+              {ttl_clause}
+            RETURNING content_hash, embedding
+        """
+        params = {"model_name": model_name, "dimension": dimension, "hashes": unique}
+        if self.ttl_days > 0:
+            params["ttl_days"] = self.ttl_days
+        try:
+            async with db_connection() as s:
+                res = await s.execute(text(sql), params)
+                rows = res.mappings().all()
+                await s.commit()
+        except Exception as e:
+            # the cache is an optimization, never fail the caller because of it
+            logger.warning(f"Embedding cache lookup failed: {str(e)}")
+            self.misses += len(hashes)
+            return {}
+
+        found = {row["content_hash"]: list(row["embedding"]) for row in rows}
+        hit_count = sum(1 for h in hashes if h in found)
+        self.hits += hit_count
+        self.misses += len(hashes) - hit_count
+        return found
+
+    async def put_many(
+        self, model_name: str, dimension: int, vectors: Dict[str, List[float]]
+    ) -> None:
+        """Store {content_hash: vector} entries, refreshing existing ones."""
+        if not self.enabled or not vectors:
+            return
+        sql = """
+            INSERT INTO embedding_cache (model_name, dimension, content_hash, embedding)
+            VALUES (:model_name, :dimension, :content_hash, :embedding)
+            ON CONFLICT (model_name, dimension, content_hash)
+            DO UPDATE SET last_used = now()
+        """
+        rows = [
+            {
+                "model_name": model_name,
+                "dimension": dimension,
+                "content_hash": h,
+                "embedding": [float(x) for x in vector],
+            }
+            for h, vector in vectors.items()
+        ]
+        try:
+            async with db_connection() as s:
+                await s.execute(text(sql), rows)
+                await s.commit()
+        except Exception as e:
+            logger.warning(f"Embedding cache write failed: {str(e)}")
+            return
+
+        self._writes += 1
+        if self._writes % self.evict_every == 0:
+            await self.evict()
+
+    async def evict(self) -> int:
+        """Drop expired entries and the least recently used ones above `max_entries`."""
+        removed = 0
+        try:
+            if self.ttl_days > 0:
+                removed += await pg_execute(
+                    "DELETE FROM embedding_cache WHERE created < now() - make_interval(days => :ttl_days)",
+                    {"ttl_days": self.ttl_days},
+                )
+            if self.max_entries > 0:
+                removed += await pg_execute(
+                    """
+                    DELETE FROM embedding_cache
+                    WHERE ctid IN (
+                        SELECT ctid FROM embedding_cache
+                        ORDER BY last_used DESC
+                        OFFSET :max_entries
+                    )
+                    """,
+                    {"max_entries": self.max_entries},
+                )
+        except Exception as e:
+            logger.warning(f"Embedding cache eviction failed: {str(e)}")
+        if removed:
+            logger.info(f"Evicted {removed} entries from embedding cache")
+        return removed
+
+    @property
+    def hit_rate(self) -> Optional[float]:
+        total = self.hits + self.misses
+        return self.hits / total if total else None
+
+    def stats(self) -> Dict[str, Optional[float]]:
+        return {
+            "enabled": self.enabled,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hit_rate,
+        }
+
+
+embedding_cache = EmbeddingCache()
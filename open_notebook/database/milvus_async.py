@@ -0,0 +1,323 @@
+"""
+Async counterpart of `milvus_services` built on `AsyncMilvusClient`.
+
+Calls run on the event loop instead of the default thread pool, so Milvus
+I/O never queues behind (or in front of) other `asyncio.to_thread` work. A
+small pool of clients spreads calls over several gRPC channels, a semaphore
+bounds the in-flight calls per process and every call has a timeout.
+
+Request building and result formatting are shared with `milvus_services`;
+the sync module stays in use for collection management and scripts.
+"""
+
+import asyncio
+import itertools
+from typing import Any, Dict, List, Optional, Union
+
+from loguru import logger
+from pymilvus import AsyncMilvusClient
+
+from api.models import SourceEmbeddingResponse
+from open_notebook.config import (
+    MILVUS_ASYNC_POOL_SIZE,
+    MILVUS_INSERT_TIMEOUT,
+    MILVUS_MAX_CONCURRENCY,
+    MILVUS_TIMEOUT,
+    MILVUS_URI,
+)
+from open_notebook.database.milvus_filters import neighbor_filter, notebook_filter, source_filter
+from open_notebook.database.milvus_services import (
+    FULL_TEXT_SEARCH_KWARGS,
+    SEMANTIC_SEARCH_KWARGS,
+    chunk_reference,
+    hits_to_dict,
+    hits_to_lists,
+    hybrid_search_kwargs,
+    merge_hybrid_hits,
+    parse_chunk_ids,
+    source_embedding_responses,
+)
+from open_notebook.domain.search_profile import SearchProfile
+from open_notebook.exceptions import ExternalServiceError
+
+
+class AsyncMilvusPool:
+    def __init__(
+        self,
+        uri: str = MILVUS_URI,
+        size: int = MILVUS_ASYNC_POOL_SIZE,
+        max_concurrency: int = MILVUS_MAX_CONCURRENCY,
+        timeout: float = MILVUS_TIMEOUT,
+    ):
+        self.uri = uri
+        self.size = max(1, size)
+        self.max_concurrency = max(1, max_concurrency)
+        self.timeout = timeout
+        self._clients: List[AsyncMilvusClient] = []
+        self._next = itertools.count()
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    def _client(self) -> AsyncMilvusClient:
+        # created lazily, the gRPC channels bind to the running event loop
+        if not self._clients:
+            self._clients = [
+                AsyncMilvusClient(uri=self.uri, token="root:Milvus")
+                for _ in range(self.size)
+            ]
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._clients[next(self._next) % self.size]
+
+    async def call(self, method: str, *args, timeout: Optional[float] = None, **kwargs) -> Any:
+        """Run `AsyncMilvusClient.<method>` under the concurrency limit and timeout."""
+        client = self._client()
+        timeout = timeout or self.timeout
+        async with self._semaphore:
+            try:
+                return await asyncio.wait_for(
+                    getattr(client, method)(*args, timeout=timeout, **kwargs),
+                    timeout=timeout,
+                )
+            except asyncio.TimeoutError:
+                logger.error(f"Milvus {method} timed out after {timeout}s")
+                raise ExternalServiceError(f"Milvus {method} timed out after {timeout}s")
+
+    async def close(self) -> None:
+        clients, self._clients = self._clients, []
+        for client in clients:
+            try:
+                await client.close()
+            except Exception as e:
+                logger.warning(f"Error closing async Milvus client: {str(e)}")
+
+
+milvus_pool = AsyncMilvusPool()
+
+
+async def close_milvus_pool() -> None:
+    await milvus_pool.close()
+
+
+async def get_valid_id(collection_name: str, key: Union[str, List[str]]) -> List[str]:
+    res = await milvus_pool.call(
+        "get",
+        collection_name=collection_name,
+        ids=parse_chunk_ids(key),
+        output_fields=["primary_key"],
+    )
+    return [chunk_reference(pk) for pk in {row["primary_key"] for row in res}]
+
+
+async def get_number_embeddings_ofsource(collection_name: str, source_id: str) -> int:
+    res = await milvus_pool.call(
+        "query",
+        collection_name=collection_name,
+        **source_filter(source_id).search_kwargs(),
+        output_fields=["count(*)"],
+        consistency_level="Strong",
+    )
+    return res[0]["count(*)"] if res else 0
+
+
+async def get_source_embedding_byid(
+    collection_name: str, key: Union[str, List[str]]
+) -> List[SourceEmbeddingResponse]:
+    res = await milvus_pool.call(
+        "get",
+        collection_name=collection_name,
+        ids=parse_chunk_ids(key),
+        output_fields=["primary_key", "order", "source_id", "content"],
+    )
+    return source_embedding_responses(res)
+
+
+async def get_chunks_by_orders(
+    collection_name: str, notebook_id: str, orders_by_source: Dict[str, List[int]]
+) -> List[Dict]:
+    """Chunks at the given orders of each source ({source_id: [order, ...]})."""
+    if not orders_by_source:
+        return []
+    return await milvus_pool.call(
+        "query",
+        collection_name=collection_name,
+        **neighbor_filter(notebook_id, orders_by_source).search_kwargs(),
+        output_fields=["primary_key", "order", "source_id", "content"],
+    )
+
+
+async def get_chunk_contents(collection_name: str, ids: List[int]) -> Dict[int, str]:
+    if not ids:
+        return {}
+    res = await milvus_pool.call(
+        "get",
+        collection_name=collection_name,
+        ids=list(ids),
+        output_fields=["primary_key", "content"],
+    )
+    return {r["primary_key"]: r["content"] for r in res}
+
+
+async def delete_embedding(source_id: str):
+    return await milvus_pool.call(
+        "delete",
+        collection_name="source_embedding",
+        filter=f'source_id == "{source_id}"',
+    )
+
+
+async def delete_embedding_byorders(
+    collection_name: str,
+    source_id: str,
+    orders: List[int],
+    keep_ids: Optional[List[int]] = None,
+):
+    """Delete the chunks of a source inserted at `orders`, except `keep_ids`."""
+    if not orders:
+        return None
+    expr = f'source_id == "{source_id}" and order in {list(orders)}'
+    if keep_ids:
+        expr += f" and primary_key not in {list(keep_ids)}"
+    return await milvus_pool.call("delete", collection_name=collection_name, filter=expr)
+
+
+async def delete_embedding_byids(collection_name: str, ids: List[int]):
+    if not ids:
+        return None
+    return await milvus_pool.call("delete", collection_name=collection_name, ids=list(ids))
+
+
+async def get_dense_vectors_byid(collection_name: str, ids: List[int]) -> Dict[int, List[float]]:
+    if not ids:
+        return {}
+    res = await milvus_pool.call(
+        "get",
+        collection_name=collection_name,
+        ids=list(ids),
+        output_fields=["primary_key", "dense_vector"],
+    )
+    return {r["primary_key"]: list(r["dense_vector"]) for r in res}
+
+
+async def insert_data(collection_name: str, data: Union[Dict, List[Dict]]) -> List[int]:
+    res = await milvus_pool.call(
+        "insert", collection_name=collection_name, data=data, timeout=MILVUS_INSERT_TIMEOUT
+    )
+    return list(res["ids"])
+
+
+async def insert_data_batched(
+    collection_name: str,
+    data: List[Dict],
+    batch_size: int = 2000,
+    ids: Optional[List[int]] = None,
+) -> List[int]:
+    """
+    Insert many rows in slices of `batch_size` to stay under the gRPC message limit.
+
+    The ids of every inserted slice are appended to `ids` as soon as it is
+    written, so a caller passing its own list can remove them when a later
+    slice fails.
+    """
+    ids = [] if ids is None else ids
+    for start in range(0, len(data), batch_size):
+        ids.extend(await insert_data(collection_name, data[start:start + batch_size]))
+    return ids
+
+
+def consistency_kwargs(consistency_level: Optional[str]) -> Dict[str, str]:
+    """Per-request consistency override, the collection default when None."""
+    return {"consistency_level": consistency_level} if consistency_level else {}
+
+
+async def semantic_vector_search(
+    collection_name: str,
+    query_vector,
+    limit: int,
+    notebook_id: str,
+    source_ids: List[str] = [],
+    exclude_source_ids: List[str] = [],
+    consistency_level: Optional[str] = None,
+) -> Dict[str, str]:
+    res = await milvus_pool.call(
+        "search",
+        collection_name=collection_name,
+        data=query_vector,
+        limit=limit,
+        **notebook_filter(notebook_id, source_ids, exclude_source_ids).search_kwargs(),
+        **SEMANTIC_SEARCH_KWARGS,
+        **consistency_kwargs(consistency_level),
+    )
+    return hits_to_dict(res)
+
+
+async def full_text_search(
+    collection_name: str,
+    query_keyword,
+    limit: int,
+    notebook_id: str,
+    source_ids: List[str] = [],
+    exclude_source_ids: List[str] = [],
+    consistency_level: Optional[str] = None,
+) -> Dict[str, str]:
+    res = await milvus_pool.call(
+        "search",
+        collection_name=collection_name,
+        data=query_keyword,
+        limit=limit,
+        **notebook_filter(notebook_id, source_ids, exclude_source_ids).search_kwargs(),
+        **FULL_TEXT_SEARCH_KWARGS,
+        **consistency_kwargs(consistency_level),
+    )
+    return hits_to_dict(res)
+
+
+async def hybrid_search_multi(
+    collection_name: str,
+    query_vectors: List[List[float]],
+    query_keywords: List[str],
+    limit: int,
+    notebook_id: str,
+    source_ids: List[str] = [],
+    profile: Optional[SearchProfile] = None,
+    exclude_source_ids: List[str] = [],
+    consistency_level: Optional[str] = None,
+) -> List[List[Dict]]:
+    """Async `milvus_services.hybrid_search_multi`."""
+    res = await milvus_pool.call(
+        "hybrid_search",
+        collection_name=collection_name,
+        **hybrid_search_kwargs(
+            query_vectors,
+            query_keywords,
+            limit,
+            notebook_filter(notebook_id, source_ids, exclude_source_ids),
+            profile,
+        ),
+        **consistency_kwargs(consistency_level),
+    )
+    return hits_to_lists(res)
+
+
+async def hybrid_search(
+    collection_name: str,
+    query_vector,
+    query_keyword,
+    limit: int,
+    notebook_id: str,
+    source_ids: List[str] = [],
+    return_score=False,
+    profile: Optional[SearchProfile] = None,
+    exclude_source_ids: List[str] = [],
+    consistency_level: Optional[str] = None,
+):
+    res = await hybrid_search_multi(
+        collection_name=collection_name,
+        query_vectors=query_vector,
+        query_keywords=query_keyword,
+        limit=limit,
+        notebook_id=notebook_id,
+        source_ids=source_ids,
+        profile=profile,
+        exclude_source_ids=exclude_source_ids,
+        consistency_level=consistency_level,
+    )
+    return merge_hybrid_hits(res, return_score)
@@ -0,0 +1,115 @@
+"""
+Filter expressions for the `source_embedding` collection.
+
+Values are passed as template parameters (`filter_params` / `expr_params`)
+instead of being formatted into the expression, so Milvus parses a short
+expression once however many ids it is given. Every filter keeps the
+notebook_id constraint so searches are pruned to the notebook's partition.
+
+Large source selections are narrowed before building the filter
+(`plan_source_filter`): a selection covering the whole notebook needs no
+source constraint at all, and one covering most of it is cheaper as the
+complement (`source_id not in ...`).
+"""
+
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from loguru import logger
+
+from open_notebook.config import MILVUS_FILTER_MAX_IDS
+from open_notebook.database.repository import ensure_record_id, repo_query
+
+
+class MilvusFilter(NamedTuple):
+    expr: str
+    params: Dict[str, Any]
+
+    def search_kwargs(self) -> Dict[str, Any]:
+        """Keyword arguments of MilvusClient.search/query."""
+        return {"filter": self.expr, "filter_params": self.params}
+
+    def request_kwargs(self) -> Dict[str, Any]:
+        """Keyword arguments of an AnnSearchRequest."""
+        return {"expr": self.expr, "expr_params": self.params}
+
+
+def _unique(ids: Optional[Iterable]) -> List[str]:
+    return list(dict.fromkeys(str(i) for i in ids or []))
+
+
+def notebook_filter(
+    notebook_id: str,
+    source_ids: Optional[Iterable[str]] = None,
+    exclude_source_ids: Optional[Iterable[str]] = None,
+) -> MilvusFilter:
+    """Chunks of a notebook, optionally restricted to or excluding some sources."""
+    expr = "notebook_id == {notebook_id}"
+    params: Dict[str, Any] = {"notebook_id": str(notebook_id)}
+    source_ids = _unique(source_ids)
+    if source_ids:
+        expr += " and source_id in {source_ids}"
+        params["source_ids"] = source_ids
+    exclude_source_ids = _unique(exclude_source_ids)
+    if exclude_source_ids:
+        expr += " and source_id not in {exclude_source_ids}"
+        params["exclude_source_ids"] = exclude_source_ids
+    return MilvusFilter(expr, params)
+
+
+def source_filter(source_id: str, orders: Optional[Iterable[int]] = None) -> MilvusFilter:
+    """Chunks of one source, optionally only those at `orders`."""
+    expr = "source_id == {source_id}"
+    params: Dict[str, Any] = {"source_id": str(source_id)}
+    if orders is not None:
+        expr += " and order in {orders}"
+        params["orders"] = sorted(set(orders))
+    return MilvusFilter(expr, params)
+
+
+def neighbor_filter(notebook_id: str, orders_by_source: Dict[str, List[int]]) -> MilvusFilter:
+    """Chunks at `orders` of each source, in one query."""
+    base = notebook_filter(notebook_id)
+    params = dict(base.params)
+    clauses = []
+    for n, (source_id, orders) in enumerate(orders_by_source.items()):
+        clauses.append(f"(source_id == {{s{n}}} and order in {{o{n}}})")
+        params[f"s{n}"] = str(source_id)
+        params[f"o{n}"] = sorted(set(orders))
+    return MilvusFilter(f"{base.expr} and ({' or '.join(clauses)})", params)
+
+
+async def plan_source_filter(
+    notebook_id: str,
+    source_ids: Optional[Iterable[str]],
+    max_ids: int = MILVUS_FILTER_MAX_IDS,
+) -> Tuple[List[str], List[str]]:
+    """
+    Return (source_ids, exclude_source_ids) selecting the same chunks as
+    `source_ids` with the shortest id list.
+
+    Only selections above `max_ids` are looked up against the notebook's
+    sources in Postgres, small ones are returned as they are.
+    """
+    source_ids = _unique(source_ids)
+    if len(source_ids) <= max_ids:
+        return source_ids, []
+    try:
+        rows = await repo_query(
+            "SELECT id FROM source WHERE notebook_id = :id",
+            {"id": ensure_record_id(notebook_id)},
+        )
+    except Exception as e:
+        logger.warning(f"Could not narrow source filter of notebook {notebook_id}: {str(e)}")
+        return source_ids, []
+
+    in_notebook = {str(row["id"]) for row in rows}
+    selected = [sid for sid in source_ids if sid in in_notebook]
+    if not selected:
+        return source_ids, []
+    if len(selected) == len(in_notebook):
+        # every source of the notebook, the partition key alone is enough
+        return [], []
+    excluded = list(in_notebook.difference(selected))
+    if len(excluded) < len(selected):
+        return [], excluded
+    return selected, []
@@ -2,17 +2,16 @@ from pymilvus import MilvusClient
 from pymilvus import MilvusClient, DataType, AnnSearchRequest, RRFRanker, Function, FunctionType
 from typing import Optional
 import os
-from open_notebook.config import MILVUS_URI
+from loguru import logger
+from open_notebook.config import MILVUS_NUM_PARTITIONS, MILVUS_URI
 
 milvus_client: Optional[MilvusClient] = None
 
-def init_new_milvus_collection(client):
-    collec_name = "source_embedding"
-
-    if client.has_collection(collec_name):
-        print(f"{collec_name} is already exist.")
-        return
-
+def create_source_embedding_collection(client, collec_name: str = "source_embedding"):
+    """
+    Create the chunk collection with notebook_id as partition key, so a search
+    filtered on one notebook only scans that notebook's partition.
+    """
     schema = MilvusClient.create_schema(auto_id=True, enable_dynamic_field=False)
     schema.add_field("primary_key", DataType.INT64, is_primary=True)
     schema.add_field("dense_vector", DataType.FLOAT_VECTOR, dim=int(os.getenv("EMBEDDING_DIMENSION", "1536")))
@@ -20,7 +19,7 @@ def init_new_milvus_collection(client):
     schema.add_field("content", DataType.VARCHAR, enable_analyzer=True, max_length=32768)
     schema.add_field("order", DataType.INT64)
     schema.add_field("source_id", DataType.VARCHAR, max_length=64)
-    schema.add_field("notebook_id", DataType.VARCHAR, max_length=64)
+    schema.add_field("notebook_id", DataType.VARCHAR, max_length=64, is_partition_key=True)
 
     bm25_function = Function(
         name="text_bm25_emb",
@@ -40,9 +39,28 @@ def init_new_milvus_collection(client):
     client.create_collection(
         collection_name=collec_name,
         schema=schema,
-        index_params=index_params
+        index_params=index_params,
+        num_partitions=MILVUS_NUM_PARTITIONS,
     )
 
+def has_partition_key(client, collec_name: str = "source_embedding") -> bool:
+    fields = client.describe_collection(collec_name).get("fields", [])
+    return any(f.get("name") == "notebook_id" and f.get("is_partition_key") for f in fields)
+
+def init_new_milvus_collection(client):
+    collec_name = "source_embedding"
+
+    if client.has_collection(collec_name):
+        print(f"{collec_name} is already exist.")
+        if not has_partition_key(client, collec_name):
+            logger.warning(
+                f"{collec_name} has no notebook_id partition key, every search scans the whole "
+                "collection. Run reshard_collection.py to migrate it."
+            )
+        return
+
+    create_source_embedding_collection(client, collec_name)
+
     print(f"Initialize Collection({collec_name}) sucessfull")
 def get_milvus_client() -> MilvusClient:
     global milvus_client
@@ -1,13 +1,139 @@
 from .milvus_init import get_milvus_client
-from typing import List, Dict, Union
+from typing import List, Dict, Optional, Union
 from pymilvus import MilvusClient, DataType, AnnSearchRequest, RRFRanker, Function, FunctionType
 from api.models import SourceEmbeddingResponse
+from open_notebook.database.milvus_filters import MilvusFilter, notebook_filter, source_filter
+from open_notebook.domain.search_profile import SearchProfile
 
 
-def get_valid_id(collection_name: str, key: Union[str, List[str]]) -> List[str]:
+def parse_chunk_ids(key: Union[str, List[str]]) -> List[int]:
+    """Turn "source_embedding:<pk>" references (or bare pks) into primary keys."""
     if isinstance(key, str):
         key = [key]
-    key = [int(s.split(":", 1)[1]) if ":" in s else int(s) for s in key]
+    return [int(s.split(":", 1)[1]) if ":" in s else int(s) for s in key]
+
+def chunk_reference(pk) -> str:
+    return f"source_embedding:{pk}"
+
+def hits_to_dict(res) -> Dict[str, str]:
+    return {
+        chunk_reference(hit.entity.get('primary_key')): hit.entity.get("content")
+        for hits in res
+        for hit in hits
+    }
+
+def hits_to_lists(res) -> List[List[Dict]]:
+    return [
+        [
+            {
+                "id": chunk_reference(hit.entity.get('primary_key')),
+                "content": hit.entity.get("content"),
+                "score": hit.score,
+                "source_id": hit.entity.get("source_id"),
+                "order": hit.entity.get("order"),
+            }
+            for hit in hits
+        ]
+        for hits in res
+    ]
+
+def merge_hybrid_hits(res: List[List[Dict]], return_score: bool = False):
+    if return_score:
+        return {
+            hit["id"]: {
+                "content": hit["content"],
+                "score": hit["score"]
+            }
+            for hits in res
+            for hit in hits
+        }
+    return {
+        hit["id"]: hit["content"]
+        for hits in res
+        for hit in hits
+    }
+
+def source_embedding_responses(rows) -> List[SourceEmbeddingResponse]:
+    return [
+        SourceEmbeddingResponse(
+            id=chunk_reference(r["primary_key"]),
+            source=r.get("source_id"),
+            order=r.get("order"),
+            content=r.get("content"),
+            embedding=None  # not returned in this query
+        )
+        for r in rows
+    ]
+
+SEMANTIC_SEARCH_KWARGS = {
+    "anns_field": "dense_vector",
+    "output_fields": ['primary_key', 'content'], # Fields to return in search results; sparse field cannot be output
+}
+
+FULL_TEXT_SEARCH_KWARGS = {
+    "anns_field": "sparse_vector",
+    "output_fields": ['primary_key', 'content'],
+    "search_params": {'params': {'drop_ratio_search': 0.2}},
+}
+
+def hybrid_search_kwargs(
+        query_vectors: List[List[float]],
+        query_keywords: List[str],
+        limit: int,
+        milvus_filter: MilvusFilter,
+        profile: Optional[SearchProfile] = None,
+    ) -> Dict:
+    """Arguments of `hybrid_search` shared by the sync and async clients."""
+    profile = profile or SearchProfile()
+    candidates = limit * profile.candidate_factor
+
+    # Dense search
+    request_1 = AnnSearchRequest(
+        data=query_vectors,
+        anns_field="dense_vector",
+        param={"nprobe": profile.nprobe},
+        limit=candidates,
+        **milvus_filter.request_kwargs()
+    )
+
+    # Sparse search
+    request_2 = AnnSearchRequest(
+        data=query_keywords,
+        anns_field="sparse_vector",
+        param={"drop_ratio_search": profile.drop_ratio_search},
+        limit=candidates,
+        **milvus_filter.request_kwargs()
+    )
+
+    # Combine
+    if profile.fusion == "rrf":
+        ranker = Function(
+            name="rrf",
+            input_field_names=[], # Must be an empty list
+            function_type=FunctionType.RERANK,
+            params={"reranker": "rrf", "k": profile.rrf_k}
+        )
+    else:
+        ranker = Function(
+            name="weight",
+            input_field_names=[], # Must be an empty list
+            function_type=FunctionType.RERANK,
+            params={
+                "reranker": "weighted", 
+                "weights": [profile.dense_weight, profile.sparse_weight],
+                "norm_score": True  
+            }
+        )
+    return {
+        "reqs": [request_1, request_2],
+        "ranker": ranker,
+        # source_id and order let callers expand hits to their neighbours
+        "output_fields": ['primary_key', 'content', 'source_id', 'order'],
+        "limit": limit,
+    }
+
+def get_valid_id(collection_name: str, key: Union[str, List[str]]) -> List[str]:
+    key = parse_chunk_ids(key)
 
     client = get_milvus_client()
     res = client.get(
@@ -18,23 +144,21 @@ def get_valid_id(collection_name: str, key: Union[str, List[str]]) -> List[str]:
 
     found_ids = {row["primary_key"] for row in res}
 
-    return [f"source_embedding:{pk}" for pk in found_ids]
+    return [chunk_reference(pk) for pk in found_ids]
 
 def get_number_embeddings_ofsource(collection_name: str, source_id: str) -> int:
     client = get_milvus_client()
 
     client.flush(collection_name)
     client.load_collection(collection_name)
-    query = client.query(collection_name, filter=f'source_id == "{source_id}"',
+    query = client.query(collection_name, **source_filter(source_id).search_kwargs(),
                                 output_fields=["primary_key"])
     num_chunks = len(query)
     return num_chunks
 
 
 def get_source_embedding_byid(collection_name: str, key: Union[str, List[str]]):
-    if isinstance(key, str):
-        key = [key]
-    key = [int(s.split(":", 1)[1]) if ":" in s else s for s in key]
+    key = parse_chunk_ids(key)
 
     client = get_milvus_client()
     res = client.get(
@@ -42,17 +166,7 @@ def get_source_embedding_byid(collection_name: str, key: Union[str, List[str]]):
         ids=key,
         output_fields=["primary_key", "order", "source_id", "content"]
     )
-    documents = [
-        SourceEmbeddingResponse(
-            id="source_embedding:"+str(r["primary_key"]),
-            source=r.get("source_id"),
-            order=r.get("order"),
-            content=r.get("content"),
-            embedding=None  # not returned in this query
-        )
-        for r in res
-    ]
-    return documents
+    return source_embedding_responses(res)
 
 def delete_embedding(source_id: str):
     client = get_milvus_client()
@@ -62,6 +176,33 @@ def delete_embedding(source_id: str):
     )
     return q
 
+def delete_embedding_byorders(collection_name: str, source_id: str, orders: List[int]):
+    """Delete chunks of a source by position, e.g. rows inserted by an attempt that died before recording them."""
+    if not orders:
+        return None
+    client = get_milvus_client()
+    return client.delete(
+        collection_name=collection_name,
+        filter=f'source_id == "{source_id}" and order in {list(orders)}'
+    )
+
+def delete_embedding_byids(collection_name: str, ids: List[int]):
+    if not ids:
+        return None
+    client = get_milvus_client()
+    return client.delete(collection_name=collection_name, ids=list(ids))
+
+def get_dense_vectors_byid(collection_name: str, ids: List[int]) -> Dict[int, List[float]]:
+    if not ids:
+        return {}
+    client = get_milvus_client()
+    res = client.get(
+        collection_name=collection_name,
+        ids=list(ids),
+        output_fields=["primary_key", "dense_vector"]
+    )
+    return {r["primary_key"]: list(r["dense_vector"]) for r in res}
+
 def insert_data(collection_name: str, data: Union[Dict, List[Dict]]):
     client = get_milvus_client()
     insert_info = client.insert(
@@ -71,142 +212,101 @@ def insert_data(collection_name: str, data: Union[Dict, List[Dict]]):
     # Trả về danh sách primary key đã insert
     return list(insert_info["ids"])
 
+def insert_data_batched(collection_name: str, data: List[Dict], batch_size: int = 2000) -> List[int]:
+    """Insert many rows in slices of `batch_size` to stay under the gRPC message limit."""
+    ids = []
+    for start in range(0, len(data), batch_size):
+        ids.extend(insert_data(collection_name, data[start:start + batch_size]))
+    return ids
+
 def semantic_vector_search(
     collection_name: str,
     query_vector,
     limit: int,
     notebook_id: str,
-    source_ids: List[str] = []
+    source_ids: List[str] = [],
+    exclude_source_ids: List[str] = [],
     ) -> Dict[str, str]:
     
-    filter_expr = (
-        f'notebook_id == "{notebook_id}"'
-        if not source_ids
-        else f'source_id IN {source_ids}'
-    )
+    filter_expr = notebook_filter(notebook_id, source_ids, exclude_source_ids)
     client = get_milvus_client()
 
     res = client.search(
         collection_name=collection_name, 
         data = query_vector,
-        anns_field='dense_vector',
-        output_fields=['primary_key', 'content'], # Fields to return in search results; sparse field cannot be output
         limit=limit,
-        filter=filter_expr
+        **filter_expr.search_kwargs(),
+        **SEMANTIC_SEARCH_KWARGS
     )
-    results = {
-        f"source_embedding:{hit.entity.get('primary_key')}": hit.entity.get("content")
-        for hits in res
-        for hit in hits
-    }
-    return results
+    return hits_to_dict(res)
 
 def full_text_search(
     collection_name: str,
     query_keyword,
     limit: int,
     notebook_id: str,
-    source_ids: List[str] = []
+    source_ids: List[str] = [],
+    exclude_source_ids: List[str] = [],
     ) -> Dict[str, str]:
-        search_params = {
-            'params': {'drop_ratio_search': 0.2},
-        }
-        filter_expr = (
-            f'notebook_id == "{notebook_id}"'
-            if not source_ids
-            else f'source_id IN {source_ids}'
-        )
+        filter_expr = notebook_filter(notebook_id, source_ids, exclude_source_ids)
 
         client = get_milvus_client()
         res = client.search(
             collection_name=collection_name, 
             data = query_keyword,
-            anns_field='sparse_vector',
-            output_fields=['primary_key', 'content'], # Fields to return in search results; sparse field cannot be output
             limit=limit,
-            search_params=search_params,
-            filter=filter_expr
+            **filter_expr.search_kwargs(),
+            **FULL_TEXT_SEARCH_KWARGS
         )
-        results = {
-            f"source_embedding:{hit.entity.get('primary_key')}": hit.entity.get("content")
-            for hits in res
-            for hit in hits
-        }
-        return results
-def hybrid_search(
+        return hits_to_dict(res)
+def hybrid_search_multi(
         collection_name: str,
-        query_vector,
-        query_keyword,
+        query_vectors: List[List[float]],
+        query_keywords: List[str],
         limit: int,
         notebook_id: str,
         source_ids: List[str] = [],
-        return_score = False,
-    ):
-
-    filter_expr = (
-        f'notebook_id == "{notebook_id}"'
-        if not source_ids
-        else f'source_id IN {source_ids}'
-    )
-
-
-    # Dense search
-    request_1 = AnnSearchRequest(
-        data=query_vector,
-        anns_field="dense_vector",
-        param={"nprobe": 10},
-        limit=limit,
-        expr=filter_expr
-    )
+        profile: Optional[SearchProfile] = None,
+        exclude_source_ids: List[str] = [],
+    ) -> List[List[Dict]]:
+    """
+    Run one hybrid search for several queries (nq = len(query_vectors)).
 
-    # Sparse search
-    request_2 = AnnSearchRequest(
-        data=query_keyword,
-        anns_field="sparse_vector",
-        param={"drop_ratio_search": 0.2},
-        limit=limit,
-        expr=filter_expr
-    )
-
-    # Combine
-    ranker = Function(
-        name="weight",
-        input_field_names=[], # Must be an empty list
-        function_type=FunctionType.RERANK,
-        params={
-            "reranker": "weighted", 
-            "weights": [0.5, 0.5],
-            "norm_score": True  
-        }
-    )
+    Returns, per query and in query order, a ranked list of
+    {"id", "content", "score"} hits.
+    """
+    filter_expr = notebook_filter(notebook_id, source_ids, exclude_source_ids)
 
     client = get_milvus_client()
 
     res = client.hybrid_search(
         collection_name=collection_name,
-        reqs=[request_1, request_2],
-        ranker=ranker,
-        output_fields=['primary_key', 'content'],
-        limit=limit
+        **hybrid_search_kwargs(query_vectors, query_keywords, limit, filter_expr, profile)
     )
+    return hits_to_lists(res)
 
-    if return_score:
-        results = {
-            f"source_embedding:{hit.entity.get('primary_key')}": {
-                "content": hit.entity.get("content"),
-                "score": hit.score
-            }
-            for hits in res
-            for hit in hits
-        }
-    else:
-        results = {
-            f"source_embedding:{hit.entity.get('primary_key')}": hit.entity.get("content")
-            for hits in res
-            for hit in hits
-        }
-
-    return results
+def hybrid_search(
+        collection_name: str,
+        query_vector,
+        query_keyword,
+        limit: int,
+        notebook_id: str,
+        source_ids: List[str] = [],
+        return_score = False,
+        profile: Optional[SearchProfile] = None,
+        exclude_source_ids: List[str] = [],
+    ):
+    res = hybrid_search_multi(
+        collection_name=collection_name,
+        query_vectors=query_vector,
+        query_keywords=query_keyword,
+        limit=limit,
+        notebook_id=notebook_id,
+        source_ids=source_ids,
+        profile=profile,
+        exclude_source_ids=exclude_source_ids,
+    )
+    return merge_hybrid_hits(res, return_score)
 
 
 
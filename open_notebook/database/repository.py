@@ -84,6 +84,14 @@ async def repo_query(query_str: str, vars: Optional[Dict[str, Any]] = None) -> L
         rows = res.mappings().all()
         return [_convert_uuid_id_to_string(dict(r)) for r in rows]  
 
+async def repo_execute_returning(query_str: str, vars: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+    """Run an INSERT/UPDATE/DELETE ... RETURNING, commit, and return rows as list[dict]."""
+    async with db_connection() as s:
+        res = await s.execute(text(query_str), vars or {})
+        rows = res.mappings().all()
+        await s.commit()
+        return [_convert_uuid_id_to_string(dict(r)) for r in rows]
+
 import uuid
 
 async def repo_insert(table: str, data: Dict[str, Any]) -> None:
@@ -211,8 +219,8 @@ async def repo_delete(table: str, id_value: Any, id_col: str = "id") -> int:
         await s.commit()
         return res.rowcount or 0
 
-async def repo_insert(table: str, rows: List[Dict[str, Any]]) -> int:
-    """Bulk insert many rows. Returns number of rows inserted."""
+async def repo_insert_many(table: str, rows: List[Dict[str, Any]]) -> int:
+    """Insert many rows with one executemany. Returns number of rows inserted."""
     if not rows:
         return 0
     keys = rows[0].keys()
@@ -221,10 +229,46 @@ async def repo_insert(table: str, rows: List[Dict[str, Any]]) -> int:
     sql = f"INSERT INTO {table} ({cols}) VALUES ({vals})"
 
     async with db_connection() as s:
-        await s.execute_many(text(sql), rows)  # SQLAlchemy 2.0 supports executemany
+        await s.execute(text(sql), rows)  # a list of params runs as executemany
         await s.commit()
         return len(rows)
 
+async def repo_bulk_insert(
+    table: str,
+    column_types: Dict[str, str],
+    rows: List[Dict[str, Any]],
+    on_conflict: Optional[str] = None,
+    session: Optional[AsyncSession] = None,
+) -> int:
+    """
+    Insert many rows in a single statement by passing one array per column
+    and expanding them with `unnest`, so the cost is one round-trip whatever
+    the number of rows.
+
+    `column_types` maps column name to its Postgres type (scalar types only,
+    unnest flattens array columns), e.g. {"source_embedding_id": "BIGINT"}.
+    `on_conflict` is appended as `ON CONFLICT <on_conflict>`. With `session`
+    the insert joins the caller's transaction and is not committed here.
+    """
+    if not rows:
+        return 0
+    cols = list(column_types.keys())
+    params = {f"c{i}": [row.get(col) for row in rows] for i, col in enumerate(cols)}
+    arrays = ", ".join(
+        f"CAST(:c{i} AS {column_types[col]}[])" for i, col in enumerate(cols)
+    )
+    sql = f"INSERT INTO {table} ({', '.join(cols)}) SELECT * FROM unnest({arrays})"
+    if on_conflict:
+        sql += f" ON CONFLICT {on_conflict}"
+
+    if session is not None:
+        res = await session.execute(text(sql), params)
+        return res.rowcount or 0
+    async with db_connection() as s:
+        res = await s.execute(text(sql), params)
+        await s.commit()
+        return res.rowcount or 0
+
 async def repo_relate(
     source: str, relationship: str, target: str, data: Optional[Dict[str, Any]] = None
 ) -> List[Dict[str, Any]]:
@@ -0,0 +1,124 @@
+"""
+Redundancy filter for retrieved chunks.
+
+Neighbouring chunks share the `split_text` overlap and re-uploaded documents
+produce near-identical chunks, so merged search hits often repeat the same
+text in the prompt. Hits are re-selected with maximal marginal relevance over
+their dense vectors (fetched from Milvus in one call): each pick maximises
+
+    lambda * relevance - (1 - lambda) * max cosine similarity to the picks
+
+and candidates closer than `duplicate_threshold` to a pick are dropped.
+"""
+
+import hashlib
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from loguru import logger
+
+from open_notebook.config import (
+    DIVERSITY_DUPLICATE_THRESHOLD,
+    DIVERSITY_ENABLED,
+    DIVERSITY_MMR_LAMBDA,
+)
+from open_notebook.database import milvus_async
+from open_notebook.database.milvus_services import parse_chunk_ids
+
+
+def mmr_select(
+    relevance: np.ndarray,
+    vectors: np.ndarray,
+    k: int,
+    mmr_lambda: float = DIVERSITY_MMR_LAMBDA,
+    duplicate_threshold: float = DIVERSITY_DUPLICATE_THRESHOLD,
+) -> List[int]:
+    """
+    Return the indices of up to `k` rows picked by maximal marginal relevance.
+
+    `relevance` is (n,), `vectors` is (n, dim). Rows whose cosine similarity
+    to an already picked row exceeds `duplicate_threshold` are never picked.
+    """
+    n = len(relevance)
+    if n == 0 or k <= 0:
+        return []
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    unit = vectors / np.where(norms == 0, 1.0, norms)
+    similarity = unit @ unit.T
+
+    # scores of different searches are not on one scale, rescale to [0, 1]
+    span = relevance.max() - relevance.min()
+    relevance = (relevance - relevance.min()) / span if span > 0 else np.ones(n)
+
+    selected: List[int] = []
+    available = np.ones(n, dtype=bool)
+    max_similarity = np.zeros(n)
+    while len(selected) < k and available.any():
+        mmr = mmr_lambda * relevance - (1 - mmr_lambda) * max_similarity
+        mmr[~available] = -np.inf
+        pick = int(np.argmax(mmr))
+        selected.append(pick)
+        available[pick] = False
+        available &= similarity[pick] < duplicate_threshold
+        max_similarity = np.maximum(max_similarity, similarity[pick])
+    return selected
+
+
+def _text_key(content: Optional[str]) -> str:
+    return hashlib.sha1(" ".join((content or "").split()).lower().encode("utf-8")).hexdigest()
+
+
+def drop_exact_duplicates(hits: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Keep the first hit of every whitespace/case-normalized text."""
+    seen = set()
+    kept = []
+    for hit in hits:
+        key = _text_key(hit.get("content"))
+        if key not in seen:
+            seen.add(key)
+            kept.append(hit)
+    return kept
+
+
+async def diversify_hits(
+    hits: List[Dict[str, Any]],
+    k: Optional[int] = None,
+    score_key: str = "score",
+) -> List[Dict[str, Any]]:
+    """
+    Remove redundant chunks from `hits` ({"id": "source_embedding:<pk>",
+    "content", score_key}), best first, keeping at most `k`.
+
+    Falls back to dropping exact text duplicates when the vectors cannot be
+    fetched. Hits whose vector is missing are kept at their rank, only
+    de-duplicated by text.
+    """
+    k = len(hits) if k is None else k
+    if not DIVERSITY_ENABLED or len(hits) <= 1:
+        return hits[:k]
+
+    try:
+        ids = parse_chunk_ids([h["id"] for h in hits])
+        vectors_by_id = await milvus_async.get_dense_vectors_byid("source_embedding", ids)
+    except Exception as e:
+        logger.warning(f"Diversity filter without vectors, dropping exact duplicates only: {str(e)}")
+        return drop_exact_duplicates(hits)[:k]
+
+    # hits without a vector (deleted chunk, lagging consistency) are not
+    # redundant for all we know, they skip MMR and are merged back by rank
+    with_vectors = [(i, vectors_by_id[pk]) for i, pk in enumerate(ids) if pk in vectors_by_id]
+    if len(with_vectors) <= 1:
+        return drop_exact_duplicates(hits)[:k]
+
+    relevance = np.array([float(hits[i].get(score_key) or 0.0) for i, _ in with_vectors])
+    vectors = np.array([v for _, v in with_vectors], dtype=np.float32)
+    selected = {with_vectors[j][0] for j in mmr_select(relevance, vectors, k)}
+    without_vectors = {i for i, pk in enumerate(ids) if pk not in vectors_by_id}
+    kept = drop_exact_duplicates(
+        [h for i, h in enumerate(hits) if i in selected or i in without_vectors]
+    )[:k]
+    if without_vectors:
+        logger.debug(f"{len(without_vectors)} chunks have no vector, merged back by rank without MMR")
+    if len(kept) < len(hits):
+        logger.debug(f"Diversity filter kept {len(kept)} of {len(hits)} chunks")
+    return kept
@@ -0,0 +1,201 @@
+import json
+import os
+from datetime import datetime
+from typing import Any, ClassVar, Dict, List, Optional
+
+from loguru import logger
+from pydantic import field_validator
+
+from open_notebook.config import (
+    INGESTION_MAX_ATTEMPTS,
+    INGESTION_RETRY_BACKOFF,
+    INGESTION_STALE_JOB_TIMEOUT,
+)
+from open_notebook.database.repository import (
+    ensure_record_id,
+    repo_execute_returning,
+    repo_query,
+)
+from open_notebook.domain.base import ObjectModel
+from open_notebook.exceptions import DatabaseOperationError, NotFoundError
+
+
+class IngestionJob(ObjectModel):
+    """
+    A unit of background ingestion work stored in the `ingestion_job` table.
+
+    Jobs are dequeued with `FOR UPDATE SKIP LOCKED`, so any number of workers,
+    in any number of API processes, can share the queue. A failed job is
+    re-queued with exponential backoff until `max_attempts` is reached, then it
+    is dead-lettered (status `dead`) and can be re-queued manually or
+    discarded.
+    """
+
+    table_name: ClassVar[str] = "ingestion_job"
+    kind: str = "source"
+    payload: Dict[str, Any]
+    status: str = "queued"
+    progress: float = 0
+    progress_message: Optional[str] = None
+    attempts: int = 0
+    max_attempts: int = INGESTION_MAX_ATTEMPTS
+    error: Optional[str] = None
+    result: Optional[Dict[str, Any]] = None
+    run_after: Optional[datetime] = None
+    locked_at: Optional[datetime] = None
+
+    @field_validator("payload", "result", mode="before")
+    @classmethod
+    def parse_json(cls, value):
+        if isinstance(value, str):
+            return json.loads(value)
+        return value
+
+    @classmethod
+    async def enqueue(
+        cls,
+        payload: Dict[str, Any],
+        kind: str = "source",
+        max_attempts: int = INGESTION_MAX_ATTEMPTS,
+    ) -> "IngestionJob":
+        try:
+            rows = await repo_execute_returning(
+                """
+                INSERT INTO ingestion_job (kind, payload, max_attempts)
+                VALUES (:kind, CAST(:payload AS JSONB), :max_attempts)
+                RETURNING *
+                """,
+                {"kind": kind, "payload": json.dumps(payload), "max_attempts": max_attempts},
+            )
+            job = cls(**rows[0])
+            logger.info(f"Enqueued {kind} ingestion job {job.id}")
+            return job
+        except Exception as e:
+            logger.error(f"Error enqueuing {kind} ingestion job: {str(e)}")
+            raise DatabaseOperationError(e)
+
+    @classmethod
+    async def dequeue(
+        cls, stale_after: int = INGESTION_STALE_JOB_TIMEOUT
+    ) -> Optional["IngestionJob"]:
+        """
+        Claim the oldest runnable job, or None if the queue is empty.
+
+        Running jobs whose lock is older than `stale_after` seconds belong to a
+        worker that died and are claimed again. Live workers refresh the lock
+        with `heartbeat` and `update_progress`, however long the job runs.
+        """
+        rows = await repo_execute_returning(
+            """
+            UPDATE ingestion_job
+            SET status = 'running',
+                attempts = attempts + 1,
+                locked_at = now(),
+                updated = now()
+            WHERE id = (
+                SELECT id FROM ingestion_job
+                WHERE (status = 'queued' AND run_after <= now())
+                   OR (status = 'running' AND locked_at < now() - make_interval(secs => :stale_after))
+                ORDER BY created
+                FOR UPDATE SKIP LOCKED
+                LIMIT 1
+            )
+            RETURNING *
+            """,
+            {"stale_after": stale_after},
+        )
+        return cls(**rows[0]) if rows else None
+
+    @classmethod
+    async def get_by_status(cls, status: Optional[str] = None, limit: int = 100) -> List["IngestionJob"]:
+        try:
+            if status:
+                rows = await repo_query(
+                    "SELECT * FROM ingestion_job WHERE status = :status ORDER BY created DESC LIMIT :limit",
+                    {"status": status, "limit": limit},
+                )
+            else:
+                rows = await repo_query(
+                    "SELECT * FROM ingestion_job ORDER BY created DESC LIMIT :limit",
+                    {"limit": limit},
+                )
+            return [cls(**row) for row in rows]
+        except Exception as e:
+            logger.error(f"Error fetching ingestion jobs: {str(e)}")
+            raise DatabaseOperationError(e)
+
+    async def _set(self, assignments: str, params: Optional[Dict[str, Any]] = None) -> None:
+        rows = await repo_execute_returning(
+            f"UPDATE ingestion_job SET {assignments}, updated = now() WHERE id = :id RETURNING *",
+            {**(params or {}), "id": ensure_record_id(self.id)},
+        )
+        if not rows:
+            raise NotFoundError(f"ingestion_job with id {self.id} not found")
+        for key, value in IngestionJob(**rows[0]):
+            setattr(self, key, value)
+
+    async def update_progress(self, progress: float, message: Optional[str] = None) -> None:
+        try:
+            await self._set(
+                "progress = :progress, progress_message = :message, locked_at = now()",
+                {"progress": max(0.0, min(1.0, progress)), "message": message},
+            )
+        except Exception as e:
+            # progress is informational, never fail the job because of it
+            logger.warning(f"Error updating progress of ingestion job {self.id}: {str(e)}")
+
+    async def heartbeat(self) -> None:
+        """Refresh the lock of a running job so it is not reclaimed as stale."""
+        try:
+            await repo_execute_returning(
+                "UPDATE ingestion_job SET locked_at = now() WHERE id = :id AND status = 'running' RETURNING id",
+                {"id": ensure_record_id(self.id)},
+            )
+        except Exception as e:
+            logger.warning(f"Error refreshing lock of ingestion job {self.id}: {str(e)}")
+
+    async def complete(self, result: Optional[Dict[str, Any]] = None) -> None:
+        await self._set(
+            "status = 'completed', progress = 1, error = NULL, locked_at = NULL, "
+            "result = CAST(:result AS JSONB)",
+            {"result": json.dumps(result or {})},
+        )
+        logger.info(f"Ingestion job {self.id} completed")
+
+    async def fail(self, error: str) -> None:
+        """Re-queue the job with backoff, or dead-letter it when out of attempts."""
+        if self.attempts < self.max_attempts:
+            delay = INGESTION_RETRY_BACKOFF * (2 ** (self.attempts - 1))
+            await self._set(
+                "status = 'queued', error = :error, locked_at = NULL, "
+                "run_after = now() + make_interval(secs => :delay)",
+                {"error": error, "delay": delay},
+            )
+            logger.warning(
+                f"Ingestion job {self.id} failed (attempt {self.attempts}/{self.max_attempts}), "
+                f"retrying in {delay:.0f}s: {error}"
+            )
+        else:
+            await self._set(
+                "status = 'dead', error = :error, locked_at = NULL",
+                {"error": error},
+            )
+            logger.error(f"Ingestion job {self.id} dead-lettered after {self.attempts} attempts: {error}")
+
+    async def requeue(self) -> None:
+        """Put a dead-lettered job back in the queue with a fresh set of attempts."""
+        await self._set(
+            "status = 'queued', attempts = 0, error = NULL, progress = 0, "
+            "progress_message = NULL, locked_at = NULL, run_after = now()"
+        )
+
+    async def discard(self) -> None:
+        """Delete a dead-lettered job together with the upload it kept for retries."""
+        file_path = self.payload.get("cleanup_file")
+        await self.delete()
+        if file_path and os.path.exists(file_path):
+            try:
+                os.remove(file_path)
+            except Exception as e:
+                logger.error(f"Error deleting file {file_path}: {str(e)}")
+        logger.info(f"Ingestion job {self.id} discarded")
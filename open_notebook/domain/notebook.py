@@ -1,18 +1,24 @@
 import asyncio
-from typing import Any, ClassVar, Dict, List, Literal, Optional, Tuple
+from typing import Any, ClassVar, Dict, List, Literal, Optional, Tuple, Union
 from datetime import datetime, timezone
 import uuid
 
 from loguru import logger
 from pydantic import BaseModel, Field, field_validator
 
+from open_notebook.config import EMBEDDING_CHECKPOINT_CHUNKS
 from open_notebook.database.repository import ensure_record_id, repo_query, repo_create,transaction
 from open_notebook.domain.base import ObjectModel
 from open_notebook.domain.models import model_manager
+from open_notebook.embedding import batch_embedder, embed_queries, embed_query
 from open_notebook.exceptions import DatabaseOperationError, InvalidInputError
 from open_notebook.utils import split_text
-from open_notebook.database import milvus_services
+from open_notebook.database import milvus_async
+from open_notebook.database.milvus_filters import plan_source_filter
+from open_notebook.database.embedding_cache import content_hash
 from open_notebook.graphs.utils import _memory_agent_milvus
+from open_notebook.domain.search_profile import SearchProfile, get_search_profile
+from open_notebook.search_cache import bump_search_version, search_cache
 
 from open_notebook.database.repository import (
     ensure_record_id,
@@ -24,6 +30,7 @@ from open_notebook.database.repository import (
     repo_update,
     repo_upsert,
     repo_insert,
+    repo_bulk_insert,
 )
 
 
@@ -54,6 +61,23 @@ class Notebook(ObjectModel):
             logger.error(f"Error fetching sources for notebook {self.id}: {str(e)}")
             raise DatabaseOperationError(e)
 
+    async def get_source_by_file_hash(self, sha256: str) -> Optional["Source"]:
+        """Return the source of this notebook uploaded from a file with this sha256, if any."""
+        try:
+            q = """
+                SELECT s.*
+                FROM source s
+                WHERE s.notebook_id = :id
+                  -- legacy rows hold a plain string asset that does not parse as JSON
+                  AND CASE WHEN s.asset LIKE '{%' THEN s.asset::jsonb ->> 'sha256' END = :sha256
+                LIMIT 1
+            """
+            srcs = await repo_query(q, {"id": ensure_record_id(self.id), "sha256": sha256})
+            return Source(**srcs[0]) if srcs else None
+        except Exception as e:
+            logger.error(f"Error looking up file hash in notebook {self.id}: {str(e)}")
+            raise DatabaseOperationError(e)
+
     async def get_chat_sessions(self) -> List["ChatSession"]:
         try:
             q = """
@@ -77,11 +101,11 @@ class Notebook(ObjectModel):
         try:
             chat_sessions = await self.get_chat_sessions()
             for chat_session in chat_sessions:
-                _memory_agent_milvus.delete(thread_id=chat_session.id)
+                await _memory_agent_milvus.delete(thread_id=chat_session.id)
             
             sources = await self.get_sources()
             for source in sources:
-                await asyncio.to_thread(milvus_services.delete_embedding, source_id=source.id)
+                await milvus_async.delete_embedding(source_id=source.id)
 
             
             return await repo_delete(self.__class__.table_name, self.id)
@@ -93,12 +117,26 @@ class Notebook(ObjectModel):
 class Asset(BaseModel):
     file_path: Optional[str] = None
     url: Optional[str] = None
+    sha256: Optional[str] = None
 
 class SourceEmbeddingChunks(BaseModel):
     table_name: ClassVar[str] = "source_embedding_ids" 
     source_id: uuid.UUID
     source_embedding_id: List[int]
 
+class EmbeddedChunk(BaseModel):
+    """One Milvus chunk row of a source, as recorded in source_embedding_ids."""
+    id: int
+    order: Optional[int] = None
+    content_hash: Optional[str] = None
+
+
+SOURCE_EMBEDDING_ID_COLUMNS = {
+    "source_embedding_id": "BIGINT",
+    "source_id": "UUID",
+    "chunk_order": "INT",
+    "content_hash": "TEXT",
+}
 
 
 class SourceInsight(ObjectModel):
@@ -126,6 +164,11 @@ class Source(ObjectModel):
     full_text: Optional[str] = None
     n_embedding_chunks: int = 0
 
+    async def save(self, provided_id: bool = False) -> None:
+        await super().save(provided_id=provided_id)
+        # the source may have new text or chunks, drop cached search results
+        await bump_search_version(self.notebook_id)
+
     async def delete_all_embedding_ids(self):
         try:
             q = """
@@ -137,23 +180,78 @@ class Source(ObjectModel):
         except Exception as e:
             logger.error(f"Error deleting all source embedding chunk ids for source {self.id}: {str(e)}")
             raise DatabaseOperationError(e)
-    async def save_embedding_ids(self, list_chunkids: List[int]):
+    async def save_embedding_ids(self, list_chunkids: List[Union[int, EmbeddedChunk]]):
         try:
-            q = """
-                INSERT INTO source_embedding_ids (source_embedding_id, source_id)
-                VALUES (:chunkid, :source_id)
-                ON CONFLICT (source_embedding_id) DO NOTHING
-            """
-
-            for cid in list_chunkids:
-                await repo_execute(q, {
-                    "chunkid": cid,
-                    "source_id": ensure_record_id(self.id)
-                })
+            chunks = [cid if isinstance(cid, EmbeddedChunk) else EmbeddedChunk(id=cid) for cid in list_chunkids]
+            await repo_bulk_insert(
+                "source_embedding_ids",
+                SOURCE_EMBEDDING_ID_COLUMNS,
+                [
+                    {
+                        "source_embedding_id": chunk.id,
+                        "source_id": ensure_record_id(self.id),
+                        "chunk_order": chunk.order,
+                        "content_hash": chunk.content_hash,
+                    }
+                    for chunk in chunks
+                ],
+                on_conflict="(source_embedding_id) DO NOTHING",
+            )
 
         except Exception as e:
             logger.error(f"Error saving source embedding chunk ids for source {self.id}: {str(e)}")
             raise DatabaseOperationError(e)
+    async def delete_embedding_ids(self, list_chunkids: List[int]):
+        try:
+            q = """
+                DELETE FROM source_embedding_ids
+                WHERE source_id = :source_id AND source_embedding_id = ANY(:chunkids)
+            """
+            await repo_execute(q, {
+                "source_id": ensure_record_id(self.id),
+                "chunkids": list(list_chunkids),
+            })
+        except Exception as e:
+            logger.error(f"Error deleting source embedding chunk ids for source {self.id}: {str(e)}")
+            raise DatabaseOperationError(e)
+    async def update_embedding_orders(self, chunks: List[EmbeddedChunk]):
+        """Record the new `order` of chunks that moved, their Milvus rows stay as they are."""
+        try:
+            q = """
+                UPDATE source_embedding_ids AS e
+                SET chunk_order = m.chunk_order
+                FROM unnest(CAST(:chunkids AS BIGINT[]), CAST(:orders AS INT[]))
+                    AS m(source_embedding_id, chunk_order)
+                WHERE e.source_id = :source_id AND e.source_embedding_id = m.source_embedding_id
+            """
+            await repo_execute(q, {
+                "source_id": ensure_record_id(self.id),
+                "chunkids": [c.id for c in chunks],
+                "orders": [c.order for c in chunks],
+            })
+        except Exception as e:
+            logger.error(f"Error updating source embedding chunk orders for source {self.id}: {str(e)}")
+            raise DatabaseOperationError(e)
+    async def get_embedding_chunks(self) -> List[EmbeddedChunk]:
+        try:
+            q = """
+                SELECT source_embedding_id, chunk_order, content_hash
+                FROM source_embedding_ids
+                WHERE source_id = :id
+                ORDER BY chunk_order
+            """
+            rows = await repo_query(q, {"id": ensure_record_id(self.id)})
+            return [
+                EmbeddedChunk(
+                    id=row["source_embedding_id"],
+                    order=row["chunk_order"],
+                    content_hash=row["content_hash"],
+                )
+                for row in rows
+            ]
+        except Exception as e:
+            logger.error(f"Error fetching source embedding chunks {self.id}: {str(e)}")
+            raise DatabaseOperationError(e)
     async def get_all_chunk_ids(self) -> List[int]:
         try:
             q = """
@@ -189,8 +287,10 @@ class Source(ObjectModel):
         if self.id is None:
             raise InvalidInputError("Cannot delete without an ID")
         try:
-            await asyncio.to_thread(milvus_services.delete_embedding, str(self.id))
-            return await repo_delete(self.__class__.table_name, self.id)
+            await milvus_async.delete_embedding(str(self.id))
+            deleted = await repo_delete(self.__class__.table_name, self.id)
+            await bump_search_version(self.notebook_id)
+            return deleted
         except Exception as e:
             logger.error(f"Error deleting {self.__class__.table_name} {self.id}: {e}")
             raise DatabaseOperationError(e)
@@ -210,8 +310,7 @@ class Source(ObjectModel):
 
     async def get_embedded_chunks(self) -> int:
         try:
-            return await asyncio.to_thread(
-                milvus_services.get_number_embeddings_ofsource,
+            return await milvus_async.get_number_embeddings_ofsource(
                 collection_name="source_embedding",
                 source_id=str(self.id)
             )
@@ -245,61 +344,207 @@ class Source(ObjectModel):
             logger.error(f"Error adding insight to source {self.id}: {str(e)}")
             raise DatabaseOperationError(e)
 
-    async def vectorize(self, notebook_id: str):
-        print("func vectorize")
+    async def delete_insights(self) -> None:
+        try:
+            await repo_execute(
+                "DELETE FROM source_insight WHERE source_id = :id",
+                {"id": ensure_record_id(self.id)},
+            )
+        except Exception as e:
+            logger.error(f"Error deleting insights of source {self.id}: {str(e)}")
+            raise DatabaseOperationError(e)
+
+    async def _embed_and_store(
+        self,
+        notebook_id: str,
+        chunks: List[Tuple[int, str]],
+    ) -> List[EmbeddedChunk]:
+        """
+        Embed (order, chunk) pairs and store them in committed batches of
+        EMBEDDING_CHECKPOINT_CHUNKS: each batch is inserted in Milvus and its
+        ids recorded in source_embedding_ids before the next one starts, so a
+        failure only loses the batch in flight.
+        """
+        stored: List[EmbeddedChunk] = []
+        for start in range(0, len(chunks), EMBEDDING_CHECKPOINT_CHUNKS):
+            batch = chunks[start:start + EMBEDDING_CHECKPOINT_CHUNKS]
+            embeddings = await batch_embedder.aembed([chunk for _, chunk in batch])
+            batch_vectors = dict(zip([order for order, _ in batch], embeddings))
+
+            chunk_ids = await milvus_async.insert_data(
+                collection_name="source_embedding",
+                data=[
+                    {
+                        "dense_vector": batch_vectors[order],
+                        "content": chunk,
+                        "order": order,
+                        "source_id": str(self.id),
+                        "notebook_id": str(notebook_id),
+                    }
+                    for order, chunk in batch
+                ],
+            )
+            recorded = [
+                EmbeddedChunk(id=cid, order=order, content_hash=content_hash(chunk))
+                for cid, (order, chunk) in zip(chunk_ids, batch)
+            ]
+            try:
+                await self.save_embedding_ids(recorded)
+            except Exception:
+                # unrecorded rows would be invisible to a resumed run, drop them
+                await milvus_async.delete_embedding_byids(
+                    collection_name="source_embedding",
+                    ids=chunk_ids,
+                )
+                raise
+            stored.extend(recorded)
+            logger.debug(f"Source {self.id}: committed {start + len(batch)}/{len(chunks)} chunks")
+        return stored
+
+    async def vectorize(self, notebook_id: str, resume: bool = False) -> List[EmbeddedChunk]:
+        """
+        Chunk, embed and store `full_text`, committing progress per batch.
+
+        The source must already be saved. With `resume`, chunks recorded by a
+        previous attempt whose position and hash still match are kept and only
+        the rest is embedded. On failure the committed batches are left in
+        place for the next attempt; callers that do not retry remove them.
+        """
         logger.info(f"Starting vectorization for source {self.id}")
-        EMBEDDING_MODEL = await model_manager.get_embedding_model()
 
         try:
             if not self.full_text:
                 logger.warning(f"No text to vectorize for source {self.id}")
-                return
+                return []
 
             chunks = split_text(self.full_text)
             if not chunks:
                 logger.warning("No chunks created after splitting")
-                return
-
-            async def process_chunk(idx: int, chunk: str) -> Tuple[int, List[float], str]:
-                try:
-                    embedding = (await EMBEDDING_MODEL.aembed([chunk]))[0]
-                    return (idx, embedding, chunk)
-                except Exception as e:
-                    logger.error(f"Error processing chunk {idx}: {str(e)}")
-                    raise
-
-            results = await asyncio.gather(*[process_chunk(i, c) for i, c in enumerate(chunks)])
-            list_data = []
-            for idx, embedding, content in results:
-                data = {
-                    "dense_vector": embedding,
-                    "content": content,
-                    "order": idx,
-                    "source_id": str(self.id),
-                    "notebook_id": str(notebook_id),
-                }
-                list_data.append(data)
-            chunk_ids = await asyncio.to_thread(
-                milvus_services.insert_data,
-                collection_name="source_embedding",
-                data=list_data
+                return []
+            hashes = [content_hash(chunk) for chunk in chunks]
+
+            done: Dict[int, EmbeddedChunk] = {}
+            if resume:
+                stale = []
+                for c in await self.get_embedding_chunks():
+                    if (
+                        c.order is not None
+                        and c.order < len(chunks)
+                        and c.order not in done
+                        and hashes[c.order] == c.content_hash
+                    ):
+                        done[c.order] = c
+                    else:
+                        stale.append(c.id)
+                if stale:
+                    await milvus_async.delete_embedding_byids(
+                        collection_name="source_embedding",
+                        ids=stale,
+                    )
+                    await self.delete_embedding_ids(stale)
+            pending = [order for order in range(len(chunks)) if order not in done]
+
+            if resume and pending:
+                logger.info(
+                    f"Resuming vectorization of source {self.id} at "
+                    f"{len(done)}/{len(chunks)} chunks"
+                )
+                # rows of a batch that reached Milvus but was never recorded; the
+                # Milvus order of a recorded chunk can be stale after revectorize
+                await milvus_async.delete_embedding_byorders(
+                    collection_name="source_embedding",
+                    source_id=str(self.id),
+                    orders=pending,
+                    keep_ids=[c.id for c in done.values()],
+                )
+
+            stored = await self._embed_and_store(
+                notebook_id, [(order, chunks[order]) for order in pending]
             )
-            
+
             logger.info(f"Vectorization complete for source {self.id}")
-            return chunk_ids
+            return sorted(list(done.values()) + stored, key=lambda c: c.order)
         except Exception as e:
             logger.error(f"Error vectorizing source {self.id}: {str(e)}")
-            await self.remove_embedding()
             raise DatabaseOperationError(e)
     async def remove_embedding(self):
         try:
-            await asyncio.to_thread(milvus_services.delete_embedding, self.id)
+            await milvus_async.delete_embedding(self.id)
             await self.delete_all_embedding_ids()
             self.n_embedding_chunks = 0
         except Exception as e:
             logger.error(f"Error remove embedding {self.id}: {str(e)}")
             raise DatabaseOperationError(e)
 
+    async def revectorize(self, notebook_id: str) -> List[EmbeddedChunk]:
+        """
+        Incrementally bring the Milvus chunks of this source in line with `full_text`.
+
+        The new text is re-chunked and the chunk hashes are diffed against the
+        chunks recorded in source_embedding_ids: chunks whose hash is still
+        present stay in Milvus untouched and only their recorded `chunk_order`
+        is renumbered, new chunks are embedded and inserted and dropped chunks
+        are deleted. Sources embedded before chunk hashes were recorded are
+        re-embedded in full once.
+        """
+        logger.info(f"Starting incremental vectorization for source {self.id}")
+        try:
+            stored = await self.get_embedding_chunks()
+            if any(c.content_hash is None or c.order is None for c in stored):
+                logger.info(f"Source {self.id} has no chunk hashes, re-embedding in full")
+                await self.remove_embedding()
+                stored = []
+
+            chunks = split_text(self.full_text) if self.full_text else []
+            hashes = [content_hash(c) for c in chunks]
+
+            # match new chunks to stored ones by hash, same position first
+            by_hash: Dict[str, List[EmbeddedChunk]] = {}
+            for c in stored:
+                by_hash.setdefault(c.content_hash, []).append(c)
+            kept: List[EmbeddedChunk] = []
+            moved: List[EmbeddedChunk] = []
+            added: List[int] = []
+            for idx, h in enumerate(hashes):
+                candidates = by_hash.get(h)
+                if not candidates:
+                    added.append(idx)
+                    continue
+                match = next((c for c in candidates if c.order == idx), candidates[0])
+                candidates.remove(match)
+                if match.order == idx:
+                    kept.append(match)
+                else:
+                    moved.append(match.model_copy(update={"order": idx}))
+            dropped = [c.id for cs in by_hash.values() for c in cs]
+
+            logger.info(
+                f"Source {self.id}: {len(kept)} chunks unchanged, {len(moved)} moved, "
+                f"{len(added)} new, {len(dropped)} dropped"
+            )
+            if not moved and not added and not dropped:
+                return kept
+
+            if dropped:
+                await milvus_async.delete_embedding_byids(
+                    collection_name="source_embedding",
+                    ids=dropped,
+                )
+                await self.delete_embedding_ids(dropped)
+            if moved:
+                await self.update_embedding_orders(moved)
+            inserted = await self._embed_and_store(
+                notebook_id, [(idx, chunks[idx]) for idx in added]
+            )
+
+            self.n_embedding_chunks = len(chunks)
+            await self.save()
+            logger.info(f"Incremental vectorization complete for source {self.id}")
+            return sorted(kept + moved + inserted, key=lambda c: c.order)
+        except Exception as e:
+            logger.error(f"Error re-vectorizing source {self.id}: {str(e)}")
+            raise DatabaseOperationError(e)
+
 class ChatSession(ObjectModel):
     id: Optional[str] = None
     notebook_id: Optional[str] = None
@@ -313,7 +558,7 @@ class ChatSession(ObjectModel):
         if self.id is None:
             raise InvalidInputError("Cannot delete without an ID")
         try:
-            _memory_agent_milvus.delete(thread_id=str(self.id))
+            await _memory_agent_milvus.delete(thread_id=str(self.id))
             return await repo_delete(self.__class__.table_name, self.id)
         except Exception as e:
             logger.error(f"Error deleting {self.__class__.table_name} {self.id}: {e}")
@@ -326,30 +571,111 @@ async def hybrid_search_in_notebook(
     notebook_id: str, 
     source_ids: List[str] = [],
     return_score = False,
+    profile: Optional[SearchProfile] = None,
 ):
     if not keyword:
         raise InvalidInputError("Search keyword cannot be empty")
     if not ensure_record_id(notebook_id):
         raise InvalidInputError("Search notebook_id may be wrong")
-    try:
-        EMBEDDING_MODEL = await model_manager.get_embedding_model()
-        embed = (await EMBEDDING_MODEL.aembed([keyword]))[0]
+    async def search(consistency_level: Optional[str] = None):
+        embed = await embed_query(keyword)
+        include, exclude = await plan_source_filter(notebook_id, source_ids)
         params = {
             "collection_name": "source_embedding",
             "query_keyword": [keyword],
             "query_vector": [embed],
             "notebook_id": notebook_id,
             "limit": results,
-            "source_ids": source_ids,
+            "source_ids": include,
+            "exclude_source_ids": exclude,
             "return_score": return_score,
+            "profile": profile,
+            "consistency_level": consistency_level,
         }
-        results = await asyncio.to_thread(milvus_services.hybrid_search, **params)
-        return results
+        return await milvus_async.hybrid_search(**params)
+
+    try:
+        profile = profile or await get_search_profile(notebook_id)
+        search_type = "hybrid_scored" if return_score else "hybrid"
+        return await search_cache.get_or_search(
+            search_type, notebook_id, source_ids, keyword, results, search, profile.key()
+        )
     except Exception as e:
         logger.error(f"Error performing hybrid search: {str(e)}")
         logger.exception(e)
         raise DatabaseOperationError(e)
     
+async def multi_hybrid_search_in_notebook(
+    keywords: List[str],
+    results: int,
+    notebook_id: str,
+    source_ids: List[str] = [],
+    rrf_k: int = 60,
+    profile: Optional[SearchProfile] = None,
+) -> Dict[str, Any]:
+    """
+    Hybrid search for several keywords with one embedding request and one
+    Milvus hybrid search (one query vector per keyword).
+
+    Returns {"per_term": {keyword: [hit, ...]}, "merged": [hit, ...]} where a
+    hit is {"id", "content", "score"}. The merged ranking fuses the per-term
+    rankings with reciprocal rank fusion (score = sum of 1 / (rrf_k + rank))
+    and keeps the best per-term score of each chunk as `score`.
+
+    `profile` defaults to the search profile stored for the notebook.
+    """
+    keywords = list(dict.fromkeys(k for k in keywords if k and k.strip()))
+    if not keywords:
+        raise InvalidInputError("Search keywords cannot be empty")
+    if not ensure_record_id(notebook_id):
+        raise InvalidInputError("Search notebook_id may be wrong")
+    async def search(consistency_level: Optional[str] = None):
+        embeds = await embed_queries(keywords)
+        include, exclude = await plan_source_filter(notebook_id, source_ids)
+        return await milvus_async.hybrid_search_multi(
+            collection_name="source_embedding",
+            query_vectors=embeds,
+            query_keywords=keywords,
+            limit=results,
+            notebook_id=notebook_id,
+            source_ids=include,
+            exclude_source_ids=exclude,
+            profile=profile,
+            consistency_level=consistency_level,
+        )
+
+    try:
+        profile = profile or await get_search_profile(notebook_id)
+        hits_per_term = await search_cache.get_or_search(
+            "hybrid_multi", notebook_id, source_ids, keywords, results, search, profile.key()
+        )
+    except Exception as e:
+        logger.error(f"Error performing multi-query hybrid search: {str(e)}")
+        logger.exception(e)
+        raise DatabaseOperationError(e)
+
+    return {
+        "per_term": dict(zip(keywords, hits_per_term)),
+        "merged": rrf_fuse(hits_per_term, rrf_k),
+    }
+
+
+def rrf_fuse(rankings: List[List[Dict[str, Any]]], rrf_k: int = 60) -> List[Dict[str, Any]]:
+    """
+    Fuse ranked hit lists with reciprocal rank fusion (`rrf` = sum of
+    1 / (rrf_k + rank) over the lists), best first. `score` is the best score
+    of the chunk in any list and `terms` the number of lists it appears in.
+    """
+    fused: Dict[str, Dict[str, Any]] = {}
+    for hits in rankings:
+        for rank, hit in enumerate(hits, start=1):
+            entry = fused.setdefault(hit["id"], {**hit, "rrf": 0.0, "terms": 0})
+            entry["rrf"] += 1.0 / (rrf_k + rank)
+            entry["terms"] += 1
+            entry["score"] = max(entry["score"], hit["score"])
+    return sorted(fused.values(), key=lambda h: h["rrf"], reverse=True)
+
+
 async def text_search_in_notebook(
     keyword: str, 
     results: int,
@@ -360,17 +686,23 @@ async def text_search_in_notebook(
         raise InvalidInputError("Search keyword cannot be empty")
     if not ensure_record_id(notebook_id):
         raise InvalidInputError("Search notebook_id may be wrong")
-    try:
-
+    async def search(consistency_level: Optional[str] = None):
+        include, exclude = await plan_source_filter(notebook_id, source_ids)
         params = {
             "collection_name": "source_embedding",
             "query_keyword": [keyword],
             "notebook_id": notebook_id,
             "limit": results,
-            "source_ids": source_ids,
+            "source_ids": include,
+            "exclude_source_ids": exclude,
+            "consistency_level": consistency_level,
         }
-        results = await asyncio.to_thread(milvus_services.full_text_search, **params)
-        return results
+        return await milvus_async.full_text_search(**params)
+
+    try:
+        return await search_cache.get_or_search(
+            "text", notebook_id, source_ids, keyword, results, search
+        )
     except Exception as e:
         logger.error(f"Error performing full text search: {str(e)}")
         logger.exception(e)
@@ -386,19 +718,24 @@ async def semantic_search_in_notebook(
         raise InvalidInputError("Search keyword cannot be empty")
     if not ensure_record_id(notebook_id):
         raise InvalidInputError("Search notebook_id may be wrong")
-    try:
-
-        EMBEDDING_MODEL = await model_manager.get_embedding_model()
-        embed = (await EMBEDDING_MODEL.aembed([keyword]))[0]
+    async def search(consistency_level: Optional[str] = None):
+        embed = await embed_query(keyword)
+        include, exclude = await plan_source_filter(notebook_id, source_ids)
         params = {
             "collection_name": "source_embedding",
             "query_vector": [embed],
             "notebook_id": notebook_id,
             "limit": results,
-            "source_ids": source_ids,
+            "source_ids": include,
+            "exclude_source_ids": exclude,
+            "consistency_level": consistency_level,
         }
-        results = await asyncio.to_thread(milvus_services.semantic_vector_search, **params)
-        return results
+        return await milvus_async.semantic_vector_search(**params)
+
+    try:
+        return await search_cache.get_or_search(
+            "semantic", notebook_id, source_ids, keyword, results, search
+        )
     except Exception as e:
         logger.error(f"Error performing full text search: {str(e)}")
         logger.exception(e)
@@ -0,0 +1,79 @@
+import json
+from typing import Any, Dict, Literal, Optional, Tuple
+
+from loguru import logger
+from pydantic import BaseModel, Field
+
+from open_notebook.database.repository import ensure_record_id, pg_execute, repo_query
+from open_notebook.exceptions import DatabaseOperationError, InvalidInputError
+
+
+class SearchProfile(BaseModel):
+    """
+    How hybrid search fuses and fetches candidates.
+
+    Stored per notebook (notebook.search_profile) and overridable per request.
+    The defaults reproduce the former hard-coded behaviour.
+    """
+
+    fusion: Literal["weighted", "rrf"] = Field("weighted", description="How dense and BM25 rankings are fused")
+    dense_weight: float = Field(0.5, ge=0, le=1, description="Weight of the dense ranking (weighted fusion)")
+    sparse_weight: float = Field(0.5, ge=0, le=1, description="Weight of the BM25 ranking (weighted fusion)")
+    rrf_k: int = Field(60, ge=1, description="Smoothing constant of reciprocal rank fusion")
+    nprobe: int = Field(10, ge=1, le=65536, description="Clusters probed by the dense ANN search")
+    drop_ratio_search: float = Field(0.2, ge=0, lt=1, description="Share of small query terms ignored by the BM25 search")
+    candidate_factor: int = Field(1, ge=1, le=20, description="Candidates per sub-search, as a multiple of the limit")
+    rerank_overfetch: Optional[int] = Field(None, ge=1, le=20, description="Rerank over-fetch factor, RERANK_OVERFETCH if unset")
+
+    def key(self) -> Tuple:
+        """Hashable form, part of the search result cache key."""
+        return tuple(self.model_dump().values())
+
+    def merged(self, overrides: Optional[Dict[str, Any]]) -> "SearchProfile":
+        """A copy with the non-null `overrides` applied and validated."""
+        if not overrides:
+            return self
+        values = {**self.model_dump(), **{k: v for k, v in overrides.items() if v is not None}}
+        try:
+            return SearchProfile(**values)
+        except ValueError as e:
+            raise InvalidInputError(f"Invalid search profile: {str(e)}")
+
+
+async def get_search_profile(notebook_id: str) -> SearchProfile:
+    """Search profile of a notebook, the defaults if none is stored."""
+    try:
+        rows = await repo_query(
+            "SELECT search_profile FROM notebook WHERE id = :id",
+            {"id": ensure_record_id(notebook_id)},
+        )
+    except Exception as e:
+        logger.warning(f"Using the default search profile, could not read notebook {notebook_id}: {str(e)}")
+        return SearchProfile()
+    stored = rows[0]["search_profile"] if rows else None
+    if isinstance(stored, str):
+        stored = json.loads(stored)
+    return SearchProfile(**stored) if stored else SearchProfile()
+
+
+async def save_search_profile(notebook_id: str, profile: Optional[SearchProfile]) -> bool:
+    """Store the search profile of a notebook, None resets it to the defaults."""
+    try:
+        updated = await pg_execute(
+            "UPDATE notebook SET search_profile = CAST(:profile AS JSONB) WHERE id = :id",
+            {
+                "id": ensure_record_id(notebook_id),
+                "profile": profile.model_dump_json() if profile else None,
+            },
+        )
+    except Exception as e:
+        logger.error(f"Error saving search profile of notebook {notebook_id}: {str(e)}")
+        raise DatabaseOperationError(e)
+    return updated > 0
+
+
+async def resolve_search_profile(
+    notebook_id: str, overrides: Optional[Dict[str, Any]] = None
+) -> SearchProfile:
+    """The notebook profile with per-request `overrides` applied."""
+    return (await get_search_profile(notebook_id)).merged(overrides)
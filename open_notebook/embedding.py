@@ -0,0 +1,339 @@
+import asyncio
+import os
+import random
+import re
+import time
+import unicodedata
+from collections import OrderedDict, deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+
+from loguru import logger
+
+from open_notebook.config import (
+    EMBEDDING_BATCH_MAX_TOKENS,
+    EMBEDDING_BATCH_SIZE,
+    EMBEDDING_MAX_CONCURRENCY,
+    EMBEDDING_MAX_RETRIES,
+    EMBEDDING_RETRY_BACKOFF,
+    QUERY_EMBEDDING_CACHE_SHARED,
+    QUERY_EMBEDDING_CACHE_SIZE,
+)
+from open_notebook.database.embedding_cache import content_hash, embedding_cache
+from open_notebook.domain.models import model_manager
+from open_notebook.exceptions import ExternalServiceError
+from open_notebook.utils import token_counts
+
+
+class BatchEmbedder:
+    """
+    Embed many texts with few requests.
+
+    Texts are grouped into batches bounded by both chunk count and total tokens,
+    at most `max_concurrency` batches are in flight at once, and a failed batch
+    is retried with exponential backoff. The latency of every batch is logged and
+    kept so the batch size can be tuned for the embedding endpoint.
+    """
+
+    def __init__(
+        self,
+        batch_size: int = EMBEDDING_BATCH_SIZE,
+        max_tokens: int = EMBEDDING_BATCH_MAX_TOKENS,
+        max_concurrency: int = EMBEDDING_MAX_CONCURRENCY,
+        max_retries: int = EMBEDDING_MAX_RETRIES,
+        retry_backoff: float = EMBEDDING_RETRY_BACKOFF,
+        history_size: int = 1000,
+    ):
+        self.batch_size = max(1, batch_size)
+        self.max_tokens = max(1, max_tokens)
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_retries = max(0, max_retries)
+        self.retry_backoff = retry_backoff
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._history: Deque[Dict[str, Any]] = deque(maxlen=history_size)
+
+    @property
+    def semaphore(self) -> asyncio.Semaphore:
+        # created lazily so the semaphore binds to the running event loop
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    def make_batches(self, texts: List[str]) -> List[List[int]]:
+        """
+        Group text indices into batches respecting `batch_size` and `max_tokens`.
+
+        A single text larger than `max_tokens` is sent alone in its own batch.
+        """
+        batches: List[List[int]] = []
+        current: List[int] = []
+        current_tokens = 0
+        for idx, n_tokens in enumerate(token_counts(texts)):
+            if current and (
+                len(current) >= self.batch_size
+                or current_tokens + n_tokens > self.max_tokens
+            ):
+                batches.append(current)
+                current, current_tokens = [], 0
+            current.append(idx)
+            current_tokens += n_tokens
+        if current:
+            batches.append(current)
+        return batches
+
+    async def _embed_batch(self, model, batch_no: int, texts: List[str]) -> List[List[float]]:
+        attempt = 0
+        while True:
+            async with self.semaphore:
+                start = time.perf_counter()
+                try:
+                    embeddings = await model.aembed(texts)
+                except Exception as e:
+                    error = e
+                else:
+                    error = None
+                latency = time.perf_counter() - start
+
+            if error is None:
+                if len(embeddings) != len(texts):
+                    raise ExternalServiceError(
+                        f"Embedding batch {batch_no} returned {len(embeddings)} vectors for {len(texts)} texts"
+                    )
+                self._history.append(
+                    {"size": len(texts), "latency": latency, "attempts": attempt + 1}
+                )
+                logger.info(
+                    f"Embedding batch {batch_no}: {len(texts)} chunks in {latency:.2f}s "
+                    f"(attempt {attempt + 1})"
+                )
+                return embeddings
+
+            if attempt >= self.max_retries:
+                logger.error(
+                    f"Embedding batch {batch_no} failed after {attempt + 1} attempts: {str(error)}"
+                )
+                raise ExternalServiceError(
+                    f"Embedding batch {batch_no} failed: {str(error)}"
+                ) from error
+
+            delay = self.retry_backoff * (2 ** attempt) * (1 + random.random() * 0.25)
+            logger.warning(
+                f"Embedding batch {batch_no} failed ({str(error)}), "
+                f"retrying in {delay:.2f}s ({attempt + 1}/{self.max_retries})"
+            )
+            attempt += 1
+            await asyncio.sleep(delay)
+
+    async def aembed(self, texts: List[str], model=None, use_cache: bool = True) -> List[List[float]]:
+        """
+        Embed `texts` and return their vectors in the same order.
+
+        With `use_cache`, vectors already in the embedding cache are reused and
+        only the missing texts are sent to the embedding endpoint.
+        """
+        if not texts:
+            return []
+        model = model or await get_embedding_model()
+        if use_cache:
+            return await embed_with_cache(
+                texts, model, lambda missing: self._aembed(missing, model)
+            )
+        return await self._aembed(texts, model)
+
+    async def _aembed(self, texts: List[str], model) -> List[List[float]]:
+        batches = self.make_batches(texts)
+        start = time.perf_counter()
+        results = await asyncio.gather(
+            *[
+                self._embed_batch(model, batch_no, [texts[i] for i in batch])
+                for batch_no, batch in enumerate(batches)
+            ]
+        )
+
+        embeddings: List[Optional[List[float]]] = [None] * len(texts)
+        for batch, vectors in zip(batches, results):
+            for idx, vector in zip(batch, vectors):
+                embeddings[idx] = vector
+
+        logger.info(
+            f"Embedded {len(texts)} texts in {len(batches)} batches "
+            f"in {time.perf_counter() - start:.2f}s"
+        )
+        return embeddings
+
+    def latency_summary(self) -> Dict[str, Any]:
+        """Per-batch latency statistics over the recent batches."""
+        if not self._history:
+            return {"batches": 0}
+        latencies = sorted(h["latency"] for h in self._history)
+        sizes = [h["size"] for h in self._history]
+        n = len(latencies)
+        return {
+            "batches": n,
+            "avg_batch_size": sum(sizes) / n,
+            "avg_latency": sum(latencies) / n,
+            "p50_latency": latencies[n // 2],
+            "p95_latency": latencies[min(n - 1, int(n * 0.95))],
+            "max_latency": latencies[-1],
+            "retried_batches": sum(1 for h in self._history if h["attempts"] > 1),
+        }
+
+
+async def get_embedding_model():
+    model = await model_manager.get_embedding_model()
+    if not model:
+        raise ExternalServiceError("No embedding model configured")
+    return model
+
+
+def embedding_model_name(model) -> str:
+    return getattr(model, "model_name", None) or os.getenv("DEFAULT_EMBEDDING_MODEL", "")
+
+
+# output size of each embedding model, learned from the vectors it returns
+_model_dimensions: Dict[str, int] = {}
+
+
+async def embed_with_cache(
+    texts: List[str],
+    model,
+    embed_missing: Callable[[List[str]], Awaitable[List[List[float]]]],
+) -> List[List[float]]:
+    """
+    Resolve `texts` from the embedding cache, embed the rest with `embed_missing`
+    (each distinct text once) and store the new vectors in the cache.
+
+    Entries are keyed on the dimension the model actually returns, not on
+    EMBEDDING_DIMENSION, so a model switch under the same name never reads
+    vectors of the wrong size. The first call per model embeds one text to
+    learn it.
+    """
+    if not texts:
+        return []
+    model_name = embedding_model_name(model)
+    hashes = [content_hash(t) for t in texts]
+
+    probed: Dict[str, List[float]] = {}
+    dimension = _model_dimensions.get(model_name)
+    if dimension is None:
+        probed[hashes[0]] = (await embed_missing([texts[0]]))[0]
+        dimension = _model_dimensions[model_name] = len(probed[hashes[0]])
+    found = await embedding_cache.get_many(model_name, dimension, hashes)
+    found.update(probed)
+
+    missing: Dict[str, str] = {}
+    for h, t in zip(hashes, texts):
+        if h not in found and h not in missing:
+            missing[h] = t
+    new_vectors = dict(probed)
+    if missing:
+        vectors = await embed_missing(list(missing.values()))
+        new_vectors.update(zip(missing.keys(), vectors))
+        found.update(new_vectors)
+
+    sizes = {len(v) for v in new_vectors.values()}
+    if sizes and sizes != {dimension}:
+        # the model changed behind the same name, learn its dimension again next call
+        logger.warning(
+            f"Embedding model {model_name} returned vectors of size {sorted(sizes)}, "
+            f"expected {dimension}, not caching them"
+        )
+        _model_dimensions.pop(model_name, None)
+    elif new_vectors:
+        await embedding_cache.put_many(model_name, dimension, new_vectors)
+
+    return [found[h] for h in hashes]
+
+
+def normalize_query(query: str) -> str:
+    return re.sub(r"\s+", " ", unicodedata.normalize("NFKC", query)).strip()
+
+
+class QueryEmbeddingCache:
+    """
+    Size-bounded in-process LRU of query embeddings keyed by (model name,
+    normalized query). It sits in front of the shared Postgres embedding cache
+    so a repeated query costs neither an embedding call nor a database hop.
+    """
+
+    def __init__(self, max_entries: int = QUERY_EMBEDDING_CACHE_SIZE):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Tuple[str, str], List[float]]" = OrderedDict()
+
+    def get(self, model_name: str, query: str) -> Optional[List[float]]:
+        key = (model_name, query)
+        vector = self._entries.get(key)
+        if vector is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return vector
+
+    def put(self, model_name: str, query: str, vector: List[float]) -> None:
+        if self.max_entries <= 0:
+            return
+        key = (model_name, query)
+        self._entries[key] = vector
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else None,
+        }
+
+
+query_embedding_cache = QueryEmbeddingCache()
+
+
+async def embed_queries(queries: List[str], model=None) -> List[List[float]]:
+    """
+    Embed search queries with a single embedding request.
+
+    Queries are normalized and looked up in the in-process LRU, then (with
+    QUERY_EMBEDDING_CACHE_SHARED) in the Postgres embedding cache. They skip
+    the ingestion batcher (and its concurrency limit) so they are never queued
+    behind document embedding.
+    """
+    model = model or await get_embedding_model()
+    model_name = embedding_model_name(model)
+    normalized = [normalize_query(q) for q in queries]
+
+    found: Dict[str, List[float]] = {}
+    missing: List[str] = []
+    for q in dict.fromkeys(normalized):
+        vector = query_embedding_cache.get(model_name, q)
+        if vector is None:
+            missing.append(q)
+        else:
+            found[q] = vector
+
+    if missing:
+        if QUERY_EMBEDDING_CACHE_SHARED:
+            vectors = await embed_with_cache(missing, model, model.aembed)
+        else:
+            vectors = await model.aembed(missing)
+        for q, vector in zip(missing, vectors):
+            query_embedding_cache.put(model_name, q, vector)
+            found[q] = vector
+
+    return [found[q] for q in normalized]
+
+
+async def embed_query(query: str, model=None) -> List[float]:
+    """Embed a single search query, see `embed_queries`."""
+    return (await embed_queries([query], model))[0]
+
+
+batch_embedder = BatchEmbedder()
@@ -0,0 +1,127 @@
+"""
+Content extraction off the event loop.
+
+Parsing PDFs, office documents and the like in `content_core.extract_content`
+is CPU-bound and would stall every other coroutine of the API process (chat
+streams included). Files are therefore extracted in a `ProcessPoolExecutor`,
+with a timeout and an optional address-space limit per worker. A worker that
+times out or dies is not reusable, so the whole pool is recycled.
+"""
+
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, Optional
+
+from content_core import extract_content
+from content_core.common import ProcessSourceState
+from loguru import logger
+
+from open_notebook.config import (
+    EXTRACTION_MAX_TASKS_PER_WORKER,
+    EXTRACTION_MEMORY_LIMIT_MB,
+    EXTRACTION_PROCESS_POOL,
+    EXTRACTION_TIMEOUT,
+    EXTRACTION_WORKERS,
+)
+from open_notebook.exceptions import ExternalServiceError
+
+
+def _init_worker(memory_limit_mb: int) -> None:
+    if memory_limit_mb <= 0:
+        return
+    try:
+        import resource
+
+        limit = memory_limit_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    except (ImportError, ValueError, OSError) as e:
+        # not available on every platform, run without the limit
+        logger.warning(f"Could not limit extraction worker memory: {str(e)}")
+
+
+def _extract_in_worker(content_state: Dict[str, Any]) -> Dict[str, Any]:
+    processed = asyncio.run(extract_content(content_state))
+    return processed.model_dump()
+
+
+class ContentExtractor:
+    def __init__(
+        self,
+        enabled: bool = EXTRACTION_PROCESS_POOL,
+        workers: int = EXTRACTION_WORKERS,
+        timeout: float = EXTRACTION_TIMEOUT,
+        memory_limit_mb: int = EXTRACTION_MEMORY_LIMIT_MB,
+        max_tasks_per_worker: int = EXTRACTION_MAX_TASKS_PER_WORKER,
+    ):
+        self.enabled = enabled and workers > 0
+        self.workers = workers
+        self.timeout = timeout
+        self.memory_limit_mb = memory_limit_mb
+        self.max_tasks_per_worker = max_tasks_per_worker
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # spawn: forking a process that runs an event loop and DB pools is unsafe
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(self.memory_limit_mb,),
+                max_tasks_per_child=self.max_tasks_per_worker or None,
+            )
+            logger.info(f"Started content extraction pool with {self.workers} workers")
+        return self._pool
+
+    def _recycle(self, pool: ProcessPoolExecutor) -> None:
+        """Kill the workers of `pool`, the next call starts a fresh one."""
+        if self._pool is not pool:
+            # already recycled by a concurrent extraction
+            return
+        self._pool = None
+        for process in list((pool._processes or {}).values()):
+            if process.is_alive():
+                process.kill()
+        pool.shutdown(wait=False, cancel_futures=True)
+        logger.warning("Recycled content extraction pool")
+
+    def shutdown(self) -> None:
+        pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+    async def extract(self, content_state: Dict[str, Any]) -> ProcessSourceState:
+        # urls and raw text are I/O-bound or trivial, only files go to the pool
+        if not self.enabled or not content_state.get("file_path"):
+            return await extract_content(content_state)
+
+        file_path = content_state["file_path"]
+        for attempt in range(2):
+            pool = self._get_pool()
+            future = asyncio.get_running_loop().run_in_executor(
+                pool, _extract_in_worker, dict(content_state)
+            )
+            try:
+                processed = await asyncio.wait_for(future, timeout=self.timeout)
+                return ProcessSourceState(**processed)
+            except asyncio.TimeoutError:
+                self._recycle(pool)
+                raise ExternalServiceError(
+                    f"Extraction of {file_path} timed out after {self.timeout:.0f}s"
+                )
+            except BrokenProcessPool:
+                if self._pool is not pool and attempt == 0:
+                    # another extraction timed out and took the pool down with it
+                    continue
+                # the worker died, most likely killed for exceeding its memory limit
+                self._recycle(pool)
+                raise ExternalServiceError(f"Extraction worker crashed while processing {file_path}")
+            except MemoryError:
+                raise ExternalServiceError(
+                    f"Extraction of {file_path} exceeded the {self.memory_limit_mb} MB memory limit"
+                )
+
+
+content_extractor = ContentExtractor()
@@ -3,7 +3,7 @@
 from __future__ import annotations
 import json
 import operator
-from typing import Annotated, List, Optional, Dict, Any
+from typing import Annotated, Any, Callable, Dict, List, Optional
 
 from ai_prompter import Prompter
 from pydantic import BaseModel, Field
@@ -17,18 +17,26 @@ from langchain_core.messages import SystemMessage, HumanMessage, AIMessage, AIMe
 from open_notebook.graphs.utils import (
     provision_langchain_model, 
     _memory_agent_milvus,
-    get_postgres_short_memory,
+    chat_history_store,
     get_checkpointer
 )
 
 from open_notebook.domain.notebook import (
-    hybrid_search_in_notebook,
+    multi_hybrid_search_in_notebook,
     Notebook,
+    rrf_fuse,
 )
+from open_notebook.context_window import expand_hits
+from open_notebook.diversity import diversify_hits
+from open_notebook.memory_writer import memory_writer
+from open_notebook.domain.search_profile import get_search_profile
+from open_notebook.rerank import rerank_stage
+from open_notebook.turn_router import ROUTE_DIRECT, ROUTE_SEARCH, turn_router
 from open_notebook.utils import clean_thinking_content, time_node
 from langchain_core.output_parsers.pydantic import PydanticOutputParser
 
 import asyncio
+import time
 from loguru import logger
 from httpcore import RemoteProtocolError
 import httpx 
@@ -55,7 +63,9 @@ class ThreadState(TypedDict, total=False):
     # fields for strategy & retrieval
     strategy: Optional[Strategy]
     retrieval_limit: int = 5
-    chat_history: Optional[Dict] = {}
+    # short_memory (plan_strategy) and long_memory (retrieve_long_memory) are written in parallel
+    chat_history: Annotated[Dict, operator.or_]
+    speculative_hits: Optional[List[Dict[str, Any]]]
     
     reflection: Optional[Reflection]
     ai_message: Optional[str]
@@ -95,39 +105,86 @@ async def safe_stream(model, prompt, parts: list):
             raise
 
 @time_node
-async def retrieve_chat_history(state: ThreadState, config: RunnableConfig):
+async def retrieve_long_memory(state: ThreadState, config: RunnableConfig):
     """
-    Node lấy chat history — chạy blocking DB trong thread để tránh block event loop.
+    Node tìm long memory trong Milvus — chạy song song với plan_strategy, chỉ chat_agent cần.
     """
     thread_id = config.get("configurable", {}).get("thread_id")
 
-    short_memory = get_postgres_short_memory(thread_id=thread_id, k=4)
-
-    # đọc buffer trong thread để tránh blocking psycopg
-    short_buffer = await asyncio.to_thread(lambda: short_memory.buffer)
-
-    # Milvus search
     search_results = await _memory_agent_milvus.search_long_term_memory(
         query=state.get("message", HumanMessage(content="")).content,
         top_k=4,
         thread_id=thread_id
     )
+    return {"chat_history": {"long_memory": search_results}}
 
-    chat_history = {
-        "short_memory": short_buffer,
-        "long_memory": search_results
-    }
-    return {"chat_history": chat_history}
+@time_node
+async def speculative_retrieval(state: ThreadState, config: RunnableConfig) -> dict:
+    """
+    Search câu hỏi gốc ngay từ đầu, song song với plan_strategy. retrieve_context
+    gộp các hit này thay vì search lại cùng câu hỏi.
+    """
+    question = state.get("message", HumanMessage(content="")).content.strip()
+    source_ids = state.get("source_ids")
+    nb_id = state.get("notebook_id") or (state.get("notebook").id if state.get("notebook") else None)
+    if not question or not nb_id:
+        return {"speculative_hits": []}
+    if (await turn_router.classify(question, record=False)).route == ROUTE_DIRECT:
+        # answered from chat memory, nothing to retrieve
+        return {"speculative_hits": []}
+
+    k = int(state.get("retrieval_limit") or 5)
+    try:
+        profile = await get_search_profile(str(nb_id))
+        search = await multi_hybrid_search_in_notebook(
+            keywords=[question],
+            results=rerank_stage.fetch_limit(k, profile.rerank_overfetch),
+            source_ids=[str(sid) for sid in source_ids] if source_ids else [],
+            notebook_id=str(nb_id),
+            profile=profile,
+        )
+    except Exception as e:
+        # only a head start, retrieve_context still searches the planned terms
+        logger.warning(f"Speculative retrieval failed: {str(e)}")
+        return {"speculative_hits": []}
+    # the ranking of the question alone, fused with the planned terms' in retrieve_context
+    return {"speculative_hits": search["per_term"][question]}
+
+def fast_path_strategy(route: str, question: str) -> Optional[Strategy]:
+    """Strategy của turn_router thay cho lần gọi LLM, None nếu cần lập kế hoạch đầy đủ."""
+    if route == ROUTE_DIRECT:
+        return Strategy(reasoning="Câu chào hỏi hoặc câu hỏi về cuộc hội thoại, trả lời trực tiếp từ lịch sử chat.", searches=[])
+    if route == ROUTE_SEARCH:
+        # retrieve_context dùng lại kết quả của speculative_retrieval cho term này
+        return Strategy(
+            reasoning="Câu hỏi ngắn, tìm kiếm trực tiếp bằng câu hỏi của người dùng.",
+            searches=[Search(term=question.strip(), instructions="Trích xuất thông tin trả lời câu hỏi")],
+        )
+    return None
 
 @time_node
 async def plan_strategy(state: ThreadState, config: RunnableConfig) -> dict:
     """LLM tạo chiến lược và các search terms trước khi build context."""
     print("retry: ", state.get("retry", 0))
+    # short memory là một query qua pool, đọc ngay tại đây để plan không phải chờ node khác
+    thread_id = config.get("configurable", {}).get("thread_id")
+    short_memory = await chat_history_store.get_messages(thread_id)
+
+    # greetings và câu hỏi ngắn không cần LLM lập kế hoạch, retry luôn lập kế hoạch đầy đủ
+    if not int(state.get("retry", 0)):
+        question = state.get("message", HumanMessage(content="")).content
+        decision = await turn_router.classify(question, has_history=bool(short_memory))
+        strategy = fast_path_strategy(decision.route, question)
+        if strategy is not None:
+            yield {"end_node": "plan_strategy", "strategy": strategy, "chat_history": {"short_memory": short_memory}}
+            return
+
+    start = time.perf_counter()
     parser = PydanticOutputParser(pydantic_object=Strategy)
     system_prompt = Prompter(prompt_template="ask/entry", parser=parser).render(
         data={
             "question": state.get("message", HumanMessage(content="")),
-            "short_memory": state.get("chat_history", {}).get("short_memory", [])
+            "short_memory": short_memory
         }
     )
     model = await provision_langchain_model(
@@ -152,9 +209,10 @@ async def plan_strategy(state: ThreadState, config: RunnableConfig) -> dict:
         logger.error(f"Parse Strategy failed: {e}\nRaw={cleaned}")
         # fallback an empty Strategy to continue graph
         strategy = Strategy(reasoning=f"Phương hướng tìm kiếm cho câu hỏi chưa hợp lệ, cần kiểm tra lại.", searches=[])
+    turn_router.record_planner_latency(time.perf_counter() - start)
         
     # print(strategy)
-    yield {"end_node": "plan_strategy", "strategy": strategy}
+    yield {"end_node": "plan_strategy", "strategy": strategy, "chat_history": {"short_memory": short_memory}}
 
 @time_node
 async def retrieve_context(state: ThreadState, config: RunnableConfig) -> dict:
@@ -164,32 +222,50 @@ async def retrieve_context(state: ThreadState, config: RunnableConfig) -> dict:
 
     k = int(state.get("retrieval_limit") or 5)
     terms = [s.term.strip() for s in strategy.searches if s.term.strip()][:k]
+    question = state.get("message", HumanMessage(content="")).content
+    speculative = state.get("speculative_hits") or []
     
     nb_id = state.get("notebook_id") or (state.get("notebook").id if state.get("notebook") else None)
 
     if not terms or not nb_id:
         return {"context": {}}
 
-    # aggregated: list[dict] = []
-    params_list = [
-        {
-            "keyword": term,
-            "results": k,
-            "source_ids": [str(sid) for sid in source_ids] if source_ids else [],
-            "notebook_id": str(nb_id),
-            "return_score": True,
-        }
-        for term in terms
-    ]
-
-    # Launch all searches concurrently
-    tasks = [hybrid_search_in_notebook(**param) for param in params_list]
-    results_list = await asyncio.gather(*tasks)
-    
-    # Merge all results into one dict
-    context_dict = {}
-    for res in results_list:
-        context_dict.update(res)
+    rankings = []
+    if speculative:
+        # the raw question was already searched by speculative_retrieval, its ranking
+        # joins the same fusion (rrf values of separate fusions are not comparable)
+        rankings.append(speculative)
+        terms = [t for t in terms if t.casefold() != question.strip().casefold()]
+    if terms:
+        profile = await get_search_profile(str(nb_id))
+        # all terms in one embedding request and one Milvus hybrid search,
+        # over-fetched when a reranker picks the final k
+        search = await multi_hybrid_search_in_notebook(
+            keywords=terms,
+            results=rerank_stage.fetch_limit(k, profile.rerank_overfetch),
+            source_ids=[str(sid) for sid in source_ids] if source_ids else [],
+            notebook_id=str(nb_id),
+            profile=profile,
+        )
+        rankings.extend(search["per_term"].values())
+    hits = rrf_fuse(rankings)
+
+    score_key, keep = "rrf", None
+    if rerank_stage.enabled:
+        # scores are comparable across terms, keep the best k chunks overall
+        hits, _ = await rerank_stage.rerank(question or " ".join(terms), hits, len(hits))
+        score_key, keep = "rerank_score", k
+
+    # drop overlapping and near-duplicate chunks before they reach the prompt
+    hits = await diversify_hits(hits, keep, score_key=score_key)
+    # neighbours of the kept hits in one query, stitched into passages
+    hits = await expand_hits(hits, str(nb_id))
+
+    # Merged ranking, best chunks first
+    context_dict = {
+        hit["id"]: {"content": hit["content"], "score": hit.get("rerank_score", hit["score"])}
+        for hit in hits
+    }
 
     return { "context": context_dict }
 
@@ -255,19 +331,16 @@ async def chat_agent(state: ThreadState, config: RunnableConfig):
     
     message = state.get("message", HumanMessage(content=""))
     thread_id = config.get("configurable", {}).get("thread_id")
-    short_memory = get_postgres_short_memory(thread_id=thread_id, k=4)
 
-    # Milvus upsert (blocking) -> chạy trong thread
-    await _memory_agent_milvus.upsert_long_term_memory(
+    # Milvus long-term memory: xếp hàng cho memory_writer, không chờ embed/insert/flush
+    await memory_writer.submit(
         user_text=message.content,
         ai_text=cleaned,
         thread_id=thread_id,
     )
 
-    # Ghi vào Postgres short memory (blocking -> thread)
-    await asyncio.to_thread(short_memory.chat_memory.add_user_message, message)
-    ai_msg = AIMessage(content=cleaned)
-    await asyncio.to_thread(short_memory.chat_memory.add_ai_message, ai_msg)
+    # Ghi vào Postgres short memory, user + AI message trong một câu lệnh
+    await chat_history_store.add_messages(thread_id, [message, AIMessage(content=cleaned)])
     print(state.get("strategy"))
     print(state.get("context"))
     print(state.get("reflection"))
@@ -338,46 +411,91 @@ async def route_after_reflection(state: ThreadState, config: RunnableConfig) ->
 async def inc_retry(state: ThreadState, config: RunnableConfig) -> dict:
     return {"retry": int(state.get("retry", 0)) + 1}
 
-_agent_state = None
-
-async def get_conversation_graph(state: ThreadState, config: RunnableConfig) -> StateGraph:
-    global _agent_state
-    if _agent_state is None:
-        _agent_state = StateGraph(ThreadState)
-        _agent_state.add_node("retrieve_chat_history", retrieve_chat_history)
-        _agent_state.add_node("plan_strategy", plan_strategy)
-        _agent_state.add_node("retrieve_context", retrieve_context)
-        _agent_state.add_node("chat_agent", chat_agent)
-        _agent_state.add_node("reflect_answer", reflect_answer)
-        _agent_state.add_node("inc_retry", inc_retry)
-
-        # Flow:
-        _agent_state.add_edge(START, "retrieve_chat_history")
-        _agent_state.add_edge("retrieve_chat_history", "plan_strategy")
-        
-        # after build strategy, check whether we need to retrieve 
-        _agent_state.add_conditional_edges(
-            "plan_strategy",
-            lambda state: "chat_agent" if not state["strategy"].searches else "retrieve_context"
-        )
-        # after retrieval, run reflection
-        _agent_state.add_edge("retrieve_context", "reflect_answer")
+async def context_ready(state: ThreadState, config: RunnableConfig) -> dict:
+    """Điểm hẹn của nhánh plan/retrieve trước khi join với các nhánh song song."""
+    return {}
+
+def build_conversation_graph() -> StateGraph:
+    agent_state = StateGraph(ThreadState)
+    agent_state.add_node("plan_strategy", plan_strategy)
+    agent_state.add_node("retrieve_long_memory", retrieve_long_memory)
+    agent_state.add_node("speculative_retrieval", speculative_retrieval)
+    agent_state.add_node("retrieve_context", retrieve_context)
+    agent_state.add_node("reflect_answer", reflect_answer)
+    agent_state.add_node("inc_retry", inc_retry)
+    agent_state.add_node("context_ready", context_ready)
+    agent_state.add_node("chat_agent", chat_agent)
+
+    # Flow: planning, long-memory search and speculative retrieval on the raw
+    # question start together
+    agent_state.add_edge(START, "plan_strategy")
+    agent_state.add_edge(START, "retrieve_long_memory")
+    agent_state.add_edge(START, "speculative_retrieval")
+    
+    # after build strategy, check whether we need to retrieve 
+    agent_state.add_conditional_edges(
+        "plan_strategy",
+        lambda state: "context_ready" if not state["strategy"].searches else "retrieve_context"
+    )
+    # after retrieval, run reflection
+    agent_state.add_edge("retrieve_context", "reflect_answer")
 
-        # conditional routing with the retry guard
-        
-        _agent_state.add_conditional_edges(
-            "reflect_answer",
-            route_after_reflection,
-            {
-                "retry": "inc_retry",
-                "done": "chat_agent",
-            },
-        )
-        # if retrying, bump retry then go back to chat_agent
-        _agent_state.add_edge("inc_retry", "plan_strategy")
-        # if not retrying, bump to chat agent -> end
-        _agent_state.add_edge("chat_agent", END)
+    # conditional routing with the retry guard
+    
+    agent_state.add_conditional_edges(
+        "reflect_answer",
+        route_after_reflection,
+        {
+            "retry": "inc_retry",
+            "done": "context_ready",
+        },
+    )
+    # if retrying, bump retry then go back to plan_strategy
+    agent_state.add_edge("inc_retry", "plan_strategy")
+    # chat_agent waits for all three branches, then -> end
+    agent_state.add_edge(["retrieve_long_memory", "speculative_retrieval", "context_ready"], "chat_agent")
+    agent_state.add_edge("chat_agent", END)
+    return agent_state
 
-    checkpointer = await get_checkpointer()
-    return _agent_state.compile(checkpointer=checkpointer)
 
+class CompiledGraphRegistry:
+    """
+    Compiled conversation graph, built once per checkpointer and reused by
+    every chat turn.
+
+    Compiling validates the whole graph and wires its channels, which is
+    wasted work per request since the graph never changes. The compiled graph
+    is rebuilt only when the checkpointer changes (its pool was recreated) or
+    after `invalidate()`.
+    """
+
+    def __init__(self, build: Callable[[], StateGraph] = build_conversation_graph):
+        self._build = build
+        self._builder: Optional[StateGraph] = None
+        self._checkpointer = None
+        self._compiled = None
+        self.compilations = 0
+
+    def get(self, checkpointer):
+        if self._compiled is None or checkpointer is not self._checkpointer:
+            if self._builder is None:
+                self._builder = self._build()
+            self._compiled = self._builder.compile(checkpointer=checkpointer)
+            self._checkpointer = checkpointer
+            self.compilations += 1
+            logger.info(f"Compiled conversation graph ({self.compilations} compilations)")
+        return self._compiled
+
+    def invalidate(self) -> None:
+        """Rebuild the graph on next use, e.g. after its configuration changed."""
+        self._builder = None
+        self._checkpointer = None
+        self._compiled = None
+
+
+graph_registry = CompiledGraphRegistry()
+
+
+async def get_conversation_graph(state: Optional[ThreadState] = None, config: Optional[RunnableConfig] = None):
+    checkpointer = await get_checkpointer()
+    return graph_registry.get(checkpointer)
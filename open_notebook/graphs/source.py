@@ -2,7 +2,6 @@ import operator
 from typing import Any, Dict, List, Optional
 import json
 
-from content_core import extract_content
 from content_core.common import ProcessSourceState
 from langchain_core.runnables import RunnableConfig
 from langgraph.graph import END, START, StateGraph
@@ -14,6 +13,7 @@ from open_notebook.database.repository import transaction
 from open_notebook.domain.content_settings import ContentSettings
 from open_notebook.domain.notebook import Asset, Source
 from open_notebook.domain.transformation import Transformation
+from open_notebook.extraction import content_extractor
 from open_notebook.graphs.transformation import graph as transform_graph
 
 
@@ -26,6 +26,8 @@ class SourceState(TypedDict):
     embed: bool
     source_id: str
     title: Optional[str]
+    file_sha256: Optional[str]
+    resumable: bool
 
 
 class TransformationState(TypedDict):
@@ -45,14 +47,21 @@ async def content_process(state: SourceState) -> dict:
     )
     content_state["output_format"] = "markdown"
 
-    processed_state = await extract_content(content_state)
+    # CPU-bound parsing runs in the extraction process pool, off the event loop
+    processed_state = await content_extractor.extract(content_state)
     return {"content_state": processed_state}
 
 
 async def save_source(state: SourceState) -> dict:
     content_state = state["content_state"]
     # Serialize the Asset object to a JSON string
-    asset_json = json.dumps(Asset(url=content_state.url, file_path=content_state.file_path).model_dump())
+    asset_json = json.dumps(
+        Asset(
+            url=content_state.url,
+            file_path=content_state.file_path,
+            sha256=state.get("file_sha256"),
+        ).model_dump()
+    )
 
     source = Source(
         asset=asset_json,  # Pass the serialized JSON string
@@ -67,21 +76,41 @@ async def save_source(state: SourceState) -> dict:
         logger.debug(f"Adding source to notebook {state['notebook_id']}")
         # await source.add_to_notebook(state["notebook_id"])
 
+    # a resumable run (background job) keeps what a previous attempt committed
+    resumable = state.get("resumable", False)
+    existing = None
+    if resumable:
+        try:
+            existing = await Source.get(state["source_id"])
+        except Exception:
+            existing = None
+
+    # the source row comes first, chunk ids are recorded against it batch by batch
+    try:
+        if existing:
+            logger.info(f"Resuming ingestion of source {source.id}")
+            source.created = existing.created
+            source.n_embedding_chunks = existing.n_embedding_chunks
+            await source.save()
+            # transformations run again after this node
+            await source.delete_insights()
+        else:
+            await source.save(provided_id=True)
+    except Exception as e:
+        raise RuntimeError(f"Error save source {e}")
+
     if state["embed"]:
         logger.debug("Embedding content for vector search")
         try:
-            embeddings_chunk = await source.vectorize(state["notebook_id"])
-            
+            embeddings_chunk = await source.vectorize(
+                state["notebook_id"], resume=existing is not None
+            )
             source.n_embedding_chunks = len(embeddings_chunk)
-
+            await source.save()
         except Exception as e:
+            if not resumable:
+                await source.delete()
             raise RuntimeError("Vectorize process error") from e
-    try:
-        await source.save(provided_id=True)
-        await source.save_embedding_ids(embeddings_chunk)
-    except Exception as e:
-        await source.delete()
-        raise RuntimeError(f"Error save source {e}") 
 
     return {"source": source}
 
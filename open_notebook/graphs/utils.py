@@ -7,17 +7,15 @@ from typing import Annotated, List, Optional, Dict, Any
 
 from dotenv import load_dotenv
 from loguru import logger
-from psycopg import OperationalError
+from psycopg import OperationalError, sql
+from psycopg.types.json import Jsonb
 from psycopg_pool import AsyncConnectionPool
 from langchain_core.language_models.chat_models import BaseChatModel
-from langchain_core.chat_history import BaseChatMessageHistory
 from langchain_core.messages import (
     BaseMessage,
     message_to_dict,
     messages_from_dict,
 )
-# from langchain.memory import ConversationBufferWindowMemory
-from langchain_classic.memory import ConversationBufferMemory
 from langgraph.checkpoint.postgres.aio import AsyncPostgresSaver
 from pymilvus import (
     connections,
@@ -36,8 +34,11 @@ from open_notebook.config import (
     POOL_SIZE,
     MILVUS_PORT,
     MILVUS_ADDRESS,
+    SHORT_MEMORY_TURNS,
 )
+from open_notebook.database.milvus_async import insert_data, milvus_pool
 from open_notebook.domain.models import model_manager
+from open_notebook.embedding import embed_query
 from open_notebook.utils import token_count
 
 load_dotenv()
@@ -52,94 +53,6 @@ async def provision_langchain_model(
     return model.to_langchain()
 
 
-class NotebookPostgresChatMessageHistory(BaseChatMessageHistory):
-    """Chat message history stored in a Postgres database.
-
-    **DEPRECATED**: This class is deprecated and will be removed in a future version.
-
-    Use the `PostgresChatMessageHistory` implementation in `langchain_postgres`.
-    """
-
-    def __init__(
-        self,
-        session_id: str,
-        connection_string: str = DB_URI,
-        table_name: str = "lc_message_history",
-    ):
-        import psycopg
-        from psycopg.rows import dict_row
-
-        try:
-            self.connection = psycopg.connect(connection_string)
-            self.cursor = self.connection.cursor(row_factory=dict_row)
-        except psycopg.OperationalError as error:
-            logger.error(error)
-
-        self.session_id = session_id
-        self.table_name = table_name
-
-        self._create_table_if_not_exists()
-
-    def _create_table_if_not_exists(self) -> None:
-        create_table_query = f"""CREATE TABLE IF NOT EXISTS {self.table_name} (
-            id SERIAL PRIMARY KEY,
-            session_id UUID NOT NULL,
-            message JSONB NOT NULL,
-            CONSTRAINT fk_session_id
-                FOREIGN KEY (session_id)
-                REFERENCES chat_session(id)
-                ON DELETE CASCADE
-        );"""
-        self.cursor.execute(create_table_query)
-        self.connection.commit()
-
-    @property
-    def messages(self) -> List[BaseMessage]:  # type: ignore
-        """Retrieve the messages from PostgreSQL"""
-        query = (
-            f"SELECT message FROM {self.table_name} WHERE session_id = %s ORDER BY id;"
-        )
-        self.cursor.execute(query, (self.session_id,))
-        items = [record["message"] for record in self.cursor.fetchall()]
-        messages = messages_from_dict(items)
-        return messages
-
-    def add_message(self, message: BaseMessage) -> None:
-        """Append the message to the record in PostgreSQL"""
-        from psycopg import sql
-
-        query = sql.SQL("INSERT INTO {} (session_id, message) VALUES (%s, %s);").format(
-            sql.Identifier(self.table_name)
-        )
-        self.cursor.execute(
-            query, (self.session_id, json.dumps(message_to_dict(message)))
-        )
-        self.connection.commit()
-
-    def clear(self) -> None:
-        """Clear session memory from PostgreSQL"""
-        query = f"DELETE FROM {self.table_name} WHERE session_id = %s;"
-        self.cursor.execute(query, (self.session_id,))
-        self.connection.commit()
-
-    def __del__(self) -> None:
-        if self.cursor:
-            self.cursor.close()
-        if self.connection:
-            self.connection.close()
-
-def get_postgres_short_memory(thread_id: str, k: int = 4) -> ConversationBufferMemory:
-    return ConversationBufferMemory(
-        k=k,
-        memory_key="chat_history",
-        return_messages=True,
-        chat_memory=NotebookPostgresChatMessageHistory(
-            connection_string=DB_URI,
-            session_id=thread_id,
-            table_name="lc_message_history"
-        )
-    )
-
 logger = logging.getLogger(__name__)
 
 class MemoryAgentMilvus:
@@ -173,9 +86,26 @@ class MemoryAgentMilvus:
 
         self.collection.load()
 
+    @staticmethod
+    def format_turn(user_text: str, ai_text: str) -> str:
+        return f"Human Message: {user_text}\nAI Message: {ai_text}"
+
+    async def insert_turns(self, embeddings: List[List[float]], texts: List[str], thread_ids: List[str], ts: List[str]):
+        """Insert several turns, without flush."""
+        await insert_data(
+            self.collection_name,
+            [
+                {"embedding": e, "text": t, "thread_id": tid, "ts": s}
+                for e, t, tid, s in zip(embeddings, texts, thread_ids, ts)
+            ],
+        )
+
+    async def flush(self):
+        await milvus_pool.call("flush", collection_name=self.collection_name)
+
     async def upsert_long_term_memory(self, user_text: str, ai_text: str, thread_id: str):
         ts = datetime.utcnow().isoformat()
-        text = f"Human Message: {user_text}\nAI Message: {ai_text}"
+        text = self.format_turn(user_text, ai_text)
 
         EMBEDDING_MODEL = await model_manager.get_embedding_model()
         if not EMBEDDING_MODEL:
@@ -184,12 +114,8 @@ class MemoryAgentMilvus:
 
         embedding = (await EMBEDDING_MODEL.aembed([text]))[0]
 
-        # blocking Milvus calls chạy trong thread
-        def blocking_insert():
-            self.collection.insert([[embedding], [text], [thread_id], [ts]])
-            self.collection.flush()
-
-        await asyncio.to_thread(blocking_insert)
+        await self.insert_turns([embedding], [text], [thread_id], [ts])
+        await self.flush()
 
     async def search_long_term_memory(self, query: str, thread_id: str, top_k: int = 5):
         EMBEDDING_MODEL = await model_manager.get_embedding_model()
@@ -198,40 +124,39 @@ class MemoryAgentMilvus:
             return []
 
         # tạo embedding
-        query_vec = (await EMBEDDING_MODEL.aembed([query]))[0]
-
-        # chạy phần blocking trong thread
-        def blocking_search():
-            self.collection.load()
-            return self.collection.search(
-                data=[query_vec],
-                anns_field="embedding",
-                param={"metric_type": "COSINE", "params": {"ef": 64}},
-                limit=top_k,
-                output_fields=["text"],
-                expr=f'thread_id == "{thread_id}"'
-            )
-
-        results = await asyncio.to_thread(blocking_search)
+        query_vec = await embed_query(query, model=EMBEDDING_MODEL)
+
+        results = await milvus_pool.call(
+            "search",
+            collection_name=self.collection_name,
+            data=[query_vec],
+            anns_field="embedding",
+            search_params={"metric_type": "COSINE", "params": {"ef": 64}},
+            limit=top_k,
+            output_fields=["text"],
+            filter="thread_id == {thread_id}",
+            filter_params={"thread_id": str(thread_id)},
+        )
 
         # flatten và lấy text
         flattened = [hit['entity']['text'] for batch in results for hit in batch]
         return flattened
 
     
-    def delete(self, thread_id: str):
+    async def delete(self, thread_id: str):
         """
         Delete all entries belonging to a specific thread_id.
         """
         try:
-            # Build expression for deletion
-            expr = f'thread_id == "{thread_id}"'
-
-            # Perform delete
-            self.collection.delete(expr)
+            await milvus_pool.call(
+                "delete",
+                collection_name=self.collection_name,
+                filter="thread_id == {thread_id}",
+                filter_params={"thread_id": str(thread_id)},
+            )
 
             # Flush to make sure deletion is applied
-            self.collection.flush()
+            await self.flush()
 
             logger.info(f"Deleted all records with thread_id={thread_id} from {self.collection_name}")
         except Exception as e:
@@ -293,4 +218,60 @@ async def get_checkpointer(retries: int = 3, delay: int = 2) -> AsyncPostgresSav
                 if attempt < retries - 1:
                     await asyncio.sleep(delay)
                 else:
-                    raise
\ No newline at end of file
+                    raise
+
+
+async def get_pool() -> AsyncConnectionPool:
+    """The checkpointer's connection pool, opened on first use."""
+    if _pool is None or _pool.closed:
+        await get_checkpointer()
+    return _pool
+
+
+class PostgresChatHistoryStore:
+    """
+    Short-term chat memory of a session (lc_message_history) on the shared
+    checkpointer pool.
+
+    The table is created by migrations/7.sql, so reading the last messages of
+    a turn is one indexed query and storing a turn is one insert.
+    """
+
+    def __init__(self, table_name: str = "lc_message_history"):
+        self.table = sql.Identifier(table_name)
+
+    async def get_messages(self, session_id: str, k: int = SHORT_MEMORY_TURNS * 2) -> List[BaseMessage]:
+        """The last `k` messages of a session, oldest first."""
+        query = sql.SQL(
+            "SELECT message FROM {} WHERE session_id = %s ORDER BY id DESC LIMIT %s"
+        ).format(self.table)
+        pool = await get_pool()
+        async with pool.connection() as conn:
+            cursor = await conn.execute(query, (session_id, k))
+            rows = await cursor.fetchall()
+        items = [row[0] if isinstance(row[0], dict) else json.loads(row[0]) for row in reversed(rows)]
+        return messages_from_dict(items)
+
+    async def add_messages(self, session_id: str, messages: List[BaseMessage]) -> None:
+        """Append `messages` to a session in one statement."""
+        if not messages:
+            return
+        query = sql.SQL("INSERT INTO {} (session_id, message) VALUES {}").format(
+            self.table,
+            sql.SQL(", ").join(sql.SQL("(%s, %s)") for _ in messages),
+        )
+        params = []
+        for message in messages:
+            params.extend((session_id, Jsonb(message_to_dict(message))))
+        pool = await get_pool()
+        async with pool.connection() as conn:
+            await conn.execute(query, params)
+
+    async def clear(self, session_id: str) -> None:
+        query = sql.SQL("DELETE FROM {} WHERE session_id = %s").format(self.table)
+        pool = await get_pool()
+        async with pool.connection() as conn:
+            await conn.execute(query, (session_id,))
+
+
+chat_history_store = PostgresChatHistoryStore()
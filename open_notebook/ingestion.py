@@ -0,0 +1,370 @@
+import asyncio
+import json
+import os
+import time
+from typing import Any, AsyncGenerator, Awaitable, Callable, Dict, List, Optional
+
+from loguru import logger
+from sqlalchemy import text
+
+from open_notebook.config import (
+    BULK_EXTRACTION_CONCURRENCY,
+    INGESTION_HEARTBEAT_INTERVAL,
+    INGESTION_POLL_INTERVAL,
+    INGESTION_WORKERS,
+    MILVUS_INSERT_BATCH_SIZE,
+)
+from open_notebook.database import milvus_async
+from open_notebook.database.embedding_cache import content_hash
+from open_notebook.database.repository import (
+    ensure_record_id,
+    repo_bulk_insert,
+    repo_query,
+    transaction,
+)
+from open_notebook.domain.ingestion_job import IngestionJob
+from open_notebook.domain.notebook import SOURCE_EMBEDDING_ID_COLUMNS, Asset, Source
+from open_notebook.domain.transformation import Transformation
+from open_notebook.embedding import batch_embedder
+from open_notebook.graphs.source import content_process, source_graph
+from open_notebook.search_cache import bump_search_version
+from open_notebook.utils import split_text
+
+
+def _remove_file(file_path: Optional[str]) -> None:
+    if file_path and os.path.exists(file_path):
+        try:
+            os.remove(file_path)
+        except Exception as e:
+            logger.error(f"Error deleting file {file_path}: {str(e)}")
+
+
+async def run_source_job(job: IngestionJob) -> Dict[str, Any]:
+    """Run `source_graph` for a queued source and report progress per graph node."""
+    payload = job.payload
+    source_id = payload["source_id"]
+
+    transformations = []
+    for trans_id in payload.get("transformations") or []:
+        transformations.append(await Transformation.get(trans_id))
+
+    await job.update_progress(0.05, "Extracting content")
+    source: Optional[Source] = None
+    n_transformations = len(transformations)
+    done_transformations = 0
+    async for update in source_graph.astream(
+        {
+            "content_state": payload["content_state"],
+            "notebook_id": payload["notebook_id"],
+            "source_id": source_id,
+            "apply_transformations": transformations,
+            "embed": payload.get("embed", False),
+            "title": payload.get("title"),
+            "file_sha256": payload.get("file_sha256"),
+            # a retried job resumes from the chunks committed by previous attempts
+            "resumable": True,
+        },
+        stream_mode="updates",
+    ):
+        for node, output in update.items():
+            if node == "content_process":
+                await job.update_progress(0.4, "Content extracted, saving source")
+            elif node == "save_source":
+                source = output["source"]
+                await job.update_progress(
+                    0.9 if n_transformations else 0.95,
+                    "Source saved" + (", applying transformations" if n_transformations else ""),
+                )
+            elif node == "transform_content":
+                done_transformations += 1
+                await job.update_progress(
+                    0.9 + 0.09 * done_transformations / max(1, n_transformations),
+                    f"Applied {done_transformations}/{n_transformations} transformations",
+                )
+
+    if source is None:
+        raise RuntimeError(f"Source graph finished without saving source {source_id}")
+    return {
+        "source_id": str(source.id),
+        "title": source.title,
+        "embedded_chunks": source.n_embedding_chunks,
+    }
+
+
+JOB_HANDLERS: Dict[str, Callable[[IngestionJob], Awaitable[Dict[str, Any]]]] = {
+    "source": run_source_job,
+}
+
+
+class IngestionWorkerPool:
+    """
+    Background workers that drain the `ingestion_job` queue.
+
+    Each worker claims one job at a time, so `concurrency` bounds how many
+    ingestions run in this process. Several API processes can run a pool
+    against the same queue.
+    """
+
+    def __init__(
+        self,
+        concurrency: int = INGESTION_WORKERS,
+        poll_interval: float = INGESTION_POLL_INTERVAL,
+    ):
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self._tasks: List[asyncio.Task] = []
+        self._stopping = asyncio.Event()
+
+    @property
+    def running(self) -> bool:
+        return any(not t.done() for t in self._tasks)
+
+    async def start(self) -> None:
+        if self.running or self.concurrency <= 0:
+            return
+        self._stopping = asyncio.Event()
+        self._tasks = [
+            asyncio.create_task(self._worker(n), name=f"ingestion-worker-{n}")
+            for n in range(self.concurrency)
+        ]
+        logger.info(f"Started {self.concurrency} ingestion workers")
+
+    async def stop(self, timeout: float = 30) -> None:
+        """Stop polling and give running jobs `timeout` seconds to finish."""
+        if not self._tasks:
+            return
+        self._stopping.set()
+        done, pending = await asyncio.wait(self._tasks, timeout=timeout)
+        for task in pending:
+            task.cancel()
+        # cancelled jobs stay 'running' and are picked up again once stale
+        await asyncio.gather(*pending, return_exceptions=True)
+        self._tasks = []
+        logger.info("Stopped ingestion workers")
+
+    async def _worker(self, n: int) -> None:
+        while not self._stopping.is_set():
+            try:
+                job = await IngestionJob.dequeue()
+            except Exception as e:
+                logger.error(f"Ingestion worker {n} could not poll the queue: {str(e)}")
+                job = None
+
+            if job is None:
+                try:
+                    await asyncio.wait_for(self._stopping.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            await self._run(n, job)
+
+    async def _heartbeat(self, job: IngestionJob) -> None:
+        while True:
+            await asyncio.sleep(INGESTION_HEARTBEAT_INTERVAL)
+            await job.heartbeat()
+
+    async def _run(self, n: int, job: IngestionJob) -> None:
+        logger.info(f"Ingestion worker {n} running {job.kind} job {job.id} (attempt {job.attempts})")
+        handler = JOB_HANDLERS.get(job.kind)
+        # keeps the job from being reclaimed as stale while a long step runs
+        heartbeat = asyncio.create_task(self._heartbeat(job), name=f"ingestion-heartbeat-{job.id}")
+        try:
+            if handler is None:
+                raise ValueError(f"Unknown ingestion job kind: {job.kind}")
+            result = await handler(job)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.exception(f"Ingestion job {job.id} failed: {str(e)}")
+            try:
+                await job.fail(str(e))
+            except Exception as fail_error:
+                logger.error(f"Could not record failure of ingestion job {job.id}: {str(fail_error)}")
+            # a dead job keeps its file for POST /jobs/{id}/retry until it is discarded
+            return
+        finally:
+            heartbeat.cancel()
+
+        try:
+            await job.complete(result)
+        except Exception as e:
+            logger.error(f"Could not mark ingestion job {job.id} completed: {str(e)}")
+        _remove_file(job.payload.get("cleanup_file"))
+
+
+ingestion_pool = IngestionWorkerPool()
+
+
+async def ingest_sources_bulk(
+    notebook_id: str,
+    items: List[Dict[str, Any]],
+    embed: bool = True,
+    concurrency: int = BULK_EXTRACTION_CONCURRENCY,
+) -> AsyncGenerator[Dict[str, Any], None]:
+    """
+    Ingest many sources in one pass and yield one result dict per event.
+
+    `items` are dicts with `source_id`, `content_state` and an optional `title`.
+    Items are extracted in parallel, then the chunks of every extracted source
+    share the same embedding batches, go to Milvus in one bulk insert and are
+    saved to Postgres, sources and chunk ids, in a single transaction.
+
+    Yields `{"source_id", "status": "extracted"}` as extractions finish,
+    `{"source_id", "status": "failed", "error"}` for items that could not be
+    ingested and `{"source_id", "status": "created", ...}` once saved.
+    """
+    started = time.perf_counter()
+    source_ids = [str(item["source_id"]) for item in items]
+    existing = await repo_query(
+        "SELECT id FROM source WHERE id = ANY(:ids)",
+        {"ids": [ensure_record_id(sid) for sid in source_ids]},
+    )
+    existing_ids = {str(row["id"]) for row in existing}
+
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def extract(item: Dict[str, Any]):
+        async with semaphore:
+            try:
+                result = await content_process({"content_state": dict(item["content_state"])})
+                return item, result["content_state"], None
+            except Exception as e:
+                return item, None, e
+
+    pending = []
+    for item in items:
+        sid = str(item["source_id"])
+        if sid in existing_ids:
+            yield {"source_id": sid, "status": "failed", "error": f"Source {sid} already exists"}
+        else:
+            pending.append(asyncio.create_task(extract(item)))
+
+    sources: List[Source] = []
+    for next_done in asyncio.as_completed(pending):
+        item, processed, error = await next_done
+        sid = str(item["source_id"])
+        if error is not None or not processed:
+            logger.error(f"Bulk ingestion could not extract source {sid}: {str(error)}")
+            yield {"source_id": sid, "status": "failed", "error": f"Extraction failed: {str(error)}"}
+            continue
+        sources.append(
+            Source(
+                id=sid,
+                notebook_id=notebook_id,
+                title=item.get("title") or processed.title,
+                full_text=processed.content,
+                asset=json.dumps(
+                    Asset(url=processed.url, file_path=processed.file_path).model_dump()
+                ),
+            )
+        )
+        yield {"source_id": sid, "status": "extracted"}
+
+    if not sources:
+        return
+
+    # chunk every source, then embed all chunks through the shared batcher
+    chunks_per_source: List[List[str]] = []
+    if embed:
+        for source in sources:
+            chunks_per_source.append(
+                await asyncio.to_thread(split_text, source.full_text) if source.full_text else []
+            )
+    else:
+        chunks_per_source = [[] for _ in sources]
+    all_chunks = [chunk for chunks in chunks_per_source for chunk in chunks]
+
+    milvus_ids: List[int] = []
+    try:
+        if all_chunks:
+            embeddings = await batch_embedder.aembed(all_chunks)
+            rows = []
+            offset = 0
+            for source, chunks in zip(sources, chunks_per_source):
+                for order, chunk in enumerate(chunks):
+                    rows.append(
+                        {
+                            "dense_vector": embeddings[offset],
+                            "content": chunk,
+                            "order": order,
+                            "source_id": str(source.id),
+                            "notebook_id": str(notebook_id),
+                        }
+                    )
+                    offset += 1
+            # filled slice by slice, the cleanup below also sees the slices
+            # written before a failing one
+            await milvus_async.insert_data_batched(
+                "source_embedding",
+                rows,
+                MILVUS_INSERT_BATCH_SIZE,
+                ids=milvus_ids,
+            )
+
+        chunk_rows = []
+        offset = 0
+        for source, chunks in zip(sources, chunks_per_source):
+            source.n_embedding_chunks = len(chunks)
+            for order, chunk in enumerate(chunks):
+                chunk_rows.append(
+                    {
+                        "source_embedding_id": milvus_ids[offset],
+                        "source_id": ensure_record_id(source.id),
+                        "chunk_order": order,
+                        "content_hash": content_hash(chunk),
+                    }
+                )
+                offset += 1
+
+        async with transaction() as session:
+            await session.execute(
+                text(
+                    """
+                    INSERT INTO source (id, notebook_id, title, full_text, asset, topics, n_embedding_chunks)
+                    VALUES (:id, :notebook_id, :title, :full_text, :asset, :topics, :n_embedding_chunks)
+                    """
+                ),
+                [
+                    {
+                        "id": ensure_record_id(source.id),
+                        "notebook_id": ensure_record_id(notebook_id),
+                        "title": source.title,
+                        "full_text": source.full_text,
+                        "asset": source.asset,
+                        "topics": source.topics or [],
+                        "n_embedding_chunks": source.n_embedding_chunks,
+                    }
+                    for source in sources
+                ],
+            )
+            await repo_bulk_insert(
+                "source_embedding_ids",
+                SOURCE_EMBEDDING_ID_COLUMNS,
+                chunk_rows,
+                on_conflict="(source_embedding_id) DO NOTHING",
+                session=session,
+            )
+    except Exception as e:
+        logger.exception(f"Bulk ingestion of {len(sources)} sources failed: {str(e)}")
+        if milvus_ids:
+            try:
+                await milvus_async.delete_embedding_byids("source_embedding", milvus_ids)
+            except Exception as cleanup_error:
+                logger.error(f"Could not remove embeddings of failed bulk ingestion: {str(cleanup_error)}")
+        for source in sources:
+            yield {"source_id": str(source.id), "status": "failed", "error": str(e)}
+        return
+
+    await bump_search_version(notebook_id)
+    logger.info(
+        f"Bulk ingested {len(sources)} sources ({len(all_chunks)} chunks) "
+        f"into notebook {notebook_id} in {time.perf_counter() - started:.1f}s"
+    )
+    for source in sources:
+        yield {
+            "source_id": str(source.id),
+            "status": "created",
+            "title": source.title,
+            "embedded_chunks": source.n_embedding_chunks,
+        }
@@ -0,0 +1,155 @@
+"""
+Background writer for the long-term chat memory (Milvus `agent_memory1`).
+
+`chat_agent` used to embed every finished turn, insert it and flush the
+collection before sending its final event. Turns are now queued here and a
+single worker embeds and inserts them in batches, across all chat threads,
+and flushes the collection on a timer instead of after every write. Inserted
+turns are searchable before the flush, the flush only seals the segment.
+
+The queue is bounded: when it is full the turn is dropped with a warning
+rather than slowing the chat down. `stop()` drains what is queued.
+"""
+
+import asyncio
+import time
+from datetime import datetime
+from typing import Any, Dict, List, NamedTuple, Optional
+
+from loguru import logger
+
+from open_notebook.config import (
+    MEMORY_WRITER_BATCH_SIZE,
+    MEMORY_WRITER_FLUSH_INTERVAL,
+    MEMORY_WRITER_QUEUE_SIZE,
+)
+from open_notebook.embedding import batch_embedder
+from open_notebook.graphs.utils import MemoryAgentMilvus, _memory_agent_milvus
+
+
+class MemoryTurn(NamedTuple):
+    user_text: str
+    ai_text: str
+    thread_id: str
+    ts: str
+
+
+class LongTermMemoryWriter:
+    def __init__(
+        self,
+        memory: MemoryAgentMilvus = _memory_agent_milvus,
+        queue_size: int = MEMORY_WRITER_QUEUE_SIZE,
+        batch_size: int = MEMORY_WRITER_BATCH_SIZE,
+        flush_interval: float = MEMORY_WRITER_FLUSH_INTERVAL,
+    ):
+        self.memory = memory
+        self.queue_size = queue_size
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._unflushed = 0
+        self._last_flush = time.monotonic()
+        self._stats = {"written": 0, "dropped": 0, "failed": 0, "flushes": 0}
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def start(self) -> None:
+        if self.running or self.queue_size <= 0:
+            return
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._task = asyncio.create_task(self._worker(), name="memory-writer")
+        logger.info("Started long-term memory writer")
+
+    async def stop(self, timeout: float = 30) -> None:
+        """Write what is queued, flush, and stop the worker."""
+        if not self._task:
+            return
+        await self._queue.put(None)  # sentinel, after every queued turn
+        try:
+            await asyncio.wait_for(self._task, timeout=timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Long-term memory writer did not drain in {timeout}s, {self._queue.qsize()} turns lost")
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+        self._queue = None
+        logger.info("Stopped long-term memory writer")
+
+    async def submit(self, user_text: str, ai_text: str, thread_id: str) -> None:
+        """Queue a finished turn; written inline when the writer is not running."""
+        if not self.running:
+            await self.memory.upsert_long_term_memory(user_text=user_text, ai_text=ai_text, thread_id=thread_id)
+            return
+        try:
+            self._queue.put_nowait(MemoryTurn(user_text, ai_text, thread_id, datetime.utcnow().isoformat()))
+        except asyncio.QueueFull:
+            self._stats["dropped"] += 1
+            logger.warning(f"Long-term memory queue full, turn of thread {thread_id} not stored")
+
+    async def _worker(self) -> None:
+        stopping = False
+        while not stopping:
+            batch: List[MemoryTurn] = []
+            try:
+                item = await asyncio.wait_for(self._queue.get(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                item = None
+            else:
+                if item is None:
+                    stopping = True
+                else:
+                    batch.append(item)
+            while batch and len(batch) < self.batch_size and not self._queue.empty():
+                item = self._queue.get_nowait()
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+
+            if batch:
+                await self._write(batch)
+            if self._unflushed and (stopping or time.monotonic() - self._last_flush >= self.flush_interval):
+                await self._flush()
+
+    async def _write(self, batch: List[MemoryTurn]) -> None:
+        texts = [self.memory.format_turn(t.user_text, t.ai_text) for t in batch]
+        try:
+            embeddings = await batch_embedder.aembed(texts, use_cache=False)
+            await self.memory.insert_turns(
+                embeddings,
+                texts,
+                [t.thread_id for t in batch],
+                [t.ts for t in batch],
+            )
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self._stats["failed"] += len(batch)
+            logger.error(f"Could not store {len(batch)} long-term memory turns: {str(e)}")
+            return
+        self._unflushed += len(batch)
+        self._stats["written"] += len(batch)
+
+    async def _flush(self) -> None:
+        try:
+            await self.memory.flush()
+        except Exception as e:
+            logger.warning(f"Long-term memory flush failed: {str(e)}")
+        else:
+            self._stats["flushes"] += 1
+        self._unflushed = 0
+        self._last_flush = time.monotonic()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self.running,
+            "queued": self._queue.qsize() if self._queue else 0,
+            "unflushed": self._unflushed,
+            **self._stats,
+        }
+
+
+memory_writer = LongTermMemoryWriter()
@@ -0,0 +1,220 @@
+"""
+Optional rerank stage after hybrid retrieval.
+
+Hybrid search ranks chunks with a fixed weighted ranker over dense and BM25
+scores. With a reranker configured, callers over-fetch candidates
+(`fetch_limit`), every candidate is scored against the question by a
+cross-encoder (local CPU model) or an OpenAI-compatible `/rerank` endpoint in
+batches, and only the best k are kept. Reranker latency is logged and kept
+apart from retrieval latency.
+"""
+
+import asyncio
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+import httpx
+from loguru import logger
+
+from open_notebook.config import (
+    RERANK_API_BASE,
+    RERANK_API_KEY,
+    RERANK_BATCH_SIZE,
+    RERANK_MAX_CANDIDATES,
+    RERANK_MODEL,
+    RERANK_OVERFETCH,
+    RERANK_PROVIDER,
+    RERANK_TIMEOUT,
+)
+from open_notebook.exceptions import ExternalServiceError
+
+
+class Reranker(ABC):
+    """Scores documents against a query, higher is more relevant."""
+
+    name = "none"
+
+    @abstractmethod
+    async def score(self, query: str, documents: List[str]) -> List[float]:
+        """One score per document, in the order of `documents`."""
+
+
+class CrossEncoderReranker(Reranker):
+    """Local cross-encoder from `sentence-transformers`, run off the event loop."""
+
+    name = "cross_encoder"
+
+    def __init__(self, model_name: str = RERANK_MODEL, batch_size: int = RERANK_BATCH_SIZE):
+        self.model_name = model_name
+        self.batch_size = max(1, batch_size)
+        self._model = None
+
+    def _load(self):
+        if self._model is None:
+            try:
+                from sentence_transformers import CrossEncoder
+            except ImportError as e:
+                raise ExternalServiceError(
+                    "RERANK_PROVIDER=cross_encoder requires the sentence-transformers package"
+                ) from e
+            self._model = CrossEncoder(self.model_name, device="cpu")
+            logger.info(f"Loaded cross-encoder reranker {self.model_name}")
+        return self._model
+
+    def _predict(self, query: str, documents: List[str]) -> List[float]:
+        model = self._load()
+        scores = model.predict(
+            [(query, doc) for doc in documents], batch_size=self.batch_size
+        )
+        return [float(s) for s in scores]
+
+    async def score(self, query: str, documents: List[str]) -> List[float]:
+        return await asyncio.to_thread(self._predict, query, documents)
+
+
+class APIReranker(Reranker):
+    """
+    OpenAI-compatible rerank endpoint (vLLM, TEI, Jina, Cohere style).
+
+    POST {api_base}/rerank with {"model", "query", "documents"} and read
+    {"results": [{"index", "relevance_score"}]}. Batches are sent concurrently.
+    """
+
+    name = "api"
+
+    def __init__(
+        self,
+        api_base: str = RERANK_API_BASE,
+        model_name: str = RERANK_MODEL,
+        api_key: Optional[str] = RERANK_API_KEY,
+        batch_size: int = RERANK_BATCH_SIZE,
+        timeout: float = RERANK_TIMEOUT,
+    ):
+        self.url = f"{api_base.rstrip('/')}/rerank"
+        self.model_name = model_name
+        self.batch_size = max(1, batch_size)
+        headers = {"Authorization": f"Bearer {api_key}"} if api_key else {}
+        self._client = httpx.AsyncClient(headers=headers, timeout=timeout)
+
+    async def _score_batch(self, query: str, documents: List[str]) -> List[float]:
+        response = await self._client.post(
+            self.url,
+            json={"model": self.model_name, "query": query, "documents": documents},
+        )
+        response.raise_for_status()
+        scores = [0.0] * len(documents)
+        for result in response.json().get("results", []):
+            scores[result["index"]] = float(result["relevance_score"])
+        return scores
+
+    async def score(self, query: str, documents: List[str]) -> List[float]:
+        batches = [
+            documents[start:start + self.batch_size]
+            for start in range(0, len(documents), self.batch_size)
+        ]
+        results = await asyncio.gather(*[self._score_batch(query, b) for b in batches])
+        return [score for batch_scores in results for score in batch_scores]
+
+    async def close(self) -> None:
+        await self._client.aclose()
+
+
+def get_reranker(provider: str = RERANK_PROVIDER) -> Optional[Reranker]:
+    provider = (provider or "none").lower()
+    if provider in ("", "none"):
+        return None
+    if provider == "cross_encoder":
+        return CrossEncoderReranker()
+    if provider == "api":
+        if not RERANK_API_BASE:
+            logger.warning("RERANK_PROVIDER=api but RERANK_API_BASE is not set, reranking disabled")
+            return None
+        return APIReranker()
+    logger.warning(f"Unknown RERANK_PROVIDER {provider}, reranking disabled")
+    return None
+
+
+class RerankStage:
+    """
+    Over-fetch and rerank retrieved chunks.
+
+    A failing reranker never fails the retrieval: the hits are then returned
+    in their retrieval order.
+    """
+
+    def __init__(
+        self,
+        reranker: Optional[Reranker] = None,
+        overfetch: int = RERANK_OVERFETCH,
+        max_candidates: int = RERANK_MAX_CANDIDATES,
+        history_size: int = 1000,
+    ):
+        self.reranker = reranker
+        self.overfetch = max(1, overfetch)
+        self.max_candidates = max_candidates
+        self._history: Deque[Dict[str, Any]] = deque(maxlen=history_size)
+
+    @property
+    def enabled(self) -> bool:
+        return self.reranker is not None
+
+    def fetch_limit(self, k: int, overfetch: Optional[int] = None) -> int:
+        """Number of candidates to retrieve for a final top-k."""
+        if not self.enabled:
+            return k
+        return max(k, min(k * (overfetch or self.overfetch), self.max_candidates))
+
+    async def rerank(
+        self, query: str, hits: List[Dict[str, Any]], k: int
+    ) -> Tuple[List[Dict[str, Any]], Optional[float]]:
+        """
+        Return the best `k` of `hits` ({"id", "content", ...}) and the rerank
+        latency in seconds (None when nothing was reranked).
+        """
+        if not self.enabled or not query or len(hits) <= 1:
+            return hits[:k], None
+
+        start = time.perf_counter()
+        try:
+            scores = await self.reranker.score(query, [h["content"] or "" for h in hits])
+        except Exception as e:
+            logger.warning(f"Reranking failed, keeping retrieval order: {str(e)}")
+            return hits[:k], None
+        latency = time.perf_counter() - start
+
+        ranked = sorted(
+            ({**hit, "rerank_score": score} for hit, score in zip(hits, scores)),
+            key=lambda h: h["rerank_score"],
+            reverse=True,
+        )
+        self._history.append({"candidates": len(hits), "latency": latency})
+        logger.info(
+            f"Reranked {len(hits)} candidates to {min(k, len(hits))} "
+            f"with {self.reranker.name} in {latency:.3f}s"
+        )
+        return ranked[:k], latency
+
+    def latency_summary(self) -> Dict[str, Any]:
+        if not self._history:
+            return {"enabled": self.enabled, "calls": 0}
+        latencies = sorted(h["latency"] for h in self._history)
+        n = len(latencies)
+        return {
+            "enabled": self.enabled,
+            "reranker": self.reranker.name if self.reranker else None,
+            "calls": n,
+            "avg_candidates": sum(h["candidates"] for h in self._history) / n,
+            "avg_latency": sum(latencies) / n,
+            "p50_latency": latencies[n // 2],
+            "p95_latency": latencies[min(n - 1, int(n * 0.95))],
+            "max_latency": latencies[-1],
+        }
+
+    async def close(self) -> None:
+        if isinstance(self.reranker, APIReranker):
+            await self.reranker.close()
+
+
+rerank_stage = RerankStage(get_reranker())
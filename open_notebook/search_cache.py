@@ -0,0 +1,143 @@
+"""
+Search result cache.
+
+Results are cached in-process, keyed by (notebook_id, notebook search_version,
+source_ids filter, normalized query, search type, limit). Every source change
+bumps the `search_version` of its notebook in Postgres, so entries of an older
+version are never read again, in this or any other worker, and simply age out
+of the LRU. Misses search with Strong consistency, so a result cached under a
+version includes the writes that bumped it.
+"""
+
+import copy
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from loguru import logger
+
+from open_notebook.config import SEARCH_CACHE_ENABLED, SEARCH_CACHE_SIZE, SEARCH_CACHE_TTL
+from open_notebook.database.repository import ensure_record_id, pg_execute, repo_query
+from open_notebook.embedding import normalize_query
+
+
+async def get_search_version(notebook_id: str) -> Optional[int]:
+    rows = await repo_query(
+        "SELECT search_version FROM notebook WHERE id = :id",
+        {"id": ensure_record_id(notebook_id)},
+    )
+    return rows[0]["search_version"] if rows else None
+
+
+async def bump_search_version(notebook_id: Optional[str]) -> None:
+    """Invalidate the cached search results of a notebook."""
+    if not notebook_id:
+        return
+    try:
+        await pg_execute(
+            "UPDATE notebook SET search_version = search_version + 1 WHERE id = :id",
+            {"id": ensure_record_id(notebook_id)},
+        )
+    except Exception as e:
+        logger.error(f"Error bumping search version of notebook {notebook_id}: {str(e)}")
+
+
+class SearchResultCache:
+    def __init__(
+        self,
+        enabled: bool = SEARCH_CACHE_ENABLED,
+        max_entries: int = SEARCH_CACHE_SIZE,
+        ttl: int = SEARCH_CACHE_TTL,
+    ):
+        self.enabled = enabled and max_entries > 0
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.bypassed = 0
+        self._entries: "OrderedDict[Tuple, Tuple[float, Any]]" = OrderedDict()
+
+    def _lookup(self, key: Tuple) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        stored_at, value = entry
+        if self.ttl > 0 and time.monotonic() - stored_at > self.ttl:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def _store(self, key: Tuple, value: Any) -> None:
+        self._entries[key] = (time.monotonic(), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def get_or_search(
+        self,
+        search_type: str,
+        notebook_id: str,
+        source_ids: List[str],
+        query: Any,
+        limit: int,
+        search: Callable[[], Awaitable[Any]],
+        variant: Tuple = (),
+    ) -> Any:
+        """
+        Return the cached result of `search` for this key, running it on a miss.
+
+        `variant` holds whatever else shapes the result, e.g. the search profile.
+        `search` takes an optional Milvus `consistency_level`.
+        """
+        if not self.enabled:
+            return await search()
+        try:
+            version = await get_search_version(notebook_id)
+        except Exception as e:
+            logger.warning(f"Search cache bypassed, could not read notebook version: {str(e)}")
+            version = None
+        if version is None:
+            self.bypassed += 1
+            return await search()
+
+        queries = query if isinstance(query, (list, tuple)) else [query]
+        key = (
+            str(notebook_id),
+            version,
+            tuple(sorted(str(sid) for sid in source_ids or [])),
+            tuple(normalize_query(q) for q in queries),
+            search_type,
+            limit,
+            variant,
+        )
+        cached = self._lookup(key)
+        if cached is not None:
+            self.hits += 1
+            return copy.deepcopy(cached)
+
+        self.misses += 1
+        # the version is bumped as soon as a write returns, a Bounded search may
+        # not see that write yet and would cache a stale result under the new
+        # version; a miss reads its own writes
+        result = await search(consistency_level="Strong")
+        self._store(key, copy.deepcopy(result))
+        return result
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "bypassed": self.bypassed,
+            "hit_rate": self.hits / total if total else None,
+        }
+
+
+search_cache = SearchResultCache()
@@ -0,0 +1,226 @@
+"""
+Local router in front of the planner LLM call.
+
+Every chat turn used to wait for a full `plan_strategy` round-trip, also for
+greetings and for short questions whose text is already the right search
+term. Turns are classified here without an LLM call:
+
+    direct  greetings, thanks and questions about the conversation itself,
+            answered from chat memory without retrieval
+    search  short single questions, searched with the raw message
+    plan    everything else, planned by the LLM as before
+
+Follow-ups that refer back to the conversation ("why is that?", "explain the
+second one") are always planned when there is chat history, the planner
+resolves them against short memory. Rules decide first. With
+TURN_ROUTER_EMBEDDINGS a `search` decision is also compared to a few example
+turns per route and the closest route wins when its cosine similarity
+reaches TURN_ROUTER_MIN_SIMILARITY. Every decision is logged with
+the planner latency it saved, so the thresholds can be tuned from the logs or
+`stats()`.
+"""
+
+import re
+import time
+from collections import Counter, deque
+from typing import Any, Deque, Dict, List, NamedTuple, Optional
+
+import numpy as np
+from loguru import logger
+
+from open_notebook.config import (
+    TURN_ROUTER_EMBEDDINGS,
+    TURN_ROUTER_ENABLED,
+    TURN_ROUTER_MAX_SEARCH_WORDS,
+    TURN_ROUTER_MIN_SIMILARITY,
+)
+from open_notebook.embedding import embed_queries, embed_query
+
+ROUTE_DIRECT = "direct"
+ROUTE_SEARCH = "search"
+ROUTE_PLAN = "plan"
+
+SMALL_TALK = re.compile(
+    r"^(hi|hello|hey|yo|good (morning|afternoon|evening)|thanks?( you)?( so much| a lot)?|"
+    r"thank u|ok(ay)?|oke|bye|goodbye|see you|"
+    r"(xin )?chào( bạn)?|alo|cảm ơn( bạn)?( nhiều)?|cám ơn( bạn)?( nhiều)?|tạm biệt|được rồi)$"
+)
+ABOUT_CONVERSATION = re.compile(
+    r"\b(my name|who am i|who are you|what did i (just )?(say|ask)|"
+    r"what (was|were) we (talking|discussing)|"
+    r"tên (của )?(tôi|mình|em)|(tôi|mình|em) (tên|là ai)|bạn là ai|"
+    r"(tôi|mình|em) vừa (hỏi|nói))\b"
+)
+MULTI_PART = re.compile(
+    r"\b(and|or|versus|vs|compare|comparison|difference|differences|"
+    r"và|hoặc|so sánh|khác nhau|khác biệt)\b"
+)
+
+# pronouns, demonstratives and follow-up openers that need the previous turns
+REFERENTIAL = re.compile(
+    r"\b(it|its|that|this|these|those|they|them|their|he|she|him|her|his|"
+    r"one|ones|former|latter|above|previous|same|else|more|"
+    r"what about|how about|why not|"
+    r"nó|đó|này|ấy|kia|vậy|thế|họ|trên|trước|còn|thì sao|nữa)\b"
+)
+FRAGMENT_WORDS = 2  # messages this short are treated as follow-up fragments
+
+EXAMPLES = {
+    ROUTE_DIRECT: [
+        "hello, how are you?",
+        "thank you, that helps",
+        "what is my name?",
+        "xin chào bạn",
+        "cảm ơn bạn nhiều",
+        "tôi vừa hỏi gì?",
+    ],
+    ROUTE_SEARCH: [
+        "what is retrieval augmented generation?",
+        "who is the author of this paper?",
+        "RAG là gì?",
+        "tác giả của tài liệu là ai?",
+    ],
+    ROUTE_PLAN: [
+        "compare the methods of these documents and explain their trade-offs",
+        "summarize the main arguments of the sources with their evidence",
+        "so sánh các phương pháp trong tài liệu và giải thích ưu nhược điểm",
+        "phân tích nguyên nhân và hệ quả được nêu trong các tài liệu",
+    ],
+}
+
+
+class RouteDecision(NamedTuple):
+    route: str
+    reason: str
+    latency: float
+
+
+def _clauses(message: str) -> List[str]:
+    return [c.strip() for c in re.split(r"[.!?;,\n]+", message.lower()) if c.strip()]
+
+
+def is_referential(message: str) -> bool:
+    """Whether `message` likely refers back to earlier turns."""
+    return len(message.split()) <= FRAGMENT_WORDS or bool(REFERENTIAL.search(message.lower()))
+
+
+def classify_by_rules(
+    message: str,
+    has_history: bool = False,
+    max_search_words: int = TURN_ROUTER_MAX_SEARCH_WORDS,
+) -> RouteDecision:
+    clauses = _clauses(message)
+    if not clauses:
+        return RouteDecision(ROUTE_DIRECT, "empty message", 0.0)
+    if all(SMALL_TALK.match(c) or ABOUT_CONVERSATION.search(c) for c in clauses):
+        return RouteDecision(ROUTE_DIRECT, "small talk or about the conversation", 0.0)
+
+    if has_history and is_referential(message):
+        return RouteDecision(ROUTE_PLAN, "follow-up referring to the conversation", 0.0)
+    words = len(message.split())
+    if words > max_search_words:
+        return RouteDecision(ROUTE_PLAN, f"{words} words", 0.0)
+    if message.count("?") > 1 or MULTI_PART.search(message.lower()):
+        return RouteDecision(ROUTE_PLAN, "multi-part question", 0.0)
+    return RouteDecision(ROUTE_SEARCH, f"short question ({words} words)", 0.0)
+
+
+class TurnRouter:
+    def __init__(
+        self,
+        enabled: bool = TURN_ROUTER_ENABLED,
+        use_embeddings: bool = TURN_ROUTER_EMBEDDINGS,
+        min_similarity: float = TURN_ROUTER_MIN_SIMILARITY,
+        history_size: int = 1000,
+    ):
+        self.enabled = enabled
+        self.use_embeddings = use_embeddings
+        self.min_similarity = min_similarity
+        self._examples: Optional[np.ndarray] = None
+        self._example_routes: List[str] = []
+        self._example_texts: List[str] = []
+        self._history: Deque[Dict[str, Any]] = deque(maxlen=history_size)
+        self._planner_latencies: Deque[float] = deque(maxlen=history_size)
+
+    async def _load_examples(self) -> np.ndarray:
+        if self._examples is None:
+            texts = [t for route_texts in EXAMPLES.values() for t in route_texts]
+            vectors = np.asarray(await embed_queries(texts), dtype=np.float32)
+            self._examples = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+            self._example_routes = [r for r, route_texts in EXAMPLES.items() for _ in route_texts]
+            self._example_texts = texts
+        return self._examples
+
+    async def _classify_by_similarity(self, message: str) -> Optional[RouteDecision]:
+        try:
+            examples = await self._load_examples()
+            vector = np.asarray(await embed_query(message), dtype=np.float32)
+        except Exception as e:
+            logger.warning(f"Turn router embeddings unavailable, using rules only: {str(e)}")
+            self.use_embeddings = False
+            return None
+        similarities = examples @ (vector / np.linalg.norm(vector))
+        best = int(np.argmax(similarities))
+        if similarities[best] < self.min_similarity:
+            return None
+        return RouteDecision(
+            self._example_routes[best],
+            f"similar to '{self._example_texts[best]}' ({similarities[best]:.2f})",
+            0.0,
+        )
+
+    async def classify(self, message: str, has_history: bool = False, record: bool = True) -> RouteDecision:
+        """
+        Route of a chat turn, `plan` when the router is disabled. `has_history`
+        tells whether the session has earlier messages (short memory).
+        """
+        if not self.enabled:
+            return RouteDecision(ROUTE_PLAN, "router disabled", 0.0)
+
+        start = time.perf_counter()
+        decision = classify_by_rules(message, has_history)
+        # embeddings only refine the raw-message search, never a planned turn
+        if decision.route == ROUTE_SEARCH and self.use_embeddings:
+            decision = await self._classify_by_similarity(message) or decision
+        decision = decision._replace(latency=time.perf_counter() - start)
+
+        if record:
+            self._history.append({"route": decision.route, "latency": decision.latency})
+            saved = self.average_planner_latency()
+            skipped = (
+                f", planner call skipped (~{saved:.2f}s saved)"
+                if decision.route != ROUTE_PLAN and saved is not None
+                else ""
+            )
+            logger.info(
+                f"Turn routed to {decision.route} ({decision.reason}) "
+                f"in {decision.latency * 1000:.1f}ms{skipped}"
+            )
+        return decision
+
+    def record_planner_latency(self, latency: float) -> None:
+        """Latency of a full planner call, the saving of every fast-path turn."""
+        self._planner_latencies.append(latency)
+
+    def average_planner_latency(self) -> Optional[float]:
+        if not self._planner_latencies:
+            return None
+        return sum(self._planner_latencies) / len(self._planner_latencies)
+
+    def stats(self) -> Dict[str, Any]:
+        routes = Counter(h["route"] for h in self._history)
+        n = len(self._history)
+        planner = self.average_planner_latency()
+        fast_path = n - routes[ROUTE_PLAN]
+        return {
+            "enabled": self.enabled,
+            "embeddings": self.use_embeddings,
+            "turns": n,
+            "routes": dict(routes),
+            "avg_router_latency": sum(h["latency"] for h in self._history) / n if n else None,
+            "avg_planner_latency": planner,
+            "estimated_saved_seconds": fast_path * planner if planner is not None else None,
+        }
+
+
+turn_router = TurnRouter()
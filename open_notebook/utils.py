@@ -1,7 +1,7 @@
 import re
 import unicodedata
 from importlib.metadata import PackageNotFoundError, version
-from typing import Tuple
+from typing import List, Tuple
 from urllib.parse import urlparse
 import os
 import requests
@@ -42,6 +42,23 @@ def time_node(func):
         return async_wrapper
 
 
+TOKEN_ENCODING = "o200k_base"
+TOKEN_COUNT_CACHE_SIZE = int(os.getenv("TOKEN_COUNT_CACHE_SIZE", "65536"))
+
+
+@functools.lru_cache(maxsize=None)
+def get_encoding(encoding_name: str = TOKEN_ENCODING):
+    """
+    Return the process-wide tiktoken encoder for `encoding_name`.
+
+    The encoder is loaded once and reused, so counting tokens does not pay
+    for an encoding lookup on every call.
+    """
+    import tiktoken
+
+    return tiktoken.get_encoding(encoding_name)
+
+
 def token_count(input_string) -> int:
     """
     Count the number of tokens in the input string using the 'o200k_base' encoding.
@@ -52,12 +69,36 @@ def token_count(input_string) -> int:
     Returns:
         int: The number of tokens in the input string.
     """
-    import tiktoken
+    return len(get_encoding().encode_ordinary(input_string))
+
 
-    encoding = tiktoken.get_encoding("o200k_base")
-    tokens = encoding.encode(input_string)
-    token_count = len(tokens)
-    return token_count
+@functools.lru_cache(maxsize=TOKEN_COUNT_CACHE_SIZE)
+def cached_token_count(input_string: str) -> int:
+    """
+    Memoized `token_count`.
+
+    Text splitters measure the same pieces many times while merging splits,
+    so repeated substrings are only tokenized once.
+    """
+    return token_count(input_string)
+
+
+def token_counts(input_strings: List[str]) -> List[int]:
+    """
+    Count tokens for many strings in one call.
+
+    Every string goes through the memoized `cached_token_count`, so duplicates
+    and pieces already measured by `split_text` are not tokenized again. For
+    chunk-sized strings this loop is faster than tiktoken's threaded
+    `encode_ordinary_batch`, whose thread pool overhead dominates.
+
+    Args:
+        input_strings (List[str]): The strings to count tokens for.
+
+    Returns:
+        List[int]: The number of tokens of each string, in input order.
+    """
+    return [cached_token_count(text) for text in input_strings]
 
 
 def token_cost(token_count, cost_per_million=0.150) -> float:
@@ -91,7 +132,7 @@ def split_text(txt: str, chunk_size=500):
     text_splitter = RecursiveCharacterTextSplitter(
         chunk_size=chunk_size,
         chunk_overlap=overlap,
-        length_function=token_count,
+        length_function=cached_token_count,
         separators=[
             "\n\n",
             "\n",
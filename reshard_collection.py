@@ -0,0 +1,119 @@
+"""
+Re-shard the `source_embedding` collection onto the notebook_id partition key.
+
+Collections created before the partition key was introduced keep every
+notebook in one flat index. This copies all chunks into a new collection that
+uses notebook_id as partition key, remaps source_embedding_ids in Postgres to
+the new primary keys, then drops the old collection and renames the new one.
+
+Stop the API and ingestion workers while it runs. Chunk ids handed out before
+the re-shard (e.g. `source_embedding:<id>` references in old chat answers) no
+longer resolve afterwards.
+
+    python reshard_collection.py [--batch-size 1000] [--dry-run]
+"""
+
+import argparse
+import asyncio
+
+from dotenv import load_dotenv
+from loguru import logger
+from sqlalchemy import text
+
+from open_notebook.database.milvus_init import (
+    close_milvus_client,
+    create_source_embedding_collection,
+    get_milvus_client,
+    has_partition_key,
+)
+from open_notebook.database.repository import transaction
+
+load_dotenv()
+
+COLLECTION = "source_embedding"
+TMP_COLLECTION = "source_embedding_resharded"
+FIELDS = ["primary_key", "dense_vector", "content", "order", "source_id", "notebook_id"]
+
+
+def copy_chunks(client, batch_size: int):
+    """Copy every chunk into TMP_COLLECTION and return {old primary key: new primary key}."""
+    id_map = {}
+    iterator = client.query_iterator(
+        collection_name=COLLECTION,
+        batch_size=batch_size,
+        filter="",
+        output_fields=FIELDS,
+    )
+    try:
+        while True:
+            rows = iterator.next()
+            if not rows:
+                break
+            old_ids = [row["primary_key"] for row in rows]
+            # sparse_vector is recomputed by the BM25 function on insert
+            res = client.insert(
+                collection_name=TMP_COLLECTION,
+                data=[{k: row[k] for k in FIELDS if k != "primary_key"} for row in rows],
+            )
+            id_map.update(zip(old_ids, res["ids"]))
+            logger.info(f"Copied {len(id_map)} chunks")
+    finally:
+        iterator.close()
+    return id_map
+
+
+async def remap_chunk_ids(id_map, batch_size: int):
+    items = list(id_map.items())
+    async with transaction() as session:
+        for start in range(0, len(items), batch_size):
+            batch = items[start:start + batch_size]
+            await session.execute(
+                text(
+                    """
+                    UPDATE source_embedding_ids s
+                    SET source_embedding_id = m.new_id
+                    FROM unnest(CAST(:old_ids AS BIGINT[]), CAST(:new_ids AS BIGINT[])) AS m(old_id, new_id)
+                    WHERE s.source_embedding_id = m.old_id
+                    """
+                ),
+                {"old_ids": [o for o, _ in batch], "new_ids": [n for _, n in batch]},
+            )
+    logger.info(f"Remapped {len(items)} chunk ids in source_embedding_ids")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--dry-run", action="store_true", help="only report whether a re-shard is needed")
+    args = parser.parse_args()
+
+    client = get_milvus_client()
+    if has_partition_key(client, COLLECTION):
+        print(f"{COLLECTION} already uses notebook_id as partition key, nothing to do.")
+        return
+    stats = client.get_collection_stats(COLLECTION)
+    print(f"{COLLECTION} has no partition key ({stats.get('row_count')} rows) and needs a re-shard.")
+    if args.dry_run:
+        return
+
+    if client.has_collection(TMP_COLLECTION):
+        # left over by an interrupted run
+        client.drop_collection(TMP_COLLECTION)
+    create_source_embedding_collection(client, TMP_COLLECTION)
+
+    client.load_collection(COLLECTION)
+    id_map = copy_chunks(client, args.batch_size)
+    client.flush(TMP_COLLECTION)
+
+    # the old collection is still intact if this fails
+    await remap_chunk_ids(id_map, args.batch_size)
+
+    client.drop_collection(COLLECTION)
+    client.rename_collection(TMP_COLLECTION, COLLECTION)
+    client.load_collection(COLLECTION)
+    close_milvus_client()
+    print(f"Re-sharded {len(id_map)} chunks into {COLLECTION}.")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
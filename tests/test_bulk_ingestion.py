@@ -0,0 +1,60 @@
+import asyncio
+from types import SimpleNamespace
+
+from open_notebook import ingestion
+from open_notebook.database import milvus_async
+
+
+def test_failed_slice_leaves_no_embeddings_in_milvus(monkeypatch):
+    """A bulk ingestion whose second Milvus slice fails removes the first one."""
+    stored = {}
+    next_id = iter(range(1, 1000))
+    inserts = []
+
+    async def insert_data(collection_name, data):
+        inserts.append(len(data))
+        if len(inserts) == 2:
+            raise RuntimeError("slice failed")
+        ids = [next(next_id) for _ in data]
+        stored.update(zip(ids, data))
+        return ids
+
+    async def delete_embedding_byids(collection_name, ids):
+        for pk in ids:
+            stored.pop(pk, None)
+
+    async def repo_query(query, params=None):
+        return []
+
+    async def content_process(state):
+        return {
+            "content_state": SimpleNamespace(
+                title="doc", content="text", url=None, file_path=None
+            )
+        }
+
+    async def aembed(texts, model=None, use_cache=True):
+        return [[0.0] * 4 for _ in texts]
+
+    monkeypatch.setattr(milvus_async, "insert_data", insert_data)
+    monkeypatch.setattr(milvus_async, "delete_embedding_byids", delete_embedding_byids)
+    monkeypatch.setattr(ingestion, "repo_query", repo_query)
+    monkeypatch.setattr(ingestion, "content_process", content_process)
+    monkeypatch.setattr(ingestion, "split_text", lambda text: ["a", "b", "c"])
+    monkeypatch.setattr(ingestion.batch_embedder, "aembed", aembed)
+    monkeypatch.setattr(ingestion, "MILVUS_INSERT_BATCH_SIZE", 2)
+
+    items = [
+        {"source_id": f"00000000-0000-0000-0000-00000000000{n}", "content_state": {"content": "text"}}
+        for n in range(1, 3)
+    ]
+
+    async def run():
+        return [event async for event in ingestion.ingest_sources_bulk("notebook", items)]
+
+    events = asyncio.run(run())
+
+    assert len(inserts) == 2  # first slice written, second slice failed
+    assert stored == {}
+    failed = [e for e in events if e["status"] == "failed"]
+    assert {e["source_id"] for e in failed} == {item["source_id"] for item in items}
@@ -0,0 +1,91 @@
+"""
+Microbenchmark: compiling the conversation graph per request vs the registry.
+
+`send_message` and `stream_chat` used to compile the graph twice per chat
+turn (once in `get_session` to read the thread state, once to run it). With
+`graph_registry` both reuse the graph compiled at startup.
+
+Old path: `build_conversation_graph().compile(checkpointer=...)` twice per turn.
+New path: `graph_registry.get(checkpointer)` twice per turn.
+
+An in-memory checkpointer is used so only graph work is measured, pass
+--postgres to use the real checkpointer pool instead.
+
+Run from the repository root:
+    python utils/bench_graph_compile.py [--requests 200] [--postgres]
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langgraph.checkpoint.memory import MemorySaver
+
+from open_notebook.graphs.ask_chat import CompiledGraphRegistry, build_conversation_graph
+
+COMPILES_PER_TURN = 2  # get_session + the chat endpoint itself
+
+
+def legacy_turn(builder, checkpointer):
+    for _ in range(COMPILES_PER_TURN):
+        builder.compile(checkpointer=checkpointer)
+
+
+def registry_turn(registry, checkpointer):
+    for _ in range(COMPILES_PER_TURN):
+        registry.get(checkpointer)
+
+
+def bench(fn, requests: int):
+    timings = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    return {
+        "mean_ms": statistics.mean(timings) * 1000,
+        "p50_ms": timings[len(timings) // 2] * 1000,
+        "p95_ms": timings[min(len(timings) - 1, int(len(timings) * 0.95))] * 1000,
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=200, help="chat turns simulated per path")
+    parser.add_argument("--postgres", action="store_true", help="use the Postgres checkpointer")
+    args = parser.parse_args()
+
+    if args.postgres:
+        from open_notebook.graphs.utils import close_pool, get_checkpointer
+
+        checkpointer = await get_checkpointer()
+    else:
+        checkpointer = MemorySaver()
+
+    # old code cached the builder too, only compile() ran per request
+    builder = build_conversation_graph()
+    registry = CompiledGraphRegistry()
+    registry.get(checkpointer)  # compiled at startup
+
+    legacy = bench(lambda: legacy_turn(builder, checkpointer), args.requests)
+    cached = bench(lambda: registry_turn(registry, checkpointer), args.requests)
+
+    print(f"{args.requests} chat turns, {COMPILES_PER_TURN} graph lookups per turn "
+          f"(send_message and stream_chat take the same path)")
+    print(f"{'path':<22}{'mean ms':>10}{'p50 ms':>10}{'p95 ms':>10}")
+    for name, result in (("compile per request", legacy), ("compiled registry", cached)):
+        print(f"{name:<22}{result['mean_ms']:>10.3f}{result['p50_ms']:>10.3f}{result['p95_ms']:>10.3f}")
+    print(f"saving per chat turn: {legacy['mean_ms'] - cached['mean_ms']:.3f} ms "
+          f"(registry compiled {registry.compilations} time(s))")
+
+    if args.postgres:
+        await close_pool()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,102 @@
+"""
+Microbenchmark: chunking a 1 MB document with the old and new token-length paths.
+
+Old path: `tiktoken.get_encoding` on every length call, no memoization.
+New path: `open_notebook.utils.split_text` (cached encoder + memoized length).
+
+Run from the repository root:
+    python utils/bench_token_count.py [--size-mb 1] [--repeat 3]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+from open_notebook.utils import cached_token_count, get_encoding, split_text, token_counts
+
+EXAMPLE_SOURCE_FILE = "utils/example_source.txt"
+
+
+def legacy_token_count(input_string) -> int:
+    import tiktoken
+
+    encoding = tiktoken.get_encoding("o200k_base")
+    return len(encoding.encode(input_string))
+
+
+def legacy_split_text(txt: str, chunk_size=500):
+    overlap = int(chunk_size * 0.15)
+    text_splitter = RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size,
+        chunk_overlap=overlap,
+        length_function=legacy_token_count,
+        separators=["\n\n", "\n", ".", "\u200b", "\uff0c", "\u3001", "\uff0e", "\u3002"],
+    )
+    return text_splitter.split_text(txt)
+
+
+def build_text(size_bytes: int, seed: int = 0) -> str:
+    """Build a document of `size_bytes` from shuffled sentences of the example source."""
+    with open(EXAMPLE_SOURCE_FILE, "r", encoding="utf-8") as f:
+        sentences = [s.strip() for s in f.read().split(".") if s.strip()]
+    rng = random.Random(seed)
+    paragraphs = []
+    total = 0
+    i = 0
+    while total < size_bytes:
+        picked = rng.sample(sentences, k=min(len(sentences), rng.randint(3, 8)))
+        paragraph = f"Section {i}. " + ". ".join(picked) + ".\n\n"
+        paragraphs.append(paragraph)
+        total += len(paragraph.encode("utf-8"))
+        i += 1
+    return "".join(paragraphs)
+
+
+def bench(fn, text: str, repeat: int):
+    timings = []
+    result = None
+    for _ in range(repeat):
+        cached_token_count.cache_clear()
+        start = time.perf_counter()
+        result = fn(text)
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size-mb", type=float, default=1.0)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    text = build_text(int(args.size_mb * 1024 * 1024))
+    get_encoding()  # load the encoder outside the timed region for both paths
+    print(f"Document size: {len(text.encode('utf-8')) / 1024 / 1024:.2f} MB")
+
+    old_time, old_chunks = bench(legacy_split_text, text, args.repeat)
+    new_time, new_chunks = bench(split_text, text, args.repeat)
+
+    print(f"old split_text: {old_time:.3f}s ({len(old_chunks)} chunks)")
+    print(f"new split_text: {new_time:.3f}s ({len(new_chunks)} chunks)")
+    print(f"speedup: {old_time / new_time:.1f}x")
+    print(f"cache: {cached_token_count.cache_info()}")
+    if old_chunks != new_chunks:
+        print("WARNING: chunking results differ between old and new paths")
+
+    start = time.perf_counter()
+    singles = [legacy_token_count(c) for c in new_chunks]
+    single_time = time.perf_counter() - start
+    start = time.perf_counter()
+    batched = token_counts(new_chunks)
+    batch_time = time.perf_counter() - start
+    assert singles == batched
+    print(f"count {len(new_chunks)} chunks one by one: {single_time:.3f}s, batched: {batch_time:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,6 +4,7 @@ import sys
 from typing import Dict, List, Optional
 from pathlib import Path
 import time 
+import uuid
 
 # Configuration
 API_BASE = "http://localhost:9992/api"
@@ -55,6 +56,25 @@ def make_request(method: str, endpoint: str, data: Optional[Dict] = None) -> Dic
         sys.exit(1)
 
 
+def bulk_create_sources(notebook_id: str, items: List[Dict]) -> List[Dict]:
+    """Create many sources with one POST /sources/bulk and print per-item results as they stream in"""
+    url = f"{API_BASE}/sources/bulk"
+    headers = {
+        'Content-Type': 'application/json',
+        'Authorization': f'Bearer {AUTH_TOKEN}'
+    }
+    results = []
+    with requests.post(url, headers=headers, json={"notebook_id": notebook_id, "embed": True, "items": items}, stream=True) as response:
+        response.raise_for_status()
+        for line in response.iter_lines():
+            if not line:
+                continue
+            result = json.loads(line)
+            color = Colors.RED if result.get("status") in ("failed", "error") else Colors.GREEN
+            print_colored(json.dumps(result, ensure_ascii=False), color)
+            results.append(result)
+    return results
+
 def get_existing_notebooks() -> List[Dict]:
     """Get list of existing notebooks"""
     print_colored("Getting existing notebooks...", Colors.YELLOW)
@@ -206,22 +226,18 @@ def main():
         print(f"\n\n\n\nProcessing new {batch_size} files")
         
         # update đủ batch size data
+        items = []
         for file_path in file_paths[i:i+batch_size]:
             print("ADDING FILE: ", file_path.name)
-            payload = {
-                "notebook_id": notebook_id,
+            items.append({
                 "source_id": str(uuid.uuid4()),
                 "type": 'upload',
                 "file_path": str(file_path),
-                "content": None,
-                "title": None,
-                "transformations": [],
-                "embed": True,
                 "delete_source": False,
-            }   
-            
-            make_request('POST', '/sources', payload)
-            
+            })
+        bulk_create_sources(notebook_id, items)
+
+        for file_path in file_paths[i:i+batch_size]:
             for _qa in qa_data:
                 if _qa['doc'] == file_path.name: 
                     _qa['note'] = "Câu hỏi của document."
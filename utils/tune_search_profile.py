@@ -0,0 +1,188 @@
+"""
+Sweep hybrid search profiles against a labeled QA set.
+
+Every profile of the grid is run for every question through POST /search/multi
+(one query, reranking off) and scored by recall@k against the labels; the
+report lists recall@k next to the search latency so the fastest profile that
+still meets the quality bar can be picked, and optionally stored for the
+notebook with --apply.
+
+QA set: one JSON object per line
+
+    {"question": "...", "relevant_chunk_ids": ["source_embedding:..."],
+     "relevant_source_ids": ["..."], "answer_contains": ["..."],
+     "notebook_id": "..."}
+
+Any of the label lists may be given, notebook_id defaults to --notebook-id or
+utils/id_notebook. Run the API with SEARCH_CACHE_ENABLED=false, otherwise the
+repeated questions are answered from the search result cache.
+
+    python utils/tune_search_profile.py utils/qa.jsonl --k 5 --min-recall 0.8 \\
+        --fusion weighted,rrf --dense-weights 0.3,0.5,0.7 --nprobe 8,16,32
+"""
+
+import argparse
+import itertools
+import json
+import sys
+import time
+from typing import Dict, List, Optional
+
+import requests
+
+API_BASE = "http://localhost:4427/api"
+AUTH_TOKEN = "1234567890"
+ID_NOTEBOOK_FILE = "utils/id_notebook"
+
+HEADERS = {
+    'accept': 'application/json',
+    'Content-Type': 'application/json',
+    'Authorization': f'Bearer {AUTH_TOKEN}'
+}
+
+
+def csv(cast):
+    return lambda value: [cast(v) for v in value.split(",") if v.strip()]
+
+
+def load_qa_set(path: str, default_notebook_id: Optional[str]) -> List[Dict]:
+    items = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            item = json.loads(line)
+            item.setdefault("notebook_id", default_notebook_id)
+            if not item["notebook_id"]:
+                sys.exit(f"No notebook_id for question: {item['question']}")
+            items.append(item)
+    return items
+
+
+def build_profiles(args) -> List[Dict]:
+    profiles = []
+    for fusion, nprobe, drop_ratio, factor in itertools.product(
+        args.fusion, args.nprobe, args.drop_ratios, args.candidate_factors
+    ):
+        base = {"fusion": fusion, "nprobe": nprobe, "drop_ratio_search": drop_ratio, "candidate_factor": factor}
+        if fusion == "rrf":
+            profiles.extend({**base, "rrf_k": rrf_k} for rrf_k in args.rrf_k)
+        else:
+            profiles.extend(
+                {**base, "dense_weight": w, "sparse_weight": round(1 - w, 4)} for w in args.dense_weights
+            )
+    return profiles
+
+
+def recall(item: Dict, hits: List[Dict]) -> Optional[float]:
+    """Share of the labels of `item` found in `hits`, None if it has no labels."""
+    labels = 0
+    found = 0
+    hit_ids = {h["id"] for h in hits}
+    hit_sources = {h.get("source_id") for h in hits}
+    text = "\n".join(h.get("content") or "" for h in hits).lower()
+    for chunk_id in item.get("relevant_chunk_ids", []):
+        labels += 1
+        found += chunk_id in hit_ids
+    for source_id in item.get("relevant_source_ids", []):
+        labels += 1
+        found += source_id in hit_sources
+    for answer in item.get("answer_contains", []):
+        labels += 1
+        found += answer.lower() in text
+    return found / labels if labels else None
+
+
+def run_profile(profile: Dict, qa_set: List[Dict], k: int) -> Dict:
+    recalls = []
+    latencies = []
+    for item in qa_set:
+        payload = {
+            "queries": [item["question"]],
+            "notebook_id": item["notebook_id"],
+            "limit": k,
+            "rerank": False,
+            "search_profile": profile,
+        }
+        start = time.perf_counter()
+        response = requests.post(f"{API_BASE}/search/multi", headers=HEADERS, json=payload)
+        latencies.append(time.perf_counter() - start)
+        response.raise_for_status()
+        score = recall(item, response.json()["merged"][:k])
+        if score is not None:
+            recalls.append(score)
+    latencies.sort()
+    n = len(latencies)
+    return {
+        "profile": profile,
+        "recall": sum(recalls) / len(recalls) if recalls else 0.0,
+        "avg_latency": sum(latencies) / n,
+        "p95_latency": latencies[min(n - 1, int(n * 0.95))],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("qa_set", help="labeled QA set (JSONL)")
+    parser.add_argument("--notebook-id", help="notebook of questions without notebook_id")
+    parser.add_argument("--k", type=int, default=5, help="recall@k")
+    parser.add_argument("--min-recall", type=float, default=0.8, help="quality bar for the recommendation")
+    parser.add_argument("--fusion", type=csv(str), default=["weighted", "rrf"])
+    parser.add_argument("--dense-weights", type=csv(float), default=[0.3, 0.5, 0.7])
+    parser.add_argument("--rrf-k", type=csv(int), default=[60])
+    parser.add_argument("--nprobe", type=csv(int), default=[10])
+    parser.add_argument("--drop-ratios", type=csv(float), default=[0.2])
+    parser.add_argument("--candidate-factors", type=csv(int), default=[1])
+    parser.add_argument("--warmup", type=int, default=3, help="untimed questions before the sweep")
+    parser.add_argument("--apply", action="store_true", help="store the recommended profile for the notebook")
+    args = parser.parse_args()
+
+    notebook_id = args.notebook_id
+    if not notebook_id:
+        try:
+            with open(ID_NOTEBOOK_FILE) as f:
+                notebook_id = f.read().strip()
+        except FileNotFoundError:
+            notebook_id = None
+    qa_set = load_qa_set(args.qa_set, notebook_id)
+    profiles = build_profiles(args)
+
+    cache = requests.get(f"{API_BASE}/search/cache/stats", headers=HEADERS).json()
+    if cache.get("enabled"):
+        print("Warning: the search result cache is enabled, latencies of repeated questions are cache hits.")
+
+    # connections, embedding model and Milvus collection warm
+    if args.warmup:
+        run_profile({}, qa_set[:args.warmup], args.k)
+
+    print(f"{len(profiles)} profiles x {len(qa_set)} questions, recall@{args.k}")
+    results = []
+    for profile in profiles:
+        result = run_profile(profile, qa_set, args.k)
+        results.append(result)
+        print(
+            f"recall={result['recall']:.3f} avg={result['avg_latency'] * 1000:.1f}ms "
+            f"p95={result['p95_latency'] * 1000:.1f}ms {json.dumps(profile)}"
+        )
+
+    passing = [r for r in results if r["recall"] >= args.min_recall]
+    if not passing:
+        best = max(results, key=lambda r: r["recall"])
+        print(f"\nNo profile reaches recall@{args.k} >= {args.min_recall}, best is {best['recall']:.3f}:")
+        print(json.dumps(best["profile"], indent=2))
+        return
+    fastest = min(passing, key=lambda r: r["avg_latency"])
+    print(f"\nFastest profile with recall@{args.k} >= {args.min_recall}:")
+    print(json.dumps(fastest, indent=2))
+
+    if args.apply:
+        notebook_ids = {item["notebook_id"] for item in qa_set}
+        for nb_id in notebook_ids:
+            requests.put(
+                f"{API_BASE}/notebooks/{nb_id}/search-profile", headers=HEADERS, json=fastest["profile"]
+            ).raise_for_status()
+            print(f"Stored for notebook {nb_id}")
+
+
+if __name__ == "__main__":
+    main()